@@ -0,0 +1,455 @@
+"""
+Pre-aggregated Analytics Rollups
+Hourly and daily summary documents kept up to date with $inc upserts as
+orders are created and change status, so Database.get_analytics reads a
+few dozen small documents instead of scanning every order in the window.
+
+Each rollup document (collection `analytics_rollups`) holds, for the
+orders *created* in its hour/day:
+- orders: order count
+- revenue: total of orders currently in a paid status
+- items.<name>: quantities ordered
+- hll.<register>: HyperLogLog registers of customer phones (merged with
+  $max) - unique customers to within ~3%
+
+A coverage document records since when every order is in the rollups:
+the hour after the first incrementally recorded order, or the start of a
+backfill. Windows reaching further back are answered by the order scan
+(Database.get_analytics), so an existing deployment keeps its history
+before anyone runs the backfill.
+
+Backfill / rebuild from the orders collection:
+    python -m analytics_rollups backfill            # everything
+    python -m analytics_rollups backfill --days 30  # last 30 days only
+"""
+
+import argparse
+import hashlib
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+# Statuses whose totals count as revenue (same set the order scan used)
+REVENUE_STATUSES = frozenset([
+    "PAID", "CONFIRMED", "COOKING", "READY", "DISPATCHED", "DELIVERED"
+])
+
+HOUR = "hour"
+DAY = "day"
+
+COVERAGE_ID = "coverage"
+# Coverage of a backfill over all history
+ALL_HISTORY = datetime(1970, 1, 1)
+
+
+# ==================== UNIQUE-CUSTOMER SKETCH ====================
+
+class HyperLogLog:
+    """
+    HyperLogLog cardinality sketch with 2**precision registers
+
+    Registers only ever grow, so a sketch can be maintained in MongoDB with
+    {"$max": {"hll.<index>": rank}} and merged by taking per-register maxima.
+    """
+
+    def __init__(self, precision: int = 10, registers: Optional[Dict[int, int]] = None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers: Dict[int, int] = dict(registers or {})
+
+    @staticmethod
+    def register_of(value: str, precision: int = 10) -> Tuple[int, int]:
+        """(register index, rank) one value sets"""
+        hashed = int.from_bytes(hashlib.sha1(value.encode("utf-8")).digest()[:8], "big")
+        index = hashed >> (64 - precision)
+        remaining = hashed & ((1 << (64 - precision)) - 1)
+        rank = (64 - precision) - remaining.bit_length() + 1
+        return index, rank
+
+    def add(self, value: str):
+        index, rank = self.register_of(value, self.precision)
+        if rank > self.registers.get(index, 0):
+            self.registers[index] = rank
+
+    def merge(self, registers: Dict) -> "HyperLogLog":
+        """Fold in registers (keys may be str, as stored in MongoDB)"""
+        for index, rank in registers.items():
+            index = int(index)
+            if rank > self.registers.get(index, 0):
+                self.registers[index] = rank
+        return self
+
+    def estimate(self) -> int:
+        if not self.registers:
+            return 0
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        zeros = m - len(self.registers)
+        harmonic = zeros + sum(2.0 ** -rank for rank in self.registers.values())
+        estimate = alpha * m * m / harmonic
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction: linear counting
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+# ==================== ROLLUP DOCUMENTS ====================
+
+def _field_name(item_name: str) -> str:
+    """Item name usable as a MongoDB field name (no '.' / leading '$')"""
+    return item_name.replace(".", "．").replace("$", "＄")
+
+
+def _item_name(field_name: str) -> str:
+    return field_name.replace("．", ".").replace("＄", "$")
+
+
+def bucket_starts(created_at: datetime) -> Tuple[datetime, datetime]:
+    """(hour start, day start) of an order's creation time"""
+    hour = created_at.replace(minute=0, second=0, microsecond=0)
+    return hour, hour.replace(hour=0)
+
+
+def bucket_id(granularity: str, start: datetime) -> str:
+    if granularity == HOUR:
+        return "h:" + start.strftime("%Y-%m-%dT%H")
+    return "d:" + start.strftime("%Y-%m-%d")
+
+
+def coverage_start(first_created_at: datetime) -> datetime:
+    """Coverage of incremental recording that began with an order created then"""
+    hour, _ = bucket_starts(first_created_at)
+    # Orders earlier in the same hour were never recorded
+    return hour + timedelta(hours=1)
+
+
+def window_covered(since: Optional[datetime], days: int, now: datetime) -> bool:
+    """Whether rollups covering orders from `since` on can answer a `days` window"""
+    start = (now - timedelta(days=days)).replace(minute=0, second=0, microsecond=0)
+    return since is not None and since <= start
+
+
+def order_increments(order: Dict, precision: int = 10) -> Dict:
+    """Update document adding one newly created order to a rollup"""
+    inc = {"orders": 1}
+    if order.get("status") in REVENUE_STATUSES:
+        inc["revenue"] = order.get("total", 0)
+    for item in order.get("items", []):
+        field = f"items.{_field_name(item['name'])}"
+        inc[field] = inc.get(field, 0) + item.get("qty", 0)
+
+    update = {"$inc": inc}
+    if order.get("customer_phone"):
+        index, rank = HyperLogLog.register_of(order["customer_phone"], precision)
+        update["$max"] = {f"hll.{index}": rank}
+    return update
+
+
+def revenue_delta(order: Dict, new_status: str) -> float:
+    """Revenue change when `order` (its previous state) moves to new_status"""
+    was_revenue = order.get("status") in REVENUE_STATUSES
+    is_revenue = new_status in REVENUE_STATUSES
+    if was_revenue == is_revenue:
+        return 0
+    return order.get("total", 0) if is_revenue else -order.get("total", 0)
+
+
+class AnalyticsRollups:
+    """
+    Incrementally maintained hourly/daily order rollups
+
+    Usage:
+        rollups = AnalyticsRollups(db['analytics_rollups'])
+        rollups.record_order(order)                       # after insert
+        rollups.record_status_change(previous, "PAID")    # previous = doc before the update
+        if rollups.covers(days=7):
+            rollups.summary(days=7)                        # get_analytics() shape
+    """
+
+    def __init__(self, collection, precision: int = 10):
+        """
+        Args:
+            collection: pymongo collection holding the rollup documents
+            precision: HyperLogLog precision (2**precision registers per document)
+        """
+        self.collection = collection
+        self.precision = precision
+        self._covered_since: Optional[datetime] = None
+
+    def create_indexes(self):
+        self.collection.create_index([("granularity", 1), ("start", 1)])
+
+    # ==================== WRITES ====================
+
+    def _upserts(self, created_at: datetime, update: Dict) -> List[UpdateOne]:
+        hour, day = bucket_starts(created_at)
+        operations = []
+        for granularity, start in ((HOUR, hour), (DAY, day)):
+            operations.append(UpdateOne(
+                {"_id": bucket_id(granularity, start)},
+                {**update, "$setOnInsert": {"granularity": granularity, "start": start}},
+                upsert=True
+            ))
+        return operations
+
+    def record_order(self, order: Dict):
+        """Add a newly created order to its hour and day rollups (one round trip)"""
+        try:
+            self.collection.bulk_write(
+                self._upserts(order["created_at"], order_increments(order, self.precision)) + [
+                    UpdateOne({"_id": COVERAGE_ID},
+                              {"$setOnInsert": {"since": coverage_start(order["created_at"])}},
+                              upsert=True)
+                ],
+                ordered=False
+            )
+        except Exception as e:
+            print(f"⚠️ Analytics rollup update failed: {e}")
+
+    def record_status_change(self, previous: Dict, new_status: str):
+        """
+        Move revenue in or out of the rollups of the order's creation time
+
+        Args:
+            previous: Order as it was before the update (status, total, created_at)
+            new_status: Status it moved to
+        """
+        delta = revenue_delta(previous, new_status)
+        if not delta or not previous.get("created_at"):
+            return
+        try:
+            self.collection.bulk_write(
+                self._upserts(previous["created_at"], {"$inc": {"revenue": delta}}),
+                ordered=False
+            )
+        except Exception as e:
+            print(f"⚠️ Analytics rollup update failed: {e}")
+
+    def mark_covered(self, since: datetime):
+        """Record that every order created since `since` is in the rollups (after a backfill)"""
+        self.collection.update_one({"_id": COVERAGE_ID}, {"$min": {"since": since}}, upsert=True)
+        self._covered_since = None
+
+    # ==================== READS ====================
+
+    def covered_since(self) -> Optional[datetime]:
+        """Since when the rollups hold every order (None: nothing recorded yet)"""
+        document = self.collection.find_one({"_id": COVERAGE_ID}, {"since": 1})
+        return document.get("since") if document else None
+
+    def covers(self, days: int = 7, now: Optional[datetime] = None) -> bool:
+        """
+        Whether summary(days) would see every order of the window
+
+        Coverage only ever moves back in time, so once a window is covered
+        the answer is cached and costs no further round trip.
+        """
+        now = now or datetime.now()
+        if window_covered(self._covered_since, days, now):
+            return True
+        since = self.covered_since()
+        if window_covered(since, days, now):
+            self._covered_since = since
+            return True
+        return False
+
+    def _window_query(self, start: datetime, end: datetime) -> Dict:
+        """
+        Whole days inside [start, end) come from daily documents, the ragged
+        hours at both ends from hourly ones
+        """
+        first_day = (start.replace(hour=0, minute=0, second=0, microsecond=0)
+                     + (timedelta(days=1) if start.hour or start.minute or start.second
+                        or start.microsecond else timedelta(0)))
+        last_day = end.replace(hour=0, minute=0, second=0, microsecond=0)
+        if first_day >= last_day:
+            return {"granularity": HOUR, "start": {"$gte": start.replace(minute=0, second=0, microsecond=0),
+                                                   "$lt": end}}
+        return {"$or": [
+            {"granularity": DAY, "start": {"$gte": first_day, "$lt": last_day}},
+            {"granularity": HOUR, "start": {"$gte": start.replace(minute=0, second=0, microsecond=0),
+                                            "$lt": first_day}},
+            {"granularity": HOUR, "start": {"$gte": last_day, "$lt": end}},
+        ]}
+
+    def summary(self, days: int = 7, now: Optional[datetime] = None) -> Dict:
+        """
+        Analytics for orders created in the last `days` days (hour resolution)
+
+        Returns:
+            Same shape as Database.get_analytics
+        """
+        now = now or datetime.now()
+        documents = self.collection.find(
+            self._window_query(now - timedelta(days=days), now + timedelta(hours=1)),
+            {"orders": 1, "revenue": 1, "items": 1, "hll": 1}
+        )
+        return summarize(documents, days, self.precision)
+
+
+def summarize(documents: Iterable[Dict], days: int, precision: int = 10) -> Dict:
+    """Merge rollup documents into the get_analytics summary"""
+    total_orders, total_revenue = 0, 0
+    items: Dict[str, int] = defaultdict(int)
+    sketch = HyperLogLog(precision)
+    for document in documents:
+        total_orders += document.get("orders", 0)
+        total_revenue += document.get("revenue", 0)
+        for field, qty in document.get("items", {}).items():
+            items[_item_name(field)] += qty
+        sketch.merge(document.get("hll", {}))
+
+    popular = sorted(items.items(), key=lambda pair: pair[1], reverse=True)[:10]
+    total_revenue = round(total_revenue, 2)
+    return {
+        "period_days": days,
+        "total_orders": total_orders,
+        "total_revenue": total_revenue,
+        "unique_customers": sketch.estimate(),
+        "popular_items": [{"_id": name, "count": count} for name, count in popular],
+        "avg_order_value": total_revenue / total_orders if total_orders > 0 else 0
+    }
+
+
+# ==================== BACKFILL ====================
+
+def build_rollups(orders: Iterable[Dict], precision: int = 10) -> Dict[str, Dict]:
+    """Rollup documents (by _id) computed from scratch for the given orders"""
+    documents: Dict[str, Dict] = {}
+    for order in orders:
+        if not order.get("created_at"):
+            continue
+        for granularity, start in zip((HOUR, DAY), bucket_starts(order["created_at"])):
+            key = bucket_id(granularity, start)
+            document = documents.get(key)
+            if document is None:
+                document = documents[key] = {"_id": key, "granularity": granularity, "start": start,
+                                             "orders": 0, "revenue": 0, "items": {}, "hll": {}}
+            update = order_increments(order, precision)
+            for field, value in update["$inc"].items():
+                if field.startswith("items."):
+                    name = field[len("items."):]
+                    document["items"][name] = document["items"].get(name, 0) + value
+                else:
+                    document[field] += value
+            for field, rank in update.get("$max", {}).items():
+                register = field[len("hll."):]
+                document["hll"][register] = max(document["hll"].get(register, 0), rank)
+    return documents
+
+
+def backfill(database, days: Optional[int] = None, batch_size: int = 1000) -> int:
+    """
+    Rebuild rollups from the orders collection
+
+    Args:
+        database: Database instance
+        days: Only rebuild buckets of the last `days` days (None = all history)
+
+    Returns:
+        Rollup documents written
+
+    Orders created while the backfill runs may be counted twice or missed in
+    the rebuilt buckets; run it when traffic is low (or rebuild those days again).
+    """
+    from pymongo import ReplaceOne
+
+    order_filter, rollup_filter = {}, {}
+    if days is not None:
+        since = (datetime.now() - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+        order_filter = {"created_at": {"$gte": since}}
+        rollup_filter = {"start": {"$gte": since}}
+
+    orders = database.orders.find(
+        order_filter, {"customer_phone": 1, "items.name": 1, "items.qty": 1,
+                       "total": 1, "status": 1, "created_at": 1}
+    )
+    documents = build_rollups(orders, database.rollups.precision)
+
+    collection = database.rollups.collection
+    collection.delete_many(rollup_filter)
+    pending = [ReplaceOne({"_id": key}, document, upsert=True) for key, document in documents.items()]
+    for start in range(0, len(pending), batch_size):
+        collection.bulk_write(pending[start:start + batch_size], ordered=False)
+    database.rollups.mark_covered(since if days is not None else ALL_HISTORY)
+    print(f"✅ Analytics rollups rebuilt: {len(documents)} documents")
+    return len(documents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytics rollup maintenance")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    backfill_parser = subcommands.add_parser("backfill", help="Rebuild rollups from the orders collection")
+    backfill_parser.add_argument("--days", type=int, help="Only rebuild the last N days")
+    args = parser.parse_args()
+
+    from database import get_database
+
+    database = get_database()
+    try:
+        if args.command == "backfill":
+            backfill(database, args.days)
+    finally:
+        database.close()
+
+
+# Example usage
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1:
+        main()
+        sys.exit(0)
+
+    print("🧪 Testing Analytics Rollups...\n")
+
+    sketch = HyperLogLog()
+    for i in range(20000):
+        sketch.add(f"+92300{i:07d}")
+    error = abs(sketch.estimate() - 20000) / 20000
+    assert error < 0.08, sketch.estimate()
+    print(f"✅ HyperLogLog: 20000 phones → {sketch.estimate()} ({error:.1%} error)")
+
+    small = HyperLogLog()
+    for phone in ["+923001", "+923002", "+923003", "+923001"]:
+        small.add(phone)
+    assert small.estimate() == 3
+    print("✅ Small-range estimate exact")
+
+    now = datetime(2026, 10, 19, 15, 30)
+    orders = [
+        {"customer_phone": f"+92300{i % 40}", "status": "PAID" if i % 3 else "PENDING_PAYMENT",
+         "total": 1000 + i, "created_at": now - timedelta(hours=i * 5),
+         "items": [{"name": "Chicken Biryani", "qty": 2}, {"name": "Mango Lassi", "qty": 1}]}
+        for i in range(60)
+    ]
+    documents = list(build_rollups(orders).values())
+    hourly = [document for document in documents if document["granularity"] == HOUR]
+    daily = [document for document in documents if document["granularity"] == DAY]
+    expected_revenue = sum(order["total"] for order in orders if order["status"] in REVENUE_STATUSES)
+    for rollups in (hourly, daily):
+        summary = summarize(rollups, days=30)
+        assert summary["total_orders"] == 60
+        assert summary["total_revenue"] == expected_revenue
+        assert summary["unique_customers"] == 40
+        assert summary["popular_items"][0] == {"_id": "Chicken Biryani", "count": 120}
+    print(f"✅ {len(hourly)} hourly / {len(daily)} daily rollups agree with a full scan")
+
+    # Coverage: recorded orders only count from the hour after the first one
+    since = coverage_start(now)
+    assert since == datetime(2026, 10, 19, 16)
+    assert not window_covered(None, 7, now)
+    assert not window_covered(since, 1, now + timedelta(days=1))
+    assert window_covered(since, 1, now + timedelta(days=1, hours=1))
+    assert window_covered(ALL_HISTORY, 365, now)
+    print("✅ Windows before the first recorded order are not covered")
+
+    assert revenue_delta({"status": "PENDING_PAYMENT", "total": 500}, "PAID") == 500
+    assert revenue_delta({"status": "PAID", "total": 500}, "CANCELLED") == -500
+    assert revenue_delta({"status": "PAID", "total": 500}, "COOKING") == 0
+    print("✅ Status changes move revenue in and out")
+
+    print("\n✅ All tests passed!")
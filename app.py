@@ -5,8 +5,8 @@ from order_manager import OrderManager
 from payment_handler import PaymentHandler, PaymentMethod
 from config import config
 import requests
-import tempfile
 from rag_engine import RestaurantRAG
+from menu_jobs import get_menu_jobs
 import time
 # from config import GEMINI_API_KEY, GEMINI_MODEL
 
@@ -29,6 +29,7 @@ default_session_state = {
     "order_manager": None,
     "payment_handler": None,
     "current_order": None,
+    "menu_job_id": None,
 }
 
 for key, value in default_session_state.items():
@@ -1139,41 +1140,67 @@ elif not st.session_state.menu_processed:
         st.markdown("### 🚀 Quick Start")
         st.markdown("**1️⃣ Upload** PDF\n\n**2️⃣ Process** menu\n\n**3️⃣ Chat** away!")
     
-    if uploaded_file:
+    # Menu processing runs as a background job; the job ID survives a browser refresh
+    if not st.session_state.menu_job_id and st.query_params.get("menu_job"):
+        st.session_state.menu_job_id = st.query_params["menu_job"]
+    
+    @st.fragment(run_every=1)
+    def menu_job_progress():
+        """Poll the background menu job and hand its engine to this session"""
+        job = get_menu_jobs().get(st.session_state.menu_job_id)
+        if job is None:
+            st.session_state.menu_job_id = None
+            st.query_params.pop("menu_job", None)
+            st.rerun()
+        
+        if job.status == "done":
+            engine = get_menu_jobs().claim(job.job_id)
+            if engine is None:
+                # Claimed by another session in the meantime
+                st.session_state.menu_job_id = None
+                st.query_params.pop("menu_job", None)
+                st.rerun()
+            st.session_state.rag_engine = engine
+            st.session_state.rag_engine.set_cart_callback(add_to_cart)
+            st.session_state.menu_processed = True
+            st.session_state.menu_job_id = None
+            st.query_params.pop("menu_job", None)
+            st.success("🎉 AI Assistant is live!")
+            st.balloons()
+            time.sleep(1)
+            st.rerun()
+        elif job.status in ("failed", "cancelled"):
+            st.session_state.menu_job_id = None
+            st.query_params.pop("menu_job", None)
+            if job.status == "failed":
+                st.error(f"❌ Error: {job.error}")
+            st.rerun()
+        
+        st.progress(job.progress, text=f"🧠 {job.filename}: {job.stage_label}...")
+        if st.button("✖ Cancel", key="cancel_menu_job"):
+            get_menu_jobs().cancel(job.job_id)
+    
+    if st.session_state.menu_job_id:
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col2:
+            menu_job_progress()
+    elif uploaded_file:
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
             if st.button("🚀 LAUNCH AI ASSISTANT", type="primary", use_container_width=True):
-                with st.spinner("🧠 Training AI..."):
-                    try:
-                        progress_bar = st.progress(0)
-                        
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
-                            tmp.write(uploaded_file.getvalue())
-                            tmp_path = tmp.name
-                        progress_bar.progress(40)
-                        
-                        st.session_state.rag_engine = RestaurantRAG(
-                            api_key=GEMINI_API_KEY,
-                            model="gemini-2.5-flash",  # FREE tier available!
-                            provider="gemini",
-                            agentic_mode=False
-                        )
-                        progress_bar.progress(60)
-                        
-                        st.session_state.rag_engine.process_menu(tmp_path)
-                        st.session_state.rag_engine.set_cart_callback(add_to_cart)
-                        progress_bar.progress(90)
-                        
-                        os.unlink(tmp_path)
-                        progress_bar.progress(100)
-                        
-                        st.session_state.menu_processed = True
-                        st.success("🎉 AI Assistant is live!")
-                        st.balloons()
-                        time.sleep(1)
-                        st.rerun()
-                    except Exception as e:
-                        st.error(f"❌ Error: {str(e)}")
+                st.session_state.menu_job_id = get_menu_jobs().submit(
+                    uploaded_file.getvalue(),
+                    uploaded_file.name,
+                    lambda: RestaurantRAG(
+                        api_key=GEMINI_API_KEY,
+                        model="gemini-2.5-flash",  # FREE tier available!
+                        provider="gemini",
+                        agentic_mode=False,
+                        reranker=config.RERANKER or None
+                    )
+                )
+                st.query_params["menu_job"] = st.session_state.menu_job_id
+                st.rerun()
 
 # CHAT INTERFACE
 elif st.session_state.menu_processed and st.session_state.rag_engine:
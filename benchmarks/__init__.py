@@ -0,0 +1,4 @@
+"""
+Offline benchmarks for the restaurant bot
+Run modules directly, e.g.: python -m benchmarks.bench_retrieval
+"""
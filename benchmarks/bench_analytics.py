@@ -0,0 +1,144 @@
+"""
+Analytics Query Benchmark
+Wall time of Database analytics over a seeded orders collection:
+
+- sequential: the original four round trips (count_documents, revenue
+  aggregation, distinct customers, popular-items $unwind)
+- facet: one $facet aggregation (Database._scan_analytics)
+- rollups: hourly/daily rollup documents (Database.get_analytics)
+
+Needs a running MongoDB; seeds a separate database (default
+restaurant_commerce_bench) and reuses it while the order count matches.
+
+Usage:
+    python -m benchmarks.bench_analytics --orders 1000000 --days 1 7 30
+    python -m benchmarks.bench_analytics --uri mongodb://localhost:27017/ --reseed
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict
+
+from benchmarks.common import generate_menu_items, percentile, print_table
+from analytics_rollups import REVENUE_STATUSES, backfill
+
+STATUSES = ["PENDING_PAYMENT", "PAID", "CONFIRMED", "COOKING", "READY",
+            "DISPATCHED", "DELIVERED", "DELIVERED", "DELIVERED", "CANCELLED"]
+
+
+def seed_orders(database, count: int, history_days: int, customers: int, batch: int = 10000):
+    """Insert `count` random orders spread over the last `history_days` days"""
+    rng = random.Random(42)
+    menu = generate_menu_items(300)
+    now = datetime.now()
+    database.orders.delete_many({})
+
+    start = time.perf_counter()
+    for offset in range(0, count, batch):
+        orders = []
+        for i in range(offset, min(offset + batch, count)):
+            items = [{"name": item["name"], "qty": rng.randint(1, 3), "price": item["price"]}
+                     for item in rng.sample(menu, rng.randint(1, 4))]
+            total = sum(item["qty"] * item["price"] for item in items)
+            created_at = now - timedelta(seconds=rng.uniform(0, history_days * 86400))
+            orders.append({
+                "order_id": f"BENCH{i:08d}",
+                "customer_phone": f"+92300{rng.randrange(customers):07d}",
+                "items": items,
+                "total": total,
+                "status": rng.choice(STATUSES),
+                "created_at": created_at,
+                "updated_at": created_at,
+            })
+        database.orders.insert_many(orders, ordered=False)
+        print(f"\r🌱 Seeded {offset + len(orders):,}/{count:,} orders", end="", flush=True)
+    print(f"\n✅ Seeded in {time.perf_counter() - start:.0f}s")
+
+
+def sequential_analytics(database, days: int) -> Dict:
+    """The original get_analytics: four round trips over the same window"""
+    start_date = datetime.now() - timedelta(days=days)
+    total_orders = database.orders.count_documents({"created_at": {"$gte": start_date}})
+    revenue = list(database.orders.aggregate([
+        {"$match": {"status": {"$in": sorted(REVENUE_STATUSES)}, "created_at": {"$gte": start_date}}},
+        {"$group": {"_id": None, "total": {"$sum": "$total"}}}
+    ]))
+    unique_customers = len(database.orders.distinct("customer_phone", {"created_at": {"$gte": start_date}}))
+    popular_items = list(database.orders.aggregate([
+        {"$match": {"created_at": {"$gte": start_date}}},
+        {"$unwind": "$items"},
+        {"$group": {"_id": "$items.name", "count": {"$sum": "$items.qty"}}},
+        {"$sort": {"count": -1}},
+        {"$limit": 10}
+    ]))
+    return {
+        "total_orders": total_orders,
+        "total_revenue": revenue[0]["total"] if revenue else 0,
+        "unique_customers": unique_customers,
+        "popular_items": popular_items,
+    }
+
+
+def time_runs(fn, repeat: int):
+    """(result, [ms per run]) after one warm-up run"""
+    result = fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return result, times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uri", help="MongoDB URI (default: MONGODB_URI)")
+    parser.add_argument("--database", default="restaurant_commerce_bench")
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--history-days", type=int, default=365)
+    parser.add_argument("--customers", type=int, default=50_000)
+    parser.add_argument("--days", type=int, nargs="+", default=[1, 7, 30])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--reseed", action="store_true", help="Drop and reseed the orders")
+    args = parser.parse_args()
+
+    from database import Database
+
+    database = Database(args.uri, database_name=args.database, index_migrations="sync")
+    try:
+        if args.reseed or database.orders.estimated_document_count() != args.orders:
+            seed_orders(database, args.orders, args.history_days, args.customers)
+            backfill(database)
+
+        rows = []
+        for days in args.days:
+            methods = {
+                "sequential": lambda: sequential_analytics(database, days),
+                "facet": lambda: database._scan_analytics(days),
+                "rollups": lambda: database.rollups.summary(days),
+            }
+            results = {}
+            for name, fn in methods.items():
+                result, times = time_runs(fn, args.repeat)
+                results[name] = result
+                rows.append({
+                    "days": days, "method": name,
+                    "orders": result.get("total_orders"),
+                    "unique_customers": result.get("unique_customers"),
+                    "p50_ms": percentile(times, 50),
+                    "min_ms": min(times),
+                    "max_ms": max(times),
+                })
+            assert results["facet"]["total_orders"] == results["sequential"]["total_orders"]
+            assert results["facet"]["unique_customers"] == results["sequential"]["unique_customers"]
+
+        print(f"\n📊 Analytics over {args.orders:,} orders ({args.repeat} runs each)")
+        print_table(rows, ["days", "method", "orders", "unique_customers", "p50_ms", "min_ms", "max_ms"])
+    finally:
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Ingestion Benchmark
+Times every process_menu stage (extract, parse, chunk, embed, index) on
+synthetic menu PDFs of 1, 10, 50 and 200 pages, records peak memory and
+stores JSON results for comparison across commits. Runs fully offline.
+
+Usage:
+    python -m benchmarks.bench_ingest                        # stub embeddings
+    python -m benchmarks.bench_ingest --embeddings minilm    # cached MiniLM (HF offline)
+    python -m benchmarks.bench_ingest --compare benchmarks/results/ingest-abc1234.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.common import StubGenerativeModel, load_embeddings, print_table
+from benchmarks.synthetic_pdf import write_menu_pdf
+
+STAGES = ["extract", "parse", "chunk", "embed", "index"]
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_stages(engine, pdf_path: str, track_memory: bool = False) -> Dict[str, Dict]:
+    """
+    Run process_menu stage by stage
+
+    Returns:
+        {stage: {"ms": float, "peak_kb": float (only with track_memory)}}
+    """
+    results = {}
+    state = {}
+
+    def stage(name, fn):
+        gc.collect()
+        if track_memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        value = fn()
+        results[name] = {"ms": (time.perf_counter() - start) * 1000}
+        if track_memory:
+            results[name]["peak_kb"] = (tracemalloc.get_traced_memory()[1] - before) / 1024
+        return value
+
+    state["text"] = stage("extract", lambda: engine.extract_text_from_pdf(pdf_path))
+    state["items"] = stage("parse", lambda: engine.parse_menu_items(state["text"]))
+    state["chunks"] = stage("chunk", lambda: engine.chunk_text(state["text"], state["items"]))
+    state["matrix"] = stage("embed", lambda: np.asarray(
+        engine.embeddings.embed_documents(state["chunks"]), dtype=np.float32))
+    stage("index", lambda: engine._load_index(state["chunks"], state["matrix"]))
+
+    results["_counts"] = {
+        "chars": len(state["text"]),
+        "items": len(state["items"]),
+        "chunks": len(state["chunks"]),
+    }
+    return results
+
+
+def bench_pages(pages: int, embeddings, repeat: int, workdir: str) -> Dict:
+    """Benchmark one synthetic PDF size"""
+    from rag_engine import RestaurantRAG
+
+    pdf_path = os.path.join(workdir, f"menu_{pages}p.pdf")
+    known_items = write_menu_pdf(pdf_path, pages)
+
+    engine = RestaurantRAG(api_key="offline", embeddings=embeddings,
+                           generative_model=StubGenerativeModel())
+
+    # Warm-up run (imports, lazy model init), then timing runs without
+    # tracemalloc overhead - keep the best of `repeat`
+    run_stages(engine, pdf_path)
+    timings = {name: [] for name in STAGES}
+    counts = {}
+    for _ in range(repeat):
+        run = run_stages(engine, pdf_path)
+        counts = run.pop("_counts")
+        for name in STAGES:
+            timings[name].append(run[name]["ms"])
+
+    # One traced run for per-stage peak Python memory
+    tracemalloc.start()
+    memory = run_stages(engine, pdf_path, track_memory=True)
+    tracemalloc.stop()
+
+    stages = {
+        name: {"ms": min(timings[name]), "peak_kb": memory[name]["peak_kb"]}
+        for name in STAGES
+    }
+    return {
+        "pages": pages,
+        "known_items": len(known_items),
+        **counts,
+        "stages": stages,
+        "total_ms": sum(stage["ms"] for stage in stages.values()),
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Per-stage slowdowns beyond threshold (e.g. 0.25 = 25% slower)"""
+    regressions = []
+    base_by_pages = {run["pages"]: run for run in baseline["runs"]}
+    rows = []
+    for run in current["runs"]:
+        base = base_by_pages.get(run["pages"])
+        if not base:
+            continue
+        for name in STAGES + ["total"]:
+            now = run["total_ms"] if name == "total" else run["stages"][name]["ms"]
+            then = base["total_ms"] if name == "total" else base["stages"][name]["ms"]
+            change = (now - then) / then if then else 0.0
+            rows.append({"pages": run["pages"], "stage": name, "baseline_ms": then,
+                         "current_ms": now, "change": f"{change:+.1%}"})
+            # Ignore sub-millisecond noise
+            if change > threshold and now - then > 1.0:
+                regressions.append(f"{run['pages']}p {name}: {then:.1f} → {now:.1f} ms ({change:+.1%})")
+
+    print(f"\n📊 Compared with {baseline.get('commit')} ({baseline.get('embeddings')})")
+    print_table(rows, ["pages", "stage", "baseline_ms", "current_ms", "change"])
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--embeddings", choices=["stub", "minilm"], default="stub")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", help="Result JSON (default: benchmarks/results/ingest-<commit>.json)")
+    parser.add_argument("--compare", help="Baseline result JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Fail if a stage is this much slower than the baseline")
+    args = parser.parse_args()
+
+    if args.embeddings == "minilm":
+        # Use the locally cached model only
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+    embeddings = load_embeddings(args.embeddings)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        runs = [bench_pages(pages, embeddings, args.repeat, workdir) for pages in args.pages]
+
+    result = {
+        "benchmark": "ingest",
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "embeddings": args.embeddings,
+        "runs": runs,
+    }
+
+    rows = []
+    for run in runs:
+        row = {"pages": run["pages"], "items": run["items"], "chunks": run["chunks"]}
+        for name in STAGES:
+            row[f"{name}_ms"] = run["stages"][name]["ms"]
+        row["total_ms"] = run["total_ms"]
+        row["peak_mb"] = max(stage["peak_kb"] for stage in run["stages"].values()) / 1024
+        rows.append(row)
+    print()
+    print_table(rows, ["pages", "items", "chunks"] + [f"{name}_ms" for name in STAGES]
+                + ["total_ms", "peak_mb"])
+
+    out = args.out or os.path.join(RESULTS_DIR, f"ingest-{result['commit']}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\n💾 Results saved: {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        if regressions:
+            print("\n❌ Regressions:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
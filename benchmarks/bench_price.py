@@ -0,0 +1,94 @@
+"""
+Price Extraction Microbenchmark
+Legacy _extract_price_limit (six re.search calls per invocation, run
+several times per turn) vs the precompiled price_parser extractor (one
+search per turn), plus coverage of the phrasings each one understands.
+
+Usage:
+    python -m benchmarks.bench_price [--calls 20000] [--legacy-calls-per-turn 3]
+"""
+
+import argparse
+import re
+import time
+from typing import Optional
+
+from benchmarks.common import print_table
+from price_parser import extract_price_constraint
+
+# (message, expected max price, expected min price)
+MESSAGES = [
+    ("what do you have under 500", 500, None),
+    ("something spicy below Rs. 800", 800, None),
+    ("less than PKR 1,200 please", 1200, None),
+    ("my budget is 2000 for two people", 2000, None),
+    ("1500 budget, suggest a meal", 1500, None),
+    ("between 300 and 600", 600, 300),
+    ("my budget is 2k", 2000, None),
+    ("۵۰۰ tak kuch spicy", 500, None),
+    ("something above 1000", None, 1000),
+    ("show me the full menu", None, None),
+    ("i want 2 chicken biryani and a mango lassi", None, None),
+    ("what drinks do you have, nothing too sweet", None, None),
+]
+
+
+def legacy_extract_price_limit(question: str) -> Optional[float]:
+    """The original RestaurantRAG._extract_price_limit"""
+    patterns = [
+        r'under\s+(?:Rs\.?\s*|PKR\s*)?(\d+)',
+        r'below\s+(?:Rs\.?\s*|PKR\s*)?(\d+)',
+        r'less than\s+(?:Rs\.?\s*|PKR\s*)?(\d+)',
+        r'maximum\s+(?:Rs\.?\s*|PKR\s*)?(\d+)',
+        r'(?:Rs\.?\s*|PKR\s*)?(\d+)\s+budget',
+        r'budget.*?(?:Rs\.?\s*|PKR\s*)?(\d+)',
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, question.lower())
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def per_call_us(fn, calls: int) -> float:
+    """Mean microseconds per call over the message mix"""
+    messages = [message for message, _, _ in MESSAGES]
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(messages[i % len(messages)])
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--legacy-calls-per-turn", type=int, default=3,
+                        help="_extract_price_limit calls per turn before the per-turn constraint")
+    args = parser.parse_args()
+
+    legacy_us = per_call_us(legacy_extract_price_limit, args.calls)
+    new_us = per_call_us(extract_price_constraint, args.calls)
+    print_table([
+        {"extractor": "legacy (6 patterns)", "us_per_call": legacy_us,
+         "calls_per_turn": args.legacy_calls_per_turn,
+         "us_per_turn": legacy_us * args.legacy_calls_per_turn},
+        {"extractor": "price_parser", "us_per_call": new_us, "calls_per_turn": 1,
+         "us_per_turn": new_us},
+    ], ["extractor", "us_per_call", "calls_per_turn", "us_per_turn"])
+
+    rows = []
+    for message, max_price, min_price in MESSAGES:
+        constraint = extract_price_constraint(message)
+        rows.append({
+            "message": message,
+            "legacy_max": legacy_extract_price_limit(message),
+            "new_max": constraint.max_price,
+            "new_min": constraint.min_price,
+            "ok": (constraint.max_price, constraint.min_price) == (max_price, min_price),
+        })
+    print()
+    print_table(rows, ["message", "legacy_max", "new_max", "new_min", "ok"])
+
+
+if __name__ == "__main__":
+    main()
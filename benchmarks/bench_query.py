@@ -0,0 +1,184 @@
+"""
+End-to-End Query Latency Benchmark
+Replays realistic customer conversations (browse, budget, order, refer-back)
+through query_agentic at a configurable concurrency, with a deterministic
+stub LLM instead of Gemini, and reports throughput and p50/p95/p99 per stage.
+
+Usage:
+    python -m benchmarks.bench_query --concurrency 8 --rounds 5 --llm-latency lognormal:-1.2,0.4
+    python -m benchmarks.bench_query --baseline benchmarks/results/query-abc1234.json --threshold 0.2
+    python -m benchmarks.bench_query --max-p95-ms 1500
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from benchmarks.bench_ingest import RESULTS_DIR, git_commit
+from benchmarks.common import (
+    StubGenerativeModel, build_engine, generate_menu, load_embeddings,
+    percentile, print_table
+)
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "query_corpus.json")
+
+
+def new_session(engine):
+    """
+    Per-customer view of a processed engine
+
+    Shares the menu, indexes, model and request coalescer; owns its own
+    conversation memory (like one Streamlit session / WhatsApp chat).
+    """
+    session = copy.copy(engine)
+    session.last_recommended_items = []
+    session.last_query_context = None
+    session.conversation_context = []
+    session.customer_memory = {'past_orders': [], 'preferences': {}, 'last_items': [], 'chat_history': []}
+    session.cart = []
+    session.cart_callback = lambda name, price: session.cart.append((name, price))
+    return session
+
+
+def run_conversation(engine, conversation: Dict, samples: Dict, lock: threading.Lock):
+    """Run one conversation's turns in order, recording per-stage timings"""
+    session = new_session(engine)
+    for turn in conversation["turns"]:
+        session.last_query_context = None
+        start = time.perf_counter()
+        session.query_agentic(turn)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        timings = session.last_query_context.timings if session.last_query_context else {}
+        with lock:
+            samples["turn_total"].append(total_ms)
+            samples[f"turn_total[{conversation['category']}]"].append(total_ms)
+            for stage, ms in timings.items():
+                samples[stage].append(ms)
+
+
+def run_benchmark(engine, conversations: List[Dict], concurrency: int, rounds: int) -> Dict:
+    """Replay the corpus `rounds` times with `concurrency` customers in flight"""
+    samples = defaultdict(list)
+    lock = threading.Lock()
+    workload = [conv for _ in range(rounds) for conv in conversations]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(run_conversation, engine, conv, samples, lock) for conv in workload]:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    turns = len(samples["turn_total"])
+    stages = {
+        name: {
+            "count": len(values),
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99),
+        }
+        for name, values in sorted(samples.items())
+    }
+    return {
+        "turns": turns,
+        "elapsed_s": elapsed,
+        "throughput_tps": turns / elapsed if elapsed else 0.0,
+        "stages": stages,
+        "coalescing": engine.get_coalescing_stats(),
+    }
+
+
+def check_regressions(result: Dict, baseline: Dict, threshold: float, max_p95_ms: float) -> List[str]:
+    """Latency regressions vs a baseline result and/or an absolute p95 ceiling"""
+    problems = []
+    if max_p95_ms and result["stages"]["turn_total"]["p95_ms"] > max_p95_ms:
+        problems.append(
+            f"turn_total p95 {result['stages']['turn_total']['p95_ms']:.1f} ms > {max_p95_ms:.1f} ms"
+        )
+    if baseline:
+        for name, stage in result["stages"].items():
+            base = baseline["stages"].get(name)
+            if not base or not base["p95_ms"]:
+                continue
+            change = (stage["p95_ms"] - base["p95_ms"]) / base["p95_ms"]
+            # Ignore sub-millisecond noise
+            if change > threshold and stage["p95_ms"] - base["p95_ms"] > 1.0:
+                problems.append(f"{name} p95: {base['p95_ms']:.1f} → {stage['p95_ms']:.1f} ms ({change:+.1%})")
+        if result["throughput_tps"] < baseline["throughput_tps"] * (1 - threshold):
+            problems.append(
+                f"throughput: {baseline['throughput_tps']:.1f} → {result['throughput_tps']:.1f} turns/s"
+            )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=150, help="Synthetic menu size")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=5, help="Times to replay the corpus")
+    parser.add_argument("--llm-latency", default="lognormal:-1.2,0.4",
+                        help="Stub LLM latency: constant:S | uniform:A,B | lognormal:MU,SIGMA (seconds)")
+    parser.add_argument("--embeddings", choices=["stub", "minilm"], default="stub")
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--out", help="Result JSON (default: benchmarks/results/query-<commit>.json)")
+    parser.add_argument("--baseline", help="Baseline result JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed relative p95 / throughput regression vs baseline")
+    parser.add_argument("--max-p95-ms", type=float, help="Absolute ceiling for turn p95")
+    args = parser.parse_args()
+
+    with open(args.corpus) as f:
+        conversations = json.load(f)["conversations"]
+
+    menu_text, _ = generate_menu(args.items, descriptions=True)
+    engine = build_engine(
+        menu_text,
+        embeddings=load_embeddings(args.embeddings),
+        generative_model=StubGenerativeModel(latency=args.llm_latency),
+    )
+
+    result = run_benchmark(engine, conversations, args.concurrency, args.rounds)
+    result.update({
+        "benchmark": "query",
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("baseline", "out")},
+    })
+
+    print(f"\n🚀 {result['turns']} turns in {result['elapsed_s']:.2f}s "
+          f"→ {result['throughput_tps']:.1f} turns/s at concurrency {args.concurrency}")
+    print(f"🔁 Coalescing: {result['coalescing']}\n")
+    print_table(
+        [{"stage": name, **stage} for name, stage in result["stages"].items()],
+        ["stage", "count", "p50_ms", "p95_ms", "p99_ms"]
+    )
+
+    out = args.out or os.path.join(RESULTS_DIR, f"query-{result['commit']}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\n💾 Results saved: {out}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    problems = check_regressions(result, baseline, args.threshold, args.max_p95_ms)
+    if problems:
+        print("\n❌ Latency regressions:")
+        for line in problems:
+            print(f"   {line}")
+        sys.exit(1)
+    if baseline or args.max_p95_ms:
+        print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
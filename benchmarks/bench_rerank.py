@@ -0,0 +1,82 @@
+"""
+Reranker Benchmark
+Baseline retrieval (hybrid top-3, vector top-4) vs reranking RERANK_CANDIDATES
+chunks and keeping the best ones within a prompt token budget, on the
+labeled eval_retrieval fixtures:
+
+- recall@k / hit@k: does the prompt still contain the expected items?
+- context_tokens: prompt size the LLM has to read
+- p50/p95 retrieval latency, cold (empty score cache) and warm (cached)
+
+Usage:
+    python -m benchmarks.bench_rerank
+    python -m benchmarks.bench_rerank --budgets 150 300 500 --cross-encoder
+"""
+
+import argparse
+from typing import Dict, List
+
+from benchmarks.common import load_embeddings, print_table
+from benchmarks.eval_retrieval import FIXTURES_PATH, build_index, eval_retrieval, load_fixtures, synthetic_menus
+from reranker import ChunkReranker, CrossEncoderReranker, LexicalReranker
+
+
+def average(results: List[Dict]) -> Dict:
+    return {metric: sum(result[metric] for result in results) / len(results) for metric in results[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fixtures", default=FIXTURES_PATH)
+    parser.add_argument("--embeddings", choices=["stub", "minilm"], default="stub")
+    parser.add_argument("--budgets", type=int, nargs="+", default=[150, 300, 500],
+                        help="Rerank token budgets to compare")
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--synthetic", type=int, nargs="*", default=[400])
+    parser.add_argument("--cross-encoder", action="store_true",
+                        help="Also benchmark the sentence-transformers cross-encoder")
+    args = parser.parse_args()
+
+    embeddings = load_embeddings(args.embeddings)
+    menus = load_fixtures(args.fixtures) + synthetic_menus(args.synthetic)
+
+    scorers = [("lexical", LexicalReranker)]
+    if args.cross_encoder:
+        cross_encoder = CrossEncoderReranker()
+        scorers.append(("cross-encoder", lambda: cross_encoder))
+
+    rows: Dict[str, List[Dict]] = {}
+    for menu in menus:
+        questions = menu["questions"]
+        embedded = {case["question"]: embeddings.embed_query(case["question"]) for case in questions}
+        engine, _ = build_index(menu["text"], embeddings, "menu")
+        engine.RERANK_CANDIDATES = args.candidates
+
+        engine.reranker = None
+        for name, hybrid, k in (("vector top-4", False, 4), ("hybrid top-3", True, 3)):
+            rows.setdefault(name, []).append(eval_retrieval(engine, questions, embedded, hybrid, k))
+
+        for scorer_name, make_scorer in scorers:
+            for budget in args.budgets:
+                scorer = make_scorer()
+                if isinstance(scorer, LexicalReranker):
+                    scorer.idf = engine.bm25_index.idf
+                engine.reranker = ChunkReranker(scorer, token_budget=budget, max_chunks=engine.RERANK_MAX_CHUNKS)
+                cold = eval_retrieval(engine, questions, embedded, True, None)
+                warm = eval_retrieval(engine, questions, embedded, True, None)
+                rows.setdefault(f"{scorer_name} {budget}", []).append(
+                    {**cold, "warm_p50_ms": warm["p50_ms"], "warm_p95_ms": warm["p95_ms"]}
+                )
+
+    table = []
+    for name, results in rows.items():
+        table.append({"config": name, "warm_p50_ms": "-", "warm_p95_ms": "-", **average(results)})
+    questions = sum(len(menu["questions"]) for menu in menus)
+    print(f"\n📊 Reranking ({len(menus)} menus, {questions} labeled questions, "
+          f"{args.candidates} candidates, {args.embeddings} embeddings)")
+    print_table(table, ["config", "recall_at_k", "hit_at_k", "context_tokens",
+                        "p50_ms", "p95_ms", "warm_p50_ms", "warm_p95_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Retrieval Benchmark: vector-only vs hybrid BM25 + vector, fixed vs menu chunking
+Measures index size, retrieval latency, chunks/prompt tokens per question and hit rate
+
+Usage:
+    python -m benchmarks.bench_retrieval [--items 40 120 400] [--embeddings stub|minilm]
+                                         [--chunking fixed menu]
+"""
+
+import argparse
+import json
+
+from benchmarks.common import (
+    build_engine, estimate_tokens, generate_menu, item_questions,
+    load_embeddings, percentile, print_table, time_ms
+)
+
+
+def run_config(engine, questions, hybrid: bool):
+    """Retrieve for every question; hit = expected item text is in the chunks"""
+    engine.hybrid_retrieval = hybrid
+    latencies, tokens, chunk_counts, hits = [], [], [], 0
+
+    for question, expected in questions:
+        embedding = engine.embeddings.embed_query(question)
+        docs, elapsed = time_ms(engine._retrieve, question, embedding)
+        context = "\n\n".join(doc.page_content for doc in docs)
+        latencies.append(elapsed)
+        tokens.append(estimate_tokens(context))
+        chunk_counts.append(len(docs))
+        hits += expected.lower() in context.lower()
+
+    return {
+        "mode": "hybrid" if hybrid else "vector",
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "chunks": sum(chunk_counts) / len(chunk_counts),
+        "context_tokens": sum(tokens) / len(tokens),
+        "hit_rate": hits / len(questions),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, nargs="+", default=[40, 120, 400])
+    parser.add_argument("--embeddings", choices=["stub", "minilm"], default="stub")
+    parser.add_argument("--chunking", nargs="+", choices=["fixed", "menu"], default=["fixed", "menu"])
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    embeddings = load_embeddings(args.embeddings)
+    rows = []
+    for n_items in args.items:
+        menu_text, items = generate_menu(n_items)
+        questions = item_questions(items)
+        for chunking in args.chunking:
+            engine = build_engine(menu_text, embeddings=embeddings, chunk_strategy=chunking)
+            for hybrid in (False, True):
+                row = run_config(engine, questions, hybrid)
+                row.update(items=n_items, chunking=chunking, index_chunks=len(engine.chunks))
+                rows.append(row)
+
+    print()
+    print_table(rows, ["items", "chunking", "index_chunks", "mode", "p50_ms", "p95_ms", "chunks", "context_tokens", "hit_rate"])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Storage Backend Benchmark
+Per-operation latency of the same order workload on each storage backend
+(storage.py): create_order, get_order (full and 'order_status' view),
+transition_order_status, an active-orders page and get_analytics.
+
+memory and sqlite run in-process with no server; mongo is included only
+when --mongo-uri is given (a scratch database, dropped afterwards).
+
+Usage:
+    python -m benchmarks.bench_storage --orders 5000
+    python -m benchmarks.bench_storage --backends memory sqlite --mongo-uri mongodb://localhost:27017/
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.common import generate_menu_items, percentile, print_table
+
+
+def make_orders(count: int, customers: int, seed: int = 42) -> List[Dict]:
+    rng = random.Random(seed)
+    menu = generate_menu_items(200)
+    orders = []
+    for i in range(count):
+        items = [{"name": item["name"], "qty": rng.randint(1, 3), "price": item["price"]}
+                 for item in rng.sample(menu, rng.randint(1, 4))]
+        orders.append({
+            "order_id": f"BENCH{i:08d}",
+            "customer_phone": f"+92300{rng.randrange(customers):07d}",
+            "customer_name": "Bench Customer",
+            "items": items,
+            "total": sum(item["qty"] * item["price"] for item in items),
+            "status": "PENDING_PAYMENT",
+            "delivery_type": "DELIVERY",
+        })
+    return orders
+
+
+def open_backend(name: str, folder: str, mongo_uri: str = None):
+    if name == "memory":
+        from memory_storage import InMemoryStorage
+        return InMemoryStorage()
+    if name == "sqlite":
+        from sqlite_storage import SQLiteStorage
+        return SQLiteStorage(os.path.join(folder, "bench.db"))
+    from database import Database
+    return Database(mongo_uri, database_name="restaurant_commerce_storage_bench")
+
+
+def run(db, orders: List[Dict], reads: int, seed: int = 7) -> List[Dict]:
+    """One row per operation: count, p50 / p99 in microseconds, total ms"""
+    rng = random.Random(seed)
+    timings: Dict[str, List[float]] = {}
+
+    def timed(operation: str, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        timings.setdefault(operation, []).append((time.perf_counter() - start) * 1e6)
+        return result
+
+    for order in orders:
+        timed("create_order", db.create_order, dict(order))
+    ids = [order["order_id"] for order in orders]
+    for _ in range(reads):
+        timed("get_order", db.get_order, rng.choice(ids))
+        timed("get_order (status view)", db.get_order, rng.choice(ids), "order_status")
+    for order_id in rng.sample(ids, min(len(ids), reads)):
+        timed("transition_order_status", db.transition_order_status, order_id, "PAID")
+    token = None
+    for _ in range(min(20, reads)):
+        _, token = timed("get_active_orders_page", db.get_active_orders_page, 100, token, "order_status")
+        if token is None:
+            break
+    for _ in range(5):
+        timed("_scan_analytics (7d)", db._scan_analytics, 7)
+
+    return [{
+        "operation": operation,
+        "count": len(values),
+        "p50_us": percentile(values, 50),
+        "p99_us": percentile(values, 99),
+        "total_ms": sum(values) / 1000,
+    } for operation, values in timings.items()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", nargs="+", default=["memory", "sqlite"],
+                        choices=["memory", "sqlite", "mongo"])
+    parser.add_argument("--mongo-uri", help="Also benchmark MongoDB at this URI")
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--customers", type=int, default=500)
+    parser.add_argument("--reads", type=int, default=2000)
+    args = parser.parse_args()
+
+    backends = list(args.backends)
+    if args.mongo_uri and "mongo" not in backends:
+        backends.append("mongo")
+    orders = make_orders(args.orders, args.customers)
+
+    for name in backends:
+        with tempfile.TemporaryDirectory() as folder:
+            start = time.perf_counter()
+            db = open_backend(name, folder, args.mongo_uri)
+            open_ms = (time.perf_counter() - start) * 1000
+            try:
+                rows = run(db, orders, args.reads)
+            finally:
+                if name == "mongo":
+                    db.client.drop_database(db.db.name)
+                db.close()
+        print(f"\n📊 {name}: {args.orders:,} orders, opened in {open_ms:.1f} ms")
+        print_table(rows, ["operation", "count", "p50_us", "p99_us", "total_ms"])
+
+
+if __name__ == "__main__":
+    main()
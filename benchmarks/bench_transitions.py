@@ -0,0 +1,251 @@
+"""
+Order Status Transition Benchmark
+Racing status updates under concurrent load, old flow vs new:
+
+- read-then-write: get_order, client-side transition check, unconditional
+  update, log_event (the old OrderManager.update_status)
+- atomic: transition_order_status - one conditional find_one_and_update
+  whose filter carries the status precondition and whose update carries
+  the status_history entry - then log_event for an applied transition
+  (the new OrderManager.update_status)
+
+Every worker thread walks every order through the same lifecycle, so each
+transition is attempted --workers times at once (duplicate webhooks, two
+kitchen screens). Reported per flow:
+
+- round_trips / attempt: MongoDB commands issued by the worker threads
+  (pymongo command listener; the write-behind analytics writer and the
+  rollup upserts of revenue changes are not on this path in either flow).
+  On the in-process backends this counts storage calls instead, each
+  delayed by --rtt-ms to stand in for the network
+- applied / expected: transitions written vs orders x lifecycle steps;
+  anything above 1.00 is a duplicate
+- illegal: history steps not allowed by ORDER_TRANSITIONS (backwards moves)
+
+Usage:
+    python -m benchmarks.bench_transitions --backend memory --rtt-ms 1
+    python -m benchmarks.bench_transitions --backend mongo --uri mongodb://localhost:27017/ --workers 8
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+from benchmarks.common import percentile, print_table
+
+LIFECYCLE = ["PAID", "CONFIRMED", "COOKING", "READY", "DISPATCHED", "DELIVERED"]
+WORKER_PREFIX = "transition-"
+
+
+class RoundTripCounter:
+    """Counts calls made from the benchmark's worker threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def hit(self):
+        if threading.current_thread().name.startswith(WORKER_PREFIX):
+            with self._lock:
+                self.count += 1
+
+
+class CountingStorage:
+    """Storage proxy that counts (and optionally delays) the calls the flows make"""
+
+    COUNTED = ("get_order", "transition_order_status", "log_event")
+
+    def __init__(self, db, counter: RoundTripCounter, rtt_ms: float = 0.0):
+        self._db = db
+        self._counter = counter
+        self._rtt = rtt_ms / 1000
+
+    def __getattr__(self, name):
+        attr = getattr(self._db, name)
+        if name not in self.COUNTED:
+            return attr
+
+        def call(*args, **kwargs):
+            self._counter.hit()
+            if self._rtt:
+                time.sleep(self._rtt)
+            return attr(*args, **kwargs)
+        return call
+
+
+def mongo_listener(counter: RoundTripCounter):
+    """Register a pymongo listener counting commands (before creating the client)"""
+    from pymongo import monitoring
+
+    class Listener(monitoring.CommandListener):
+        def started(self, event):
+            counter.hit()
+
+        def succeeded(self, event):
+            pass
+
+        def failed(self, event):
+            pass
+
+    monitoring.register(Listener())
+
+
+# ==================== FLOWS ====================
+
+def read_then_write(db, order_id: str, new_status: str) -> bool:
+    """The old update_status: read, check in the client, write, log"""
+    order = db.get_order(order_id, projection="order_status")
+    if not order or new_status not in db.ORDER_TRANSITIONS.get(order["status"], []):
+        return False
+    # No precondition on the write, like the old update_order_status
+    previous = db.transition_order_status(order_id, new_status,
+                                          from_statuses=list(db.ORDER_TRANSITIONS))
+    if previous is None:
+        return False
+    db.log_event("order_status_changed", {
+        "order_id": order_id,
+        "old_status": order["status"],
+        "new_status": new_status
+    })
+    return True
+
+
+def atomic(db, order_id: str, new_status: str) -> bool:
+    """One conditional write, logged only if it applied"""
+    previous = db.transition_order_status(order_id, new_status)
+    if previous is None:
+        return False
+    db.log_event("order_status_changed", {
+        "order_id": order_id,
+        "old_status": previous["status"],
+        "new_status": new_status
+    })
+    return True
+
+
+FLOWS = {"read-then-write": read_then_write, "atomic": atomic}
+
+
+# ==================== RUN ====================
+
+def open_backend(name: str, folder: str, uri: str = None):
+    from config import config
+
+    # Reads must see the latest write for the old flow's check to mean anything
+    config.DB_CACHE_BACKEND = "none"
+    if name == "memory":
+        from memory_storage import InMemoryStorage
+        return InMemoryStorage()
+    if name == "sqlite":
+        from sqlite_storage import SQLiteStorage
+        return SQLiteStorage(os.path.join(folder, "transitions.db"))
+    from database import Database
+    db = Database(uri, database_name="restaurant_commerce_transition_bench", index_migrations="sync")
+    db.orders.delete_many({})
+    return db
+
+
+def illegal_moves(db, history: List[Dict]) -> int:
+    status, illegal = "PENDING_PAYMENT", 0
+    for entry in history:
+        if entry["status"] not in db.ORDER_TRANSITIONS.get(status, []):
+            illegal += 1
+        status = entry["status"]
+    return illegal
+
+
+def run_flow(db, flow, orders: int, workers: int, counter: RoundTripCounter, label: str) -> Dict:
+    order_ids = [f"{label.upper()[:4]}{i:06d}" for i in range(orders)]
+    for order_id in order_ids:
+        db.create_order({"order_id": order_id, "customer_phone": "+923000000000",
+                         "items": [{"name": "Chicken Biryani", "qty": 1, "price": 650}],
+                         "total": 650, "status": "PENDING_PAYMENT"})
+
+    latencies: List[float] = []
+    latency_lock = threading.Lock()
+    start_gate = threading.Barrier(workers)
+
+    def worker():
+        start_gate.wait()
+        mine = []
+        for order_id in order_ids:
+            for status in LIFECYCLE:
+                begin = time.perf_counter()
+                flow(db, order_id, status)
+                mine.append((time.perf_counter() - begin) * 1000)
+        with latency_lock:
+            latencies.extend(mine)
+
+    counter.count = 0
+    threads = [threading.Thread(target=worker, name=f"{WORKER_PREFIX}{i}") for i in range(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    round_trips = counter.count
+
+    applied, illegal = 0, 0
+    for order_id in order_ids:
+        history = db.get_order(order_id, projection=["status_history"]).get("status_history", [])
+        applied += len(history)
+        illegal += illegal_moves(db, history)
+    expected = orders * len(LIFECYCLE)
+    attempts = len(latencies)
+    return {
+        "flow": label,
+        "attempts": attempts,
+        "round_trips": round_trips,
+        "rt_per_attempt": round_trips / attempts,
+        "rt_per_applied": round_trips / applied if applied else 0.0,
+        "applied/expected": applied / expected,
+        "illegal": illegal,
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "attempts/s": attempts / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backend", default="memory", choices=["memory", "sqlite", "mongo"])
+    parser.add_argument("--uri", help="MongoDB URI (default: MONGODB_URI)")
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rtt-ms", type=float, default=0.5,
+                        help="Simulated round trip per storage call (in-process backends)")
+    args = parser.parse_args()
+
+    counter = RoundTripCounter()
+    if args.backend == "mongo":
+        mongo_listener(counter)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as folder:
+        backend = open_backend(args.backend, folder, args.uri)
+        db = backend if args.backend == "mongo" else CountingStorage(backend, counter, args.rtt_ms)
+        try:
+            for label, flow in FLOWS.items():
+                # Per-call status prints would dominate the timings
+                with contextlib.redirect_stdout(io.StringIO()):
+                    rows.append(run_flow(db, flow, args.orders, args.workers, counter, label))
+        finally:
+            if args.backend == "mongo":
+                backend.client.drop_database(backend.db.name)
+            backend.close()
+
+    unit = "MongoDB commands" if args.backend == "mongo" else f"storage calls ({args.rtt_ms} ms each)"
+    print(f"\n📊 {args.orders} orders x {len(LIFECYCLE)} steps x {args.workers} workers "
+          f"on {args.backend}; round trips = {unit}")
+    print_table(rows, ["flow", "attempts", "round_trips", "rt_per_attempt", "rt_per_applied",
+                       "applied/expected", "illegal", "p50_ms", "p99_ms", "attempts/s"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Shared benchmark helpers
+Offline stubs, synthetic menus and timing utilities
+"""
+
+import hashlib
+import math
+import random
+import re
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+
+# ==================== SYNTHETIC MENUS ====================
+
+SECTIONS = {
+    "STARTERS": ["Samosa", "Spring Roll", "Pakora", "Chicken Wings", "Fish Fingers",
+                 "Dahi Bhalla", "Chaat", "Seekh Kebab", "Shami Kebab", "Hot Wings"],
+    "MAIN COURSE": ["Chicken Biryani", "Mutton Karahi", "Beef Nihari", "Vegetable Pulao",
+                    "Chicken Tikka", "Daal Makhani", "Palak Paneer", "Chicken Handi",
+                    "Mutton Qorma", "Fish Curry", "Beef Haleem", "Chana Masala"],
+    "BREADS": ["Garlic Naan", "Roti", "Butter Naan", "Paratha", "Kulcha", "Puri"],
+    "DRINKS": ["Mango Lassi", "Fresh Juice", "Mint Margarita", "Doodh Patti Tea",
+               "Cold Coffee", "Mineral Water", "Sweet Lassi"],
+    "DESSERTS": ["Gulab Jamun", "Kheer", "Ice Cream", "Chocolate Cake", "Gajar Halwa",
+                 "Ras Malai"],
+}
+
+VARIANTS = ["", "Special", "Family", "Spicy", "Classic", "Royal", "Tandoori", "Karachi"]
+
+FLAVORS = ["", "Masala", "Butter", "Garlic", "Achari", "Malai", "Peri Peri", "Lemon",
+           "Smoky", "Reshmi"]
+
+SIZES = ["", "Half", "Full", "Large"]
+
+DESCRIPTIONS = [
+    "slow cooked with house spices",
+    "served with raita and salad",
+    "a customer favourite since day one",
+    "made fresh to order",
+    "mildly spiced, great for kids",
+]
+
+PRICE_RANGES = {
+    "STARTERS": (120, 650),
+    "MAIN COURSE": (450, 2200),
+    "BREADS": (30, 180),
+    "DRINKS": (80, 450),
+    "DESSERTS": (150, 700),
+}
+
+
+def generate_menu_items(n_items: int, seed: int = 7) -> List[Dict]:
+    """
+    Generate up to n_items unique menu items with known prices
+
+    Returns:
+        [{"name", "price", "section", "description"}] grouped by section
+    """
+    rng = random.Random(seed)
+    combos = [
+        (section, size, variant, flavor, base)
+        for section, bases in SECTIONS.items()
+        for base in bases
+        for size in SIZES
+        for variant in VARIANTS
+        for flavor in FLAVORS
+        if not flavor or flavor not in base
+    ]
+    # Prefer plain names first so small menus look like real ones
+    rng.shuffle(combos)
+    combos.sort(key=lambda combo: sum(part != "" for part in combo[1:4]))
+
+    items = []
+    for section, size, variant, flavor, base in combos[:n_items]:
+        low, high = PRICE_RANGES[section]
+        items.append({
+            "name": " ".join(part for part in (size, variant, flavor, base) if part),
+            "price": rng.randrange(low, high, 10),
+            "section": section,
+            "description": rng.choice(DESCRIPTIONS) if rng.random() < 0.3 else "",
+        })
+    order = list(SECTIONS)
+    items.sort(key=lambda item: order.index(item["section"]))
+    return items
+
+
+def menu_lines(items: Sequence[Dict], descriptions: bool = False) -> List[str]:
+    """Render items as menu lines: section headers, 'Name Rs price', descriptions"""
+    lines = []
+    section = None
+    for item in items:
+        if item["section"] != section:
+            if section is not None:
+                lines.append("")
+            section = item["section"]
+            lines.append(section)
+        lines.append(f"{item['name']} Rs {item['price']}")
+        if descriptions and item.get("description"):
+            lines.append(item["description"])
+    return lines
+
+
+def generate_menu(n_items: int, seed: int = 7, descriptions: bool = False) -> Tuple[str, List[Dict]]:
+    """
+    Generate a realistic menu text with known items and prices
+
+    Returns:
+        (menu_text, [{"name", "price", "section", "description"}])
+    """
+    items = generate_menu_items(n_items, seed)
+    return "\n".join(menu_lines(items, descriptions)), items
+
+
+def item_questions(items: Sequence[Dict], limit: int = 50, seed: int = 11) -> List[Tuple[str, str]]:
+    """(question, expected item name) pairs about known menu items"""
+    rng = random.Random(seed)
+    templates = [
+        "How much is the {name}?",
+        "{name} price",
+        "Do you have {name}?",
+        "I want {name}",
+    ]
+    picked = rng.sample(list(items), min(limit, len(items)))
+    return [(rng.choice(templates).format(name=item["name"].lower()), item["name"]) for item in picked]
+
+
+# ==================== OFFLINE STUBS ====================
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic bag-of-words embeddings (LangChain Embeddings interface)
+    Stand-in for MiniLM so benchmarks run fully offline
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.model_name = f"hashing-{dim}"
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for token in re.findall(r"[a-z]+|\d+", text.lower()):
+            digest = int(hashlib.md5(token.encode()).hexdigest(), 16)
+            vector[digest % self.dim] += 1.0 if (digest >> 64) & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class _StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubGenerativeModel:
+    """
+    Generative model stand-in: canned answer, counts calls
+
+    Optional synthetic latency (seconds), e.g.:
+        "constant:0.4"
+        "uniform:0.2,0.9"
+        "lognormal:-1.0,0.5"   (mu, sigma of the underlying normal)
+    """
+
+    def __init__(self, answer: str = "Our Chicken Biryani is Rs 650.",
+                 latency: str = None, seed: int = 3):
+        self.answer = answer
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._sample = self._parse_latency(latency)
+
+    def _parse_latency(self, spec: str):
+        if not spec:
+            return lambda: 0.0
+        kind, _, params = spec.partition(":")
+        values = [float(v) for v in params.split(",") if v]
+        if kind == "constant":
+            return lambda: values[0]
+        if kind == "uniform":
+            return lambda: self._rng.uniform(values[0], values[1])
+        if kind == "lognormal":
+            return lambda: self._rng.lognormvariate(values[0], values[1])
+        raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def generate_content(self, prompt: str) -> _StubResponse:
+        with self._lock:
+            self.calls += 1
+            delay = self._sample()
+        if delay > 0:
+            time.sleep(delay)
+        return _StubResponse(self.answer)
+
+
+def load_embeddings(kind: str = "stub"):
+    """'stub' = offline hashing embeddings, 'minilm' = cached HuggingFace MiniLM"""
+    if kind == "stub":
+        return HashingEmbeddings()
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+
+
+def build_engine(menu_text: str, embeddings=None, generative_model=None, **kwargs):
+    """RestaurantRAG with a processed menu and no network access"""
+    from rag_engine import RestaurantRAG
+
+    engine = RestaurantRAG(
+        api_key="offline",
+        embeddings=embeddings or HashingEmbeddings(),
+        generative_model=generative_model or StubGenerativeModel(),
+        **kwargs
+    )
+    engine.process_menu_text(menu_text)
+    return engine
+
+
+# ==================== TIMING ====================
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile (pct in 0-100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def time_ms(fn, *args, **kwargs):
+    """Call fn and return (result, elapsed milliseconds)"""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt-token estimate (~4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+def print_table(rows: List[Dict], columns: Sequence[str]):
+    """Print rows as a fixed-width table"""
+    widths = {
+        col: max(len(col), *(len(_fmt(row.get(col))) for row in rows)) if rows else len(col)
+        for col in columns
+    }
+    print("  ".join(col.ljust(widths[col]) for col in columns))
+    print("  ".join("-" * widths[col] for col in columns))
+    for row in rows:
+        print("  ".join(_fmt(row.get(col)).ljust(widths[col]) for col in columns))
+
+
+def _fmt(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return str(value)
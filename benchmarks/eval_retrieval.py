@@ -0,0 +1,219 @@
+"""
+Offline Retrieval Evaluation
+Scores every index configuration (chunking × retrieval mode × k × embeddings)
+on labeled (menu, question, expected items) fixtures:
+
+- recall@k: share of expected items whose name appears in the retrieved chunks
+- hit@k: share of questions with at least one expected item retrieved
+- precision / recall of _get_relevant_items (the recommendation list)
+- retrieval latency, context tokens, index size and build peak memory
+
+and suggests the cheapest configuration whose recall stays within a
+tolerance of the best one.
+
+Usage:
+    python -m benchmarks.eval_retrieval
+    python -m benchmarks.eval_retrieval --embeddings stub minilm --k 2 3 4 6
+    python -m benchmarks.eval_retrieval --fixtures my_menus.json --synthetic 400 2000 --out eval.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import time
+import tracemalloc
+from typing import Dict, List, Sequence
+
+from benchmarks.common import (
+    StubGenerativeModel, estimate_tokens, generate_menu, item_questions,
+    load_embeddings, percentile, print_table, time_ms
+)
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "retrieval_eval.json")
+
+
+def load_fixtures(path: str) -> List[Dict]:
+    """[{"name", "text", "questions": [{"question", "expected": [item names]}]}]"""
+    with open(path) as f:
+        menus = json.load(f)["menus"]
+    for menu in menus:
+        menu["text"] = "\n".join(menu.pop("lines"))
+    return menus
+
+
+def synthetic_menus(sizes: Sequence[int]) -> List[Dict]:
+    """Generated menus labeled with one expected item per question"""
+    menus = []
+    for size in sizes:
+        text, items = generate_menu(size, descriptions=True)
+        menus.append({
+            "name": f"synthetic-{size}",
+            "text": text,
+            "questions": [{"question": question, "expected": [name]}
+                          for question, name in item_questions(items, limit=40)],
+        })
+    return menus
+
+
+def build_index(menu_text: str, embeddings, chunking: str):
+    """
+    Process a menu with one chunking strategy
+
+    Returns:
+        (engine, {"build_ms", "build_peak_kb", "index_kb", "chunks"})
+    """
+    from rag_engine import RestaurantRAG
+
+    engine = RestaurantRAG(api_key="offline", embeddings=embeddings,
+                           generative_model=StubGenerativeModel(), chunk_strategy=chunking)
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    engine.process_menu_text(menu_text)
+    build_ms = (time.perf_counter() - start) * 1000
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    index_bytes = engine.chunk_embeddings.nbytes + sum(len(chunk.encode()) for chunk in engine.chunks)
+    index_bytes += 16 * sum(len(postings) for postings in engine.bm25_index.postings.values())
+    return engine, {
+        "build_ms": build_ms,
+        "build_peak_kb": peak / 1024,
+        "index_kb": index_bytes / 1024,
+        "chunks": len(engine.chunks),
+    }
+
+
+def mentions(text: str, name: str) -> bool:
+    return name.lower() in text.lower()
+
+
+def eval_retrieval(engine, questions: Sequence[Dict], embedded: Dict[str, List[float]],
+                   hybrid: bool, k: int) -> Dict:
+    """recall@k / hit@k / latency / context size of _retrieve for one mode and k"""
+    engine.hybrid_retrieval = hybrid
+    recalls, hits, latencies, tokens = [], 0, [], []
+
+    for case in questions:
+        docs, elapsed = time_ms(engine._retrieve, case["question"], embedded[case["question"]], k)
+        context = "\n\n".join(doc.page_content for doc in docs)
+        found = sum(mentions(context, name) for name in case["expected"])
+        recalls.append(found / len(case["expected"]))
+        hits += found > 0
+        latencies.append(elapsed)
+        tokens.append(estimate_tokens(context))
+
+    return {
+        "recall_at_k": sum(recalls) / len(recalls),
+        "hit_at_k": hits / len(questions),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "context_tokens": sum(tokens) / len(tokens),
+    }
+
+
+def eval_relevant_items(engine, questions: Sequence[Dict]) -> Dict:
+    """Precision / recall of the _get_relevant_items recommendation list"""
+    precisions, recalls, latencies = [], [], []
+    for case in questions:
+        items, elapsed = time_ms(engine._get_relevant_items, case["question"])
+        names = [item["name"] for item in items]
+        correct = sum(any(mentions(name, expected) for expected in case["expected"]) for name in names)
+        covered = sum(any(mentions(name, expected) for name in names) for expected in case["expected"])
+        precisions.append(correct / len(names) if names else 0.0)
+        recalls.append(covered / len(case["expected"]))
+        latencies.append(elapsed)
+
+    return {
+        "precision": sum(precisions) / len(precisions),
+        "recall": sum(recalls) / len(recalls),
+        "p50_ms": percentile(latencies, 50),
+    }
+
+
+def run_eval(menus: List[Dict], embeddings_kinds: Sequence[str], chunkings: Sequence[str],
+             modes: Sequence[str], ks: Sequence[int]) -> Dict:
+    """Evaluate every configuration on every menu; rows are averaged over menus"""
+    configs: Dict[tuple, List[Dict]] = {}
+    relevant_rows = []
+
+    for kind in embeddings_kinds:
+        embeddings = load_embeddings(kind)
+        for menu in menus:
+            questions = menu["questions"]
+            embed_start = time.perf_counter()
+            embedded = {case["question"]: embeddings.embed_query(case["question"]) for case in questions}
+            embed_ms = (time.perf_counter() - embed_start) * 1000 / len(questions)
+
+            for chunking in chunkings:
+                engine, build = build_index(menu["text"], embeddings, chunking)
+                for mode in modes:
+                    for k in ks:
+                        scores = eval_retrieval(engine, questions, embedded, mode == "hybrid", k)
+                        configs.setdefault((kind, chunking, mode, k), []).append(
+                            {**scores, **build, "embed_ms": embed_ms}
+                        )
+
+            relevant_rows.append({"embeddings": kind, "menu": menu["name"],
+                                  **eval_relevant_items(engine, questions)})
+
+    rows = []
+    for (kind, chunking, mode, k), results in configs.items():
+        row = {"embeddings": kind, "chunking": chunking, "mode": mode, "k": k}
+        for metric in results[0]:
+            row[metric] = sum(result[metric] for result in results) / len(results)
+        rows.append(row)
+    return {"configs": rows, "relevant_items": relevant_rows}
+
+
+def recommend(rows: List[Dict], tolerance: float) -> Dict:
+    """Cheapest configuration (context tokens, then latency) within `tolerance` of the best recall"""
+    best_recall = max(row["recall_at_k"] for row in rows)
+    eligible = [row for row in rows if row["recall_at_k"] >= best_recall - tolerance]
+    return min(eligible, key=lambda row: (row["context_tokens"], row["index_kb"], row["p50_ms"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fixtures", default=FIXTURES_PATH)
+    parser.add_argument("--embeddings", nargs="+", choices=["stub", "minilm"], default=["stub"])
+    parser.add_argument("--chunking", nargs="+", choices=["fixed", "menu"], default=["fixed", "menu"])
+    parser.add_argument("--modes", nargs="+", choices=["vector", "hybrid"], default=["vector", "hybrid"])
+    parser.add_argument("--k", type=int, nargs="+", default=[2, 3, 4])
+    parser.add_argument("--synthetic", type=int, nargs="*", default=[400],
+                        help="Also evaluate generated menus of these item counts (none: fixtures only)")
+    parser.add_argument("--tolerance", type=float, default=0.02,
+                        help="Recall a recommended configuration may give up vs the best")
+    parser.add_argument("--out", help="Write results JSON here")
+    args = parser.parse_args()
+
+    if "minilm" in args.embeddings:
+        # Use the locally cached model only
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+    menus = load_fixtures(args.fixtures) + synthetic_menus(args.synthetic)
+    results = run_eval(menus, args.embeddings, args.chunking, args.modes, args.k)
+    questions = sum(len(menu["questions"]) for menu in menus)
+
+    print(f"\n📊 Retrieval quality ({len(menus)} menus, {questions} labeled questions)")
+    print_table(results["configs"], ["embeddings", "chunking", "mode", "k", "recall_at_k", "hit_at_k",
+                                     "context_tokens", "p50_ms", "p95_ms", "chunks", "index_kb",
+                                     "build_peak_kb", "build_ms", "embed_ms"])
+
+    print("\n📊 _get_relevant_items")
+    print_table(results["relevant_items"], ["embeddings", "menu", "precision", "recall", "p50_ms"])
+
+    choice = recommend(results["configs"], args.tolerance)
+    print(f"\n✅ Suggested: {choice['embeddings']} / {choice['chunking']} / {choice['mode']} / k={choice['k']} "
+          f"(recall@k {choice['recall_at_k']:.3f}, {choice['context_tokens']:.0f} context tokens)")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({**results, "suggested": choice}, f, indent=2)
+        print(f"💾 Results saved: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
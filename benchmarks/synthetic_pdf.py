@@ -0,0 +1,120 @@
+"""
+Synthetic Menu PDF Generator
+Writes realistic multi-page menu PDFs with known items and prices,
+using a tiny built-in PDF writer (no reportlab, no network).
+
+Usage:
+    python -m benchmarks.synthetic_pdf --pages 10 --out menu_10p.pdf
+"""
+
+import argparse
+import json
+from typing import Dict, List, Sequence
+
+from benchmarks.common import generate_menu_items, menu_lines
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+MARGIN = 56
+FONT_SIZE = 11
+LEADING = 15
+LINES_PER_PAGE = (PAGE_HEIGHT - 2 * MARGIN) // LEADING
+
+# Roughly how many items fit on a page once headers/descriptions are counted
+ITEMS_PER_PAGE = 40
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_stream(lines: Sequence[str]) -> bytes:
+    """Content stream drawing one page of text lines"""
+    ops = [f"BT /F1 {FONT_SIZE} Tf {LEADING} TL {MARGIN} {PAGE_HEIGHT - MARGIN} Td"]
+    for line in lines:
+        ops.append(f"({_escape(line)}) Tj T*")
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1", errors="replace")
+
+
+def write_pdf(path: str, lines: Sequence[str]) -> int:
+    """
+    Write text lines to a paginated PDF (Helvetica, A4)
+
+    Returns:
+        Number of pages written
+    """
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+
+    # Object ids: 1 catalog, 2 page tree, 3 font, then (page, content) pairs
+    objects: Dict[int, bytes] = {
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    }
+    page_ids = []
+    for index, page_lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * index, 5 + 2 * index
+        stream = _page_stream(page_lines)
+        objects[content_id] = (
+            f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream"
+        )
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode()
+        page_ids.append(page_id)
+
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[2] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += f"{obj_id} 0 obj\n".encode() + objects[obj_id] + b"\nendobj\n"
+
+    xref_at = len(out)
+    count = max(objects) + 1
+    out += f"xref\n0 {count}\n0000000000 65535 f \n".encode()
+    for obj_id in range(1, count):
+        out += f"{offsets[obj_id]:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {count} /Root 1 0 R >>\nstartxref\n{xref_at}\n%%EOF\n".encode()
+
+    with open(path, "wb") as f:
+        f.write(out)
+    return len(pages)
+
+
+def write_menu_pdf(path: str, pages: int, seed: int = 7) -> List[Dict]:
+    """
+    Write a synthetic menu PDF of about `pages` pages
+
+    Returns:
+        The known items ({"name", "price", "section", "description"})
+    """
+    items = generate_menu_items(pages * ITEMS_PER_PAGE, seed)
+    lines = menu_lines(items, descriptions=True)
+    # Pad short menus / trim long ones to the requested page count
+    target = pages * LINES_PER_PAGE
+    lines = lines[:target] + [""] * max(0, target - len(lines))
+    kept = set(lines)
+    write_pdf(path, lines)
+    return [item for item in items if f"{item['name']} Rs {item['price']}" in kept]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--out", default="synthetic_menu.pdf")
+    parser.add_argument("--items-json", help="Also write the known items to this file")
+    args = parser.parse_args()
+
+    items = write_menu_pdf(args.out, args.pages)
+    print(f"✅ Wrote {args.out}: {args.pages} pages, {len(items)} items")
+
+    if args.items_json:
+        with open(args.items_json, "w") as f:
+            json.dump(items, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
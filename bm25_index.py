@@ -0,0 +1,131 @@
+"""
+Sparse BM25 Index for Menu Chunks
+Exact dish names and prices ("biryani", "500") - things dense MiniLM retrieval misses
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+
+TOKEN_PATTERN = re.compile(r"[a-z]+|\d+")
+
+# Question filler words that carry no menu signal
+STOPWORDS = frozenset([
+    'a', 'an', 'and', 'any', 'are', 'do', 'does', 'for', 'have', 'i', 'in',
+    'is', 'it', 'me', 'my', 'of', 'on', 'or', 'please', 'rs', 'pkr', 'show',
+    'some', 'the', 'there', 'to', 'what', 'whats', 'with', 'you', 'your'
+])
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word and number tokens, minus stopwords"""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed list of chunks
+
+    Term weights are query-independent, so they are computed once at build
+    time: a query is just a sum over the postings of its terms.
+    """
+
+    def __init__(self, texts: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        """
+        Build the index
+
+        Args:
+            texts: Chunk texts (position = chunk id)
+            k1: Term-frequency saturation
+            b: Length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.size = len(texts)
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+        self.idf: Dict[str, float] = {}
+
+        doc_terms = [Counter(tokenize(text)) for text in texts]
+        doc_lengths = [sum(terms.values()) for terms in doc_terms]
+        avg_length = (sum(doc_lengths) / self.size) if self.size else 0.0
+
+        doc_freq = Counter()
+        for terms in doc_terms:
+            doc_freq.update(terms.keys())
+
+        self.idf = {
+            term: math.log(1 + (self.size - freq + 0.5) / (freq + 0.5))
+            for term, freq in doc_freq.items()
+        }
+
+        postings = defaultdict(list)
+        for doc_id, terms in enumerate(doc_terms):
+            norm = k1 * (1 - b + b * (doc_lengths[doc_id] / avg_length if avg_length else 0))
+            for term, tf in terms.items():
+                postings[term].append((doc_id, self.idf[term] * tf * (k1 + 1) / (tf + norm)))
+        self.postings = dict(postings)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
+        """
+        Score chunks against a query
+
+        Returns:
+            Up to k (chunk_id, score) pairs, best first
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        for term, count in Counter(tokenize(query)).items():
+            for doc_id, weight in self.postings.get(term, ()):
+                scores[doc_id] += weight * count
+        return sorted(scores.items(), key=lambda pair: pair[1], reverse=True)[:k]
+
+    def __len__(self) -> int:
+        return self.size
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]],
+                           k: int = 60,
+                           weights: Sequence[float] = None) -> List[Tuple[int, float]]:
+    """
+    Fuse several ranked id lists into one (Reciprocal Rank Fusion)
+
+    Rank-based, so BM25 scores and FAISS L2 distances never need to be
+    put on the same scale.
+
+    Args:
+        rankings: Ranked chunk-id lists, best first
+        k: RRF damping constant
+        weights: Optional per-ranking weights (default 1.0 each)
+
+    Returns:
+        (chunk_id, fused_score) pairs, best first
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused: Dict[int, float] = defaultdict(float)
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] += weight / (k + rank + 1)
+    return sorted(fused.items(), key=lambda pair: pair[1], reverse=True)
+
+
+# Example usage
+if __name__ == "__main__":
+    print("🧪 Testing BM25 Index...\n")
+
+    chunks = [
+        "STARTERS\nChicken Samosa Rs 150\nVeggie Spring Roll Rs 200",
+        "MAIN COURSE\nChicken Biryani Rs 650\nMutton Karahi Rs 1400",
+        "DRINKS\nMango Lassi Rs 200\nFresh Juice Rs 250",
+    ]
+    index = BM25Index(chunks)
+
+    hits = index.search("how much is the biryani?", k=2)
+    assert hits[0][0] == 1
+    print(f"✅ 'biryani' → chunk {hits[0][0]} (score {hits[0][1]:.2f})")
+
+    fused = reciprocal_rank_fusion([[2, 1, 0], [1, 0]])
+    assert fused[0][0] == 1
+    print(f"✅ Fused ranking: {[doc_id for doc_id, _ in fused]}")
+
+    print("\n✅ All tests passed!")
@@ -28,6 +28,37 @@ class Config:
         'mongodb://localhost:27017/'  # Default to local
     )
     DATABASE_NAME = "restaurant_commerce"
+    # Ping on Database() to fail fast on a bad URI (costs a round trip per process start)
+    MONGODB_PING_ON_START = os.getenv('MONGODB_PING_ON_START', 'False').lower() == 'true'
+    # Versioned index migration (db_migrations.py): 'background', 'sync' or 'off'
+    DB_INDEX_MIGRATIONS = os.getenv('DB_INDEX_MIGRATIONS', 'background').lower()
+    
+    # Storage backend (storage.py): 'mongo', 'sqlite' (one local WAL file, single box)
+    # or 'memory' (this process only: tests and benchmarks)
+    DATABASE_BACKEND = os.getenv('DATABASE_BACKEND', 'mongo').lower()
+    SQLITE_PATH = os.getenv('SQLITE_PATH', 'restaurant.db')
+    
+    # Write-behind analytics events (event_writer.py)
+    ANALYTICS_BUFFERED = os.getenv('ANALYTICS_BUFFERED', 'True').lower() == 'true'
+    ANALYTICS_QUEUE_SIZE = int(os.getenv('ANALYTICS_QUEUE_SIZE', 10000))
+    ANALYTICS_BATCH_SIZE = int(os.getenv('ANALYTICS_BATCH_SIZE', 500))
+    ANALYTICS_FLUSH_SECONDS = float(os.getenv('ANALYTICS_FLUSH_SECONDS', 1.0))
+    ANALYTICS_FULL_POLICY = os.getenv('ANALYTICS_FULL_POLICY', 'drop').lower()  # 'drop' or 'block'
+    
+    # get_analytics from hourly/daily rollups (analytics_rollups.py) instead of order scans;
+    # windows older than the rollups' coverage still scan until `analytics_rollups backfill` runs
+    ANALYTICS_ROLLUPS = os.getenv('ANALYTICS_ROLLUPS', 'True').lower() == 'true'
+    # Order-scan analytics ($facet): spill to disk, server-side time limit (0 = none)
+    ANALYTICS_ALLOW_DISK_USE = os.getenv('ANALYTICS_ALLOW_DISK_USE', 'True').lower() == 'true'
+    ANALYTICS_MAX_TIME_MS = int(os.getenv('ANALYTICS_MAX_TIME_MS', 10000))
+    
+    # Read-through cache for get_order / get_payment / get_customer (db_cache.py)
+    # 'none', 'redis' (shared by workers) or 'memory' (per process - single-worker
+    # deployments only: other workers would serve a changed status until the TTL)
+    DB_CACHE_BACKEND = os.getenv('DB_CACHE_BACKEND', 'none').lower()
+    DB_CACHE_MAX_ENTRIES = int(os.getenv('DB_CACHE_MAX_ENTRIES', 10000))
+    DB_CACHE_TTL_SECONDS = float(os.getenv('DB_CACHE_TTL_SECONDS', 5))
+    REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
     
     # ==================== AI API KEYS ====================
     # NEW: Google Gemini (Primary - FREE TIER AVAILABLE!)
@@ -43,6 +74,9 @@ class Config:
     GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'models/gemini-2.5-flash')  # or 'models/gemini-1.5-pro-latest'
     GROQ_MODEL = os.getenv('GROQ_MODEL', 'llama-3.3-70b-versatile')
     
+    # Retrieval reranker ('' = off, 'lexical' or 'cross-encoder')
+    RERANKER = os.getenv('RERANKER', '').lower()
+    
     # Agentic Features
     ENABLE_AGENTIC_MODE = os.getenv('ENABLE_AGENTIC_MODE', 'True').lower() == 'true'
     ENABLE_AUTO_ADD_TO_CART = os.getenv('ENABLE_AUTO_ADD_TO_CART', 'True').lower() == 'true'
@@ -73,6 +107,13 @@ class Config:
     # Streamlit UI
     STREAMLIT_PORT = int(os.getenv('STREAMLIT_PORT', 8501))
     
+    # Pre-fork launcher (prefork.py): webhook worker processes sharing one loaded model
+    # (the Green API bot role always runs a single poller)
+    WORKER_PROCESSES = int(os.getenv('WORKER_PROCESSES', 4))
+    
+    # Background menu processing (menu_jobs.py): menus ingested concurrently
+    MENU_JOB_WORKERS = int(os.getenv('MENU_JOB_WORKERS', 2))
+    
     # Base URLs
     API_BASE_URL = os.getenv('API_BASE_URL', f'http://localhost:{WEBHOOK_PORT}')
     APP_BASE_URL = os.getenv('APP_BASE_URL', f'http://localhost:{STREAMLIT_PORT}')
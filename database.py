@@ -3,16 +3,22 @@ MongoDB Database Manager
 Production-ready with connection pooling and error handling
 """
 
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, OperationFailure
+from pymongo import MongoClient, ReturnDocument
+from pymongo.errors import ConnectionFailure, ExecutionTimeout, OperationFailure
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 import os
 from dotenv import load_dotenv
+from config import config
+from event_writer import BufferedEventWriter
+from analytics_rollups import REVENUE_STATUSES, AnalyticsRollups
+from db_cache import create_cache
+from db_migrations import IndexMigration
+from storage import StorageBackend, decode_page_token, encode_page_token
 load_dotenv()
 
 
-class Database:
+class Database(StorageBackend):
     """
     MongoDB Database Manager
     
@@ -21,14 +27,49 @@ class Database:
     - Auto-retry
     - Error handling
     - Index management
+    - Read-through cache and named projections for hot reads
+    
+    Views, paging and the analytics event path come from StorageBackend
+    (storage.py); memory_storage / sqlite_storage implement the same methods
     """
     
-    def __init__(self, connection_string: str = None):
+    backend = "mongo"
+    
+    # Index spec: collection → indexes, each with the query methods relying on it
+    # (index_advisor.py explains those methods and fails on COLLSCAN / in-memory SORT)
+    # Bump SCHEMA_VERSION with every change; db_migrations.py applies it once
+    SCHEMA_VERSION = 1
+    INDEXES = {
+        'orders': [
+            {'keys': [('order_id', 1)], 'unique': True,
+             'used_by': ['get_order', 'transition_order_status']},
+            {'keys': [('customer_phone', 1), ('created_at', -1), ('order_id', -1)],
+             'used_by': ['get_customer_orders_page', 'iter_customer_orders']},
+            {'keys': [('status', 1), ('created_at', -1), ('order_id', -1)],
+             'used_by': ['get_active_orders_page', 'iter_active_orders']},
+            {'keys': [('created_at', -1), ('status', 1)],
+             'used_by': ['_scan_analytics', 'analytics_rollups.backfill']},
+        ],
+        'customers': [
+            {'keys': [('phone', 1)], 'unique': True, 'used_by': ['get_customer']},
+            {'keys': [('customer_id', 1)], 'unique': True, 'used_by': []},
+        ],
+        'payments': [
+            {'keys': [('payment_id', 1)], 'unique': True, 'used_by': ['get_payment']},
+            {'keys': [('order_id', 1)], 'used_by': []},
+        ],
+    }
+    
+    def __init__(self, connection_string: str = None, database_name: str = None,
+                 index_migrations: str = None):
         """
         Initialize MongoDB connection
         
         Args:
             connection_string: MongoDB URI (default: from env or localhost)
+            database_name: Database to use (default: config.DATABASE_NAME)
+            index_migrations: 'background', 'sync' or 'off'
+                (default: config.DB_INDEX_MIGRATIONS)
         """
         # Get connection string
         if not connection_string:
@@ -38,7 +79,7 @@ class Database:
             )
         
         try:
-            # Create client with production settings
+            # Create client with production settings (connects lazily)
             self.client = MongoClient(
                 connection_string,
                 serverSelectionTimeoutMS=5000,  # 5 sec timeout
@@ -46,47 +87,107 @@ class Database:
                 retryWrites=True
             )
             
-            # Test connection
-            self.client.admin.command('ping')
-            print("✅ MongoDB connected successfully!")
+            # Fail fast on a bad URI / unreachable server (one extra round trip)
+            if config.MONGODB_PING_ON_START:
+                self.client.admin.command('ping')
+                print("✅ MongoDB connected successfully!")
             
             # Select database
-            self.db = self.client['restaurant_commerce']
+            self.db = self.client[database_name or config.DATABASE_NAME]
             
             # Collections
             self.orders = self.db['orders']
             self.customers = self.db['customers']
             self.payments = self.db['payments']
             self.analytics = self.db['analytics']
+            self.rollups = AnalyticsRollups(self.db['analytics_rollups'])
+            
+            # Indexes are built once per SCHEMA_VERSION, off the startup path
+            self.migration = IndexMigration(
+                self.db, self.INDEXES, self.SCHEMA_VERSION,
+                hooks=[self.rollups.create_indexes]
+            )
+            mode = (index_migrations or config.DB_INDEX_MIGRATIONS).lower()
+            if mode == "background":
+                self.migration.start()
+            elif mode == "sync":
+                self.migration.run()
+            elif mode != "off":
+                raise ValueError(f"Unknown index_migrations mode: {mode} (use 'background', 'sync' or 'off')")
+            
+            # Recently read orders / payments / customers (dropped on write)
+            self.cache = create_cache(
+                config.DB_CACHE_BACKEND,
+                max_entries=config.DB_CACHE_MAX_ENTRIES,
+                ttl_seconds=config.DB_CACHE_TTL_SECONDS,
+                redis_url=config.REDIS_URL
+            )
             
-            # Create indexes for performance
-            self._create_indexes()
+            # Analytics events are written behind the request path
+            self.event_writer = None
+            if config.ANALYTICS_BUFFERED:
+                self.event_writer = BufferedEventWriter(
+                    self.analytics,
+                    max_queue=config.ANALYTICS_QUEUE_SIZE,
+                    batch_size=config.ANALYTICS_BATCH_SIZE,
+                    flush_interval=config.ANALYTICS_FLUSH_SECONDS,
+                    full_policy=config.ANALYTICS_FULL_POLICY
+                )
             
         except ConnectionFailure as e:
             print(f"❌ MongoDB connection failed: {e}")
             print("💡 Make sure MongoDB is running or update MONGODB_URI")
             raise
     
-    def _create_indexes(self):
-        """Create database indexes for fast queries"""
-        try:
-            # Order indexes
-            self.orders.create_index("order_id", unique=True)
-            self.orders.create_index("customer_phone")
-            self.orders.create_index("status")
-            self.orders.create_index("created_at")
-            
-            # Customer indexes
-            self.customers.create_index("phone", unique=True)
-            self.customers.create_index("customer_id", unique=True)
-            
-            # Payment indexes
-            self.payments.create_index("payment_id", unique=True)
-            self.payments.create_index("order_id")
-            
-            print("✅ Database indexes created")
-        except Exception as e:
-            print(f"⚠️ Index creation warning: {e}")
+    def wait_for_indexes(self, timeout: float = 60.0) -> bool:
+        """Block until the indexes of SCHEMA_VERSION exist (False on failure / timeout)"""
+        return self.migration.ensure(timeout)
+    
+    def get_schema_status(self) -> Dict:
+        """State of the versioned index migration (db_migrations.py)"""
+        return self.migration.get_status()
+    
+    # ==================== CACHE ====================
+    
+    def _cached_find_one(self, collection, kind: str, field: str, value: str,
+                         projection=None) -> Optional[Dict]:
+        """
+        find_one by a unique key, served from the cache when possible
+        
+        Full documents and named views are cached (per view); ad-hoc
+        projections always go to MongoDB
+        """
+        view = projection if isinstance(projection, str) else None
+        cacheable = self.cache is not None and (projection is None or view is not None)
+        doc_key = f"{kind}:{value}"
+        key = doc_key + (f":{view}" if view else "")
+        version = None
+        if cacheable:
+            document = self.cache.get(key)
+            if document is not None:
+                return document
+            # Taken before the query: a write invalidating doc_key meanwhile wins
+            version = self.cache.version(doc_key)
+        
+        document = collection.find_one({field: value}, self._projection(projection))
+        # Misses are not cached: a document may be created right after
+        if document is not None and version is not None:
+            self.cache.set(key, document, doc_key, version)
+        return document
+    
+    def _invalidate(self, kind: str, value: str):
+        """Drop a cached document (and its cached views) after writing it"""
+        if self.cache is not None:
+            doc_key = f"{kind}:{value}"
+            self.cache.invalidate(doc_key, [doc_key] + [
+                f"{doc_key}:{view}" for view, (view_kind, _) in self.VIEWS.items() if view_kind == kind
+            ])
+    
+    def get_cache_stats(self) -> Dict:
+        """Hit/miss counters of the read-through cache"""
+        if self.cache is None:
+            return {"backend": "none"}
+        return self.cache.get_stats()
     
     # ==================== ORDERS ====================
     
@@ -107,6 +208,7 @@ class Database:
             
             # Insert
             result = self.orders.insert_one(order_data)
+            self.rollups.record_order(order_data)
             
             print(f"✅ Order created: {order_data['order_id']}")
             return order_data['order_id']
@@ -115,77 +217,103 @@ class Database:
             print(f"❌ Error creating order: {e}")
             raise
     
-    def get_order(self, order_id: str) -> Optional[Dict]:
-        """Get order by ID"""
+    def get_order(self, order_id: str, projection=None) -> Optional[Dict]:
+        """
+        Get order by ID
+        
+        Args:
+            order_id: Order ID
+            projection: View name (e.g. 'order_status'), list of fields or
+                MongoDB projection dict (default: whole document)
+        """
         try:
-            order = self.orders.find_one({"order_id": order_id})
-            return order
+            return self._cached_find_one(self.orders, "order", "order_id", order_id, projection)
         except Exception as e:
             print(f"❌ Error fetching order: {e}")
             return None
     
-    def update_order_status(self, order_id: str, new_status: str, **kwargs) -> bool:
+    def transition_order_status(self, order_id: str, new_status: str,
+                                from_statuses: Optional[List[str]] = None,
+                                **kwargs) -> Optional[Dict]:
         """
-        Update order status
+        Move an order to `new_status` in one find_one_and_update
+        
+        The status precondition is part of the filter, so MongoDB itself
+        rejects illegal or duplicate transitions; the status_history entry
+        rides on the same update and the previous document comes back with it
         
         Args:
             order_id: Order ID
             new_status: New status
+            from_statuses: Required current statuses (default: allowed_previous)
             **kwargs: Additional fields to update
+        
+        Returns:
+            The order before the change, or None (missing / not allowed)
         """
         try:
-            update_data = {
-                "status": new_status,
-                "updated_at": datetime.now(),
-                f"{new_status.lower()}_at": datetime.now()
-            }
-            
-            # Add any additional fields
-            update_data.update(kwargs)
-            
-            result = self.orders.update_one(
-                {"order_id": order_id},
-                {"$set": update_data}
+            if from_statuses is None:
+                from_statuses = self.allowed_previous(new_status)
+            update_data, entry = self._status_update(new_status, kwargs)
+            
+            # Previous status/total also keep the analytics rollups in step
+            previous = self.orders.find_one_and_update(
+                {"order_id": order_id, "status": {"$in": list(from_statuses)}},
+                {"$set": update_data, "$push": {"status_history": entry}},
+                projection=self.TRANSITION_PROJECTION,
+                return_document=ReturnDocument.BEFORE
             )
             
-            if result.modified_count > 0:
-                print(f"✅ Order {order_id} status: {new_status}")
-                return True
-            return False
+            if previous is None:
+                print(f"⚠️ Order {order_id}: {new_status} rejected (missing or not from {from_statuses})")
+                return None
+            
+            self._invalidate("order", order_id)
+            self.rollups.record_status_change(previous, new_status)
+            print(f"✅ Order {order_id} status: {previous.get('status')} → {new_status}")
+            return previous
             
         except Exception as e:
+            # Not None: that means missing / rejected, and this is neither
             print(f"❌ Error updating order: {e}")
-            return False
+            raise
     
-    def get_customer_orders(self, customer_phone: str, limit: int = 10) -> List[Dict]:
-        """Get customer's order history"""
-        try:
-            orders = list(
-                self.orders.find({"customer_phone": customer_phone})
-                .sort("created_at", -1)
-                .limit(limit)
-            )
-            return orders
-        except Exception as e:
-            print(f"❌ Error fetching customer orders: {e}")
-            return []
+    def _order_page_cursor(self, query: Dict, page_size: int, page_token: Optional[str],
+                           projection=None):
+        """
+        Cursor over one keyset page (+1 look-ahead document) of orders matching `query`
+        
+        The redundant created_at <= bound keeps the index scan range-limited;
+        the $or then only trims ties on the boundary timestamp
+        """
+        if page_token:
+            created_at, order_id = decode_page_token(page_token)
+            query = {
+                **query,
+                "created_at": {"$lte": created_at},
+                "$or": [
+                    {"created_at": {"$lt": created_at}},
+                    {"order_id": {"$lt": order_id}}
+                ]
+            }
+        return (
+            self.orders.find(query, self._page_projection(projection))
+            .sort(self.ORDER_PAGE_SORT)
+            .limit(page_size + 1)
+        )
     
-    def get_active_orders(self) -> List[Dict]:
-        """Get all active orders (not delivered/cancelled)"""
+    def _iter_orders(self, query: Dict, batch_size: int, projection=None) -> Iterator[Dict]:
+        """Stream orders matching `query` newest first (batch_size per server round trip)"""
+        cursor = (
+            self.orders.find(query, self._projection(projection))
+            .sort(self.ORDER_PAGE_SORT)
+            .batch_size(batch_size)
+        )
         try:
-            active_statuses = [
-                "PENDING_PAYMENT", "PAID", "CONFIRMED",
-                "COOKING", "READY", "DISPATCHED"
-            ]
-            
-            orders = list(
-                self.orders.find({"status": {"$in": active_statuses}})
-                .sort("created_at", -1)
-            )
-            return orders
-        except Exception as e:
-            print(f"❌ Error fetching active orders: {e}")
-            return []
+            for order in cursor:
+                yield order
+        finally:
+            cursor.close()
     
     # ==================== CUSTOMERS ====================
     
@@ -201,6 +329,7 @@ class Database:
                 {"$set": customer_data},
                 upsert=True
             )
+            self._invalidate("customer", customer_data['phone'])
             
             print(f"✅ Customer profile updated: {customer_data['phone']}")
             return customer_data['phone']
@@ -209,11 +338,10 @@ class Database:
             print(f"❌ Error creating customer: {e}")
             raise
     
-    def get_customer(self, phone: str) -> Optional[Dict]:
-        """Get customer by phone"""
+    def get_customer(self, phone: str, projection=None) -> Optional[Dict]:
+        """Get customer by phone (projection: list of fields or MongoDB projection dict)"""
         try:
-            customer = self.customers.find_one({"phone": phone})
-            return customer
+            return self._cached_find_one(self.customers, "customer", "phone", phone, projection)
         except Exception as e:
             print(f"❌ Error fetching customer: {e}")
             return None
@@ -230,6 +358,7 @@ class Database:
                     }
                 }
             )
+            self._invalidate("customer", phone)
             return result.modified_count > 0
         except Exception as e:
             print(f"❌ Error updating preferences: {e}")
@@ -264,6 +393,7 @@ class Database:
                 {"payment_id": payment_id},
                 {"$set": update_data}
             )
+            self._invalidate("payment", payment_id)
             
             return result.modified_count > 0
             
@@ -271,87 +401,124 @@ class Database:
             print(f"❌ Error updating payment: {e}")
             return False
     
-    def get_payment(self, payment_id: str) -> Optional[Dict]:
-        """Get payment by ID"""
+    def get_payment(self, payment_id: str, projection=None) -> Optional[Dict]:
+        """
+        Get payment by ID
+        
+        Args:
+            payment_id: Payment ID
+            projection: 'payment_status', list of fields or MongoDB projection
+                dict (default: whole document incl. gateway data)
+        """
         try:
-            payment = self.payments.find_one({"payment_id": payment_id})
-            return payment
+            return self._cached_find_one(self.payments, "payment", "payment_id", payment_id, projection)
         except Exception as e:
             print(f"❌ Error fetching payment: {e}")
             return None
     
     # ==================== ANALYTICS ====================
     
-    def log_event(self, event_type: str, event_data: Dict):
-        """Log analytics event"""
-        try:
-            event = {
-                "event_type": event_type,
-                "data": event_data,
-                "timestamp": datetime.now()
-            }
-            
-            self.analytics.insert_one(event)
-        except Exception as e:
-            print(f"⚠️ Analytics logging failed: {e}")
+    def _insert_events(self, events: List[Dict]):
+        """Unbuffered analytics path: write straight to the analytics collection"""
+        if len(events) == 1:
+            self.analytics.insert_one(events[0])
+        else:
+            self.analytics.insert_many(events, ordered=False)
     
     def get_analytics(self, days: int = 7) -> Dict:
-        """Get analytics summary"""
+        """
+        Get analytics summary
+        
+        Reads the hourly/daily rollups (O(days) small documents) unless
+        ANALYTICS_ROLLUPS is off; unique_customers is then an estimate (~3%).
+        Windows reaching back before the rollups' coverage (history from
+        before they existed and was never backfilled) use the order scan
+        """
+        if config.ANALYTICS_ROLLUPS:
+            try:
+                if self.rollups.covers(days):
+                    return self.rollups.summary(days)
+            except Exception as e:
+                print(f"❌ Error fetching analytics rollups: {e}")
+                return {}
+        return self._scan_analytics(days)
+    
+    def _analytics_pipeline(self, start_date: datetime) -> List[Dict]:
+        """$facet pipeline behind _scan_analytics (orders created since start_date)"""
+        return [
+            {"$match": {"created_at": {"$gte": start_date}}},
+            {"$project": {
+                "status": 1, "total": 1, "customer_phone": 1,
+                "items.name": 1, "items.qty": 1
+            }},
+            {"$facet": {
+                "orders": [{"$count": "n"}],
+                "revenue": [
+                    {"$match": {"status": {"$in": sorted(REVENUE_STATUSES)}}},
+                    {"$group": {"_id": None, "total": {"$sum": "$total"}}}
+                ],
+                "customers": [
+                    {"$match": {"customer_phone": {"$ne": None}}},
+                    {"$group": {"_id": "$customer_phone"}},
+                    {"$count": "n"}
+                ],
+                "items": [
+                    {"$unwind": "$items"},
+                    {"$group": {
+                        "_id": "$items.name",
+                        "count": {"$sum": "$items.qty"}
+                    }},
+                    {"$sort": {"count": -1}},
+                    {"$limit": 10}
+                ]
+            }}
+        ]
+    
+    def _scan_analytics(self, days: int = 7, allow_disk_use: bool = None,
+                        max_time_ms: int = None) -> Dict:
+        """
+        Analytics summary computed from the orders collection
+        
+        One $facet aggregation: count, revenue, unique customers and popular
+        items from a single pass over the window (one round trip)
+        
+        Args:
+            days: Window size
+            allow_disk_use: Let the server spill large groups to disk
+            max_time_ms: Server-side time limit (0 = none)
+        """
         try:
             from datetime import timedelta
             
             start_date = datetime.now() - timedelta(days=days)
+            if allow_disk_use is None:
+                allow_disk_use = config.ANALYTICS_ALLOW_DISK_USE
+            if max_time_ms is None:
+                max_time_ms = config.ANALYTICS_MAX_TIME_MS
             
-            # Total orders
-            total_orders = self.orders.count_documents({
-                "created_at": {"$gte": start_date}
-            })
+            pipeline = self._analytics_pipeline(start_date)
             
-            # Total revenue
-            revenue_pipeline = [
-                {"$match": {
-                    "status": {"$in": ["PAID", "CONFIRMED", "COOKING", "READY", "DISPATCHED", "DELIVERED"]},
-                    "created_at": {"$gte": start_date}
-                }},
-                {"$group": {
-                    "_id": None,
-                    "total": {"$sum": "$total"}
-                }}
-            ]
+            options = {"allowDiskUse": allow_disk_use}
+            if max_time_ms:
+                options["maxTimeMS"] = max_time_ms
+            facets = next(self.orders.aggregate(pipeline, **options))
             
-            revenue_result = list(self.orders.aggregate(revenue_pipeline))
-            total_revenue = revenue_result[0]['total'] if revenue_result else 0
-            
-            # Unique customers
-            unique_customers = len(
-                self.orders.distinct("customer_phone", {
-                    "created_at": {"$gte": start_date}
-                })
-            )
-            
-            # Popular items
-            items_pipeline = [
-                {"$match": {"created_at": {"$gte": start_date}}},
-                {"$unwind": "$items"},
-                {"$group": {
-                    "_id": "$items.name",
-                    "count": {"$sum": "$items.qty"}
-                }},
-                {"$sort": {"count": -1}},
-                {"$limit": 10}
-            ]
-            
-            popular_items = list(self.orders.aggregate(items_pipeline))
+            total_orders = facets["orders"][0]["n"] if facets["orders"] else 0
+            total_revenue = facets["revenue"][0]["total"] if facets["revenue"] else 0
+            unique_customers = facets["customers"][0]["n"] if facets["customers"] else 0
             
             return {
                 "period_days": days,
                 "total_orders": total_orders,
                 "total_revenue": total_revenue,
                 "unique_customers": unique_customers,
-                "popular_items": popular_items,
+                "popular_items": facets["items"],
                 "avg_order_value": total_revenue / total_orders if total_orders > 0 else 0
             }
             
+        except ExecutionTimeout:
+            print(f"❌ Analytics query exceeded {max_time_ms} ms")
+            return {}
         except Exception as e:
             print(f"❌ Error fetching analytics: {e}")
             return {}
@@ -367,23 +534,45 @@ class Database:
             return False
     
     def close(self):
-        """Close database connection"""
+        """Flush queued analytics events and close database connection"""
         try:
+            super().close()
+            # Let an in-flight index build finish its current command
+            self.migration.wait(timeout=5)
             self.client.close()
             print("✅ MongoDB connection closed")
         except Exception as e:
             print(f"⚠️ Error closing connection: {e}")
 
 
+def create_database(backend: str = None) -> StorageBackend:
+    """
+    Storage backend named by `backend` (default: config.DATABASE_BACKEND)
+    
+    Args:
+        backend: 'mongo', 'sqlite' or 'memory'
+    """
+    backend = (backend or config.DATABASE_BACKEND).lower()
+    if backend in ("mongo", "mongodb"):
+        return Database()
+    if backend == "sqlite":
+        from sqlite_storage import SQLiteStorage
+        return SQLiteStorage(config.SQLITE_PATH)
+    if backend == "memory":
+        from memory_storage import InMemoryStorage
+        return InMemoryStorage()
+    raise ValueError(f"Unknown database backend: {backend} (use 'mongo', 'sqlite' or 'memory')")
+
+
 # Singleton instance
 _db_instance = None
 
-def get_database() -> Database:
-    """Get database instance (singleton pattern)"""
+def get_database() -> StorageBackend:
+    """Get database instance (singleton pattern; backend from DATABASE_BACKEND)"""
     global _db_instance
     
     if _db_instance is None:
-        _db_instance = Database()
+        _db_instance = create_database()
     
     return _db_instance
 
@@ -0,0 +1,298 @@
+"""
+Read-Through Document Cache
+Point lookups (get_order / get_payment / get_customer) are polled every few
+seconds by customers and the kitchen screen. Database keeps recent
+documents here and drops them whenever it writes the same document.
+
+Backends:
+- MemoryCache: bounded TTL + LRU dict inside one process. Writes made by
+  other worker processes are only seen after the TTL, so only use it when
+  a single process serves the data (DB_CACHE_BACKEND defaults to 'none').
+- RedisCache: shared by every worker (pip install redis), so an
+  invalidation in one process is seen by all of them.
+
+Reads racing writes: a reader takes version(doc_key) before querying
+MongoDB and passes it to set(); invalidate() bumps the version, so a
+document fetched before a write is never stored after that write's
+invalidation.
+
+Both hand out copies: callers may mutate what they get (e.g. pop '_id'
+before jsonify) without corrupting the cache.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+class MemoryCache:
+    """Thread-safe TTL + LRU cache of documents"""
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 5.0):
+        """
+        Args:
+            max_entries: Least recently used documents are evicted beyond this
+            ttl_seconds: Max age of a cached document
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Invalidation clock: doc_key → clock value of its last invalidation
+        self._clock = 0
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+        self._floor = 0  # Newest clock value forgotten from _invalidated
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_writes = 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, document = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(document)
+
+    def version(self, doc_key: str) -> int:
+        """Token to pass to set() for a document about to be read from MongoDB"""
+        with self._lock:
+            return self._clock
+
+    def set(self, key: str, document: Dict, doc_key: str = None, version: int = None):
+        """Store a document; with doc_key/version, only if doc_key was not invalidated since version()"""
+        document = copy.deepcopy(document)
+        with self._lock:
+            if doc_key is not None and self._invalidated.get(doc_key, self._floor) > version:
+                self.stale_writes += 1
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, document)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def invalidate(self, doc_key: str, keys: List[str]):
+        """Drop `keys` (a document and its views) and reject in-flight reads of doc_key"""
+        with self._lock:
+            self._clock += 1
+            self._invalidated[doc_key] = self._clock
+            self._invalidated.move_to_end(doc_key)
+            while len(self._invalidated) > self.max_entries:
+                _, forgotten = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, forgotten)
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": self.backend,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "stale_writes": self.stale_writes,
+            }
+
+
+class RedisCache:
+    """Documents shared across worker processes in Redis (BSON-encoded, with TTL)"""
+
+    backend = "redis"
+
+    # SET only if the document's version key still holds the reader's token
+    _SET_IF_VERSION = """
+    if (redis.call('GET', KEYS[1]) or '') == ARGV[1] then
+        redis.call('SET', KEYS[2], ARGV[2], 'PX', ARGV[3])
+        return 1
+    end
+    return 0
+    """
+
+    def __init__(self, url: str = "redis://localhost:6379/0", ttl_seconds: float = 5.0,
+                 prefix: str = "restaurant:doc:", version_ttl_seconds: float = 3600):
+        try:
+            import redis
+        except ImportError:
+            raise Exception("Please install: pip install redis")
+        import bson
+
+        self._bson = bson
+        self.client = redis.Redis.from_url(url)
+        self.ttl_ms = max(1, int(ttl_seconds * 1000))
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        # Must outlive any in-flight read
+        self.version_ttl_ms = int(version_ttl_seconds * 1000)
+        self._set_if_version = self.client.register_script(self._SET_IF_VERSION)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.invalidations = 0
+        self.stale_writes = 0
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key: str) -> Optional[Dict]:
+        try:
+            raw = self.client.get(self.prefix + key)
+        except Exception:
+            # Cache outage: fall through to MongoDB
+            self._count("errors")
+            return None
+        if raw is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return self._bson.decode(raw)
+
+    def version(self, doc_key: str) -> Optional[str]:
+        """Token to pass to set() (None during an outage: do not cache)"""
+        try:
+            raw = self.client.get(self.prefix + "v:" + doc_key)
+        except Exception:
+            self._count("errors")
+            return None
+        return raw.decode() if raw is not None else ""
+
+    def set(self, key: str, document: Dict, doc_key: str = None, version: str = None):
+        """Store a document; with doc_key/version, only if doc_key was not invalidated since version()"""
+        try:
+            encoded = self._bson.encode(document)
+            if doc_key is None:
+                self.client.set(self.prefix + key, encoded, px=self.ttl_ms)
+            elif not self._set_if_version(keys=[self.prefix + "v:" + doc_key, self.prefix + key],
+                                          args=[version, encoded, self.ttl_ms]):
+                self._count("stale_writes")
+        except Exception:
+            self._count("errors")
+
+    def delete(self, key: str):
+        try:
+            self.client.delete(self.prefix + key)
+            self._count("invalidations")
+        except Exception:
+            self._count("errors")
+
+    def invalidate(self, doc_key: str, keys: List[str]):
+        """Drop `keys` (a document and its views) and reject in-flight reads of doc_key"""
+        try:
+            pipe = self.client.pipeline()
+            version_key = self.prefix + "v:" + doc_key
+            pipe.incr(version_key)
+            pipe.pexpire(version_key, self.version_ttl_ms)
+            pipe.delete(*[self.prefix + key for key in keys])
+            pipe.execute()
+            self._count("invalidations")
+        except Exception:
+            self._count("errors")
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            if not key.decode().startswith(self.prefix + "v:"):
+                self.client.delete(key)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": self.backend,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "invalidations": self.invalidations,
+                "stale_writes": self.stale_writes,
+                "errors": self.errors,
+            }
+
+
+def create_cache(backend: str, max_entries: int = 10000, ttl_seconds: float = 5.0,
+                 redis_url: str = None):
+    """
+    Args:
+        backend: 'memory', 'redis' or 'none'
+
+    Returns:
+        Cache object, or None when caching is off
+    """
+    if backend in ("", "none", "off"):
+        return None
+    if backend == "memory":
+        return MemoryCache(max_entries, ttl_seconds)
+    if backend == "redis":
+        return RedisCache(redis_url or "redis://localhost:6379/0", ttl_seconds)
+    raise ValueError(f"Unknown cache backend: {backend} (use 'memory', 'redis' or 'none')")
+
+
+# Example usage
+if __name__ == "__main__":
+    print("🧪 Testing DB Cache...\n")
+
+    cache = MemoryCache(max_entries=2, ttl_seconds=0.2)
+    cache.set("order:A", {"order_id": "A", "items": [{"name": "Tea", "qty": 1}]})
+
+    order = cache.get("order:A")
+    order["items"].append({"name": "Naan", "qty": 2})
+    assert len(cache.get("order:A")["items"]) == 1
+    print("✅ Returns copies")
+
+    cache.set("order:B", {"order_id": "B"})
+    cache.get("order:A")
+    cache.set("order:C", {"order_id": "C"})
+    assert cache.get("order:B") is None and cache.get("order:A") is not None
+    print("✅ LRU eviction")
+
+    cache.delete("order:A")
+    assert cache.get("order:A") is None
+
+    # A read that started before an invalidation must not store its result
+    version = cache.version("order:A")
+    cache.invalidate("order:A", ["order:A", "order:A:order_status"])
+    cache.set("order:A", {"order_id": "A", "status": "PENDING_PAYMENT"}, "order:A", version)
+    assert cache.get("order:A") is None and cache.stale_writes == 1
+    cache.set("order:A", {"order_id": "A", "status": "PAID"}, "order:A", cache.version("order:A"))
+    assert cache.get("order:A")["status"] == "PAID"
+    print("✅ Stale read after invalidation not cached")
+    time.sleep(0.25)
+    assert cache.get("order:C") is None
+    print("✅ Invalidation and TTL expiry")
+
+    print(f"📊 {cache.get_stats()}")
+    print("\n✅ All tests passed!")
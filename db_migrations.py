@@ -0,0 +1,251 @@
+"""
+Versioned Index Migrations
+Database used to ping the server and issue one create_index per declared
+index every time it was constructed - in every worker, Streamlit session
+and test run. Index creation is now a migration step:
+
+- The applied schema (version + fingerprint of the index spec) is recorded
+  in the `_meta` collection; a process whose spec matches does nothing
+  beyond one find_one
+- It runs in a background thread by default, so the app serves requests
+  straight away (queries work without indexes, just slower)
+- A lease in the same metadata document stops every worker from building
+  the same indexes at once after a deploy
+
+Bump Database.SCHEMA_VERSION when changing INDEXES on purpose; the
+fingerprint also catches a spec edited without a bump. Indexes removed
+from the spec are not dropped here (index_advisor.py --check-database
+lists them).
+
+Usage:
+    python db_migrations.py            # apply now against MONGODB_URI
+    python db_migrations.py --status   # show the recorded version
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+META_COLLECTION = "_meta"
+INDEXES_KEY = "indexes"
+
+CURRENT = "current"      # recorded version matches, nothing to do
+APPLIED = "applied"      # indexes built by this process
+BUSY = "busy"            # another process holds the lease and is building them
+FAILED = "failed"
+PENDING = "pending"
+RUNNING = "running"
+
+
+def spec_fingerprint(indexes: Dict[str, List[Dict]]) -> str:
+    """Stable hash of the keys / options of an index spec (used_by is documentation)"""
+    normalized = {
+        collection: sorted(
+            json.dumps({"keys": [list(key) for key in spec["keys"]], "unique": spec.get("unique", False)})
+            for spec in specs
+        )
+        for collection, specs in indexes.items()
+    }
+    return hashlib.sha1(json.dumps(normalized, sort_keys=True).encode()).hexdigest()[:16]
+
+
+class IndexMigration:
+    """
+    Apply an index spec once per schema version
+
+    Usage:
+        migration = IndexMigration(db, Database.INDEXES, version=2)
+        migration.start()          # background thread
+        migration.wait(timeout=30) # e.g. before explain() in index_advisor
+    """
+
+    def __init__(self,
+                 db,
+                 indexes: Dict[str, List[Dict]],
+                 version: int,
+                 hooks: Optional[List[Callable[[], None]]] = None,
+                 lease_seconds: float = 300.0):
+        """
+        Args:
+            db: pymongo Database
+            indexes: Collection → [{"keys": [...], "unique": bool}, ...]
+            version: Schema version this code expects
+            hooks: Extra index builders run in the same step (e.g. rollups)
+            lease_seconds: How long a migrating process blocks the others
+        """
+        self.db = db
+        self.meta = db[META_COLLECTION]
+        self.indexes = indexes
+        self.version = version
+        self.fingerprint = spec_fingerprint(indexes)
+        self.hooks = hooks or []
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+
+        self.state = PENDING
+        self.error: Optional[str] = None
+        self.duration_ms: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._done = threading.Event()
+
+    def recorded(self) -> Optional[Dict]:
+        """Metadata document of the last applied migration (None if never run)"""
+        return self.meta.find_one({"_id": INDEXES_KEY})
+
+    def is_current(self, recorded: Optional[Dict] = None) -> bool:
+        recorded = recorded if recorded is not None else self.recorded()
+        return (recorded is not None
+                and recorded.get("version") == self.version
+                and recorded.get("fingerprint") == self.fingerprint)
+
+    def _claim(self) -> bool:
+        """Take the migration lease (False while another process holds it)"""
+        now = datetime.now()
+        try:
+            self.meta.update_one(
+                {"_id": INDEXES_KEY, "$or": [
+                    {"lease_until": None},
+                    {"lease_until": {"$lt": now}}
+                ]},
+                {"$set": {"lease_until": now + timedelta(seconds=self.lease_seconds),
+                          "lease_owner": self.owner}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            # The document exists and its lease is still live
+            return False
+
+    def _release(self, applied: Dict = None):
+        update = {"$unset": {"lease_until": "", "lease_owner": ""}}
+        if applied:
+            update["$set"] = applied
+        self.meta.update_one({"_id": INDEXES_KEY, "lease_owner": self.owner}, update)
+
+    def run(self) -> str:
+        """Apply the spec if the recorded version differs; returns the resulting state"""
+        self.state = RUNNING
+        start = time.perf_counter()
+        try:
+            if self.is_current():
+                self.state = CURRENT
+                return self.state
+            if not self._claim():
+                self.state = BUSY
+                print("⏳ Index migration running in another process")
+                return self.state
+            try:
+                if self.is_current():
+                    self.state = CURRENT
+                    self._release()
+                    return self.state
+                created = 0
+                for collection, specs in self.indexes.items():
+                    for spec in specs:
+                        self.db[collection].create_index(spec["keys"], unique=spec.get("unique", False))
+                        created += 1
+                for hook in self.hooks:
+                    hook()
+                self.duration_ms = (time.perf_counter() - start) * 1000
+                self._release({
+                    "version": self.version,
+                    "fingerprint": self.fingerprint,
+                    "indexes": created,
+                    "applied_at": datetime.now(),
+                    "applied_by": self.owner,
+                    "duration_ms": round(self.duration_ms, 1),
+                })
+            except Exception:
+                self._release()
+                raise
+            self.state = APPLIED
+            print(f"✅ Database indexes migrated to v{self.version} ({self.duration_ms:.0f} ms)")
+            return self.state
+        except Exception as e:
+            self.state = FAILED
+            self.error = str(e)
+            print(f"⚠️ Index migration failed: {e}")
+            return self.state
+        finally:
+            if self.duration_ms is None:
+                self.duration_ms = (time.perf_counter() - start) * 1000
+            self._done.set()
+
+    def start(self):
+        """Run in a daemon thread (returns immediately)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="index-migration", daemon=True)
+            self._thread.start()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until the migration finished (True) or `timeout` passed (False)"""
+        if self._thread is None and not self._done.is_set():
+            return False
+        return self._done.wait(timeout)
+
+    def ensure(self, timeout: float = 60.0) -> bool:
+        """
+        Block until the recorded schema matches this code
+        
+        Runs the migration here if nobody started it, and keeps retrying
+        while another process holds the lease (taking over once it expires)
+        
+        Returns:
+            False on failure or after `timeout` seconds
+        """
+        deadline = time.monotonic() + timeout
+        if self._thread is None and not self._done.is_set():
+            self.run()
+        if not self._done.wait(timeout):
+            return False
+        while self.state == BUSY and time.monotonic() < deadline:
+            time.sleep(0.5)
+            self.run()
+        return self.state in (CURRENT, APPLIED)
+
+    def get_status(self) -> Dict:
+        return {
+            "state": self.state,
+            "version": self.version,
+            "fingerprint": self.fingerprint,
+            "duration_ms": self.duration_ms,
+            "error": self.error,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply or inspect the Database index migration")
+    parser.add_argument("--uri", help="MongoDB URI (default: MONGODB_URI)")
+    parser.add_argument("--database", help="Database (default: config.DATABASE_NAME)")
+    parser.add_argument("--status", action="store_true", help="Only show the recorded version")
+    args = parser.parse_args()
+
+    from database import Database
+
+    db = Database(args.uri, database_name=args.database, index_migrations="off")
+    try:
+        migration = db.migration
+        recorded = migration.recorded()
+        print(f"📋 Code: v{migration.version} ({migration.fingerprint})")
+        if recorded:
+            print(f"📋 Applied: v{recorded.get('version')} ({recorded.get('fingerprint')}) "
+                  f"at {recorded.get('applied_at')} by {recorded.get('applied_by')}")
+        else:
+            print("📋 Applied: never")
+        if not args.status:
+            print(f"📊 {migration.run()}")
+    finally:
+        db.close()
+
+
+# Example usage
+if __name__ == "__main__":
+    main()
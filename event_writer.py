@@ -0,0 +1,271 @@
+"""
+Write-Behind Analytics Event Writer
+Database.log_event used to pay one synchronous insert_one per event on the
+request path. Events now go into a bounded in-memory queue that a
+background thread drains with insert_many once `batch_size` events are
+waiting or `flush_interval` seconds have passed.
+
+- Full queue: 'drop' (default, never slows a request) or 'block' (wait up
+  to block_timeout for room, then drop)
+- flush() / close() write everything queued so far (close runs at exit)
+- get_stats(): queue depth, written / dropped / failed counts; flush
+  latency goes to the instrumentation registry as 'db.analytics_flush'
+"""
+
+import atexit
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from instrumentation import METRICS, Histogram, Instrumentation
+
+DROP = "drop"
+BLOCK = "block"
+
+
+class BufferedEventWriter:
+    """
+    Bounded queue + background insert_many writer for one collection
+
+    Usage:
+        writer = BufferedEventWriter(db.analytics)
+        writer.put({"event_type": "order_created", ...})  # returns immediately
+        writer.flush()   # wait until everything queued is written
+        writer.close()   # flush and stop the thread
+    """
+
+    FLUSH_SPAN = "db.analytics_flush"
+
+    def __init__(self,
+                 collection,
+                 max_queue: int = 10000,
+                 batch_size: int = 500,
+                 flush_interval: float = 1.0,
+                 full_policy: str = DROP,
+                 block_timeout: float = 0.5,
+                 metrics: Optional[Instrumentation] = None):
+        """
+        Args:
+            collection: pymongo collection (anything with insert_many)
+            max_queue: Events held in memory before the full policy applies
+            batch_size: Flush as soon as this many events are waiting
+            flush_interval: Max seconds an event waits before being written
+            full_policy: 'drop' or 'block' when the queue is full
+            block_timeout: Max seconds put() blocks under the 'block' policy
+            metrics: Flush latency registry (default: the process-wide METRICS)
+        """
+        if full_policy not in (DROP, BLOCK):
+            raise ValueError(f"full_policy must be '{DROP}' or '{BLOCK}'")
+        self.collection = collection
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.full_policy = full_policy
+        self.block_timeout = block_timeout
+        self.metrics = metrics if metrics is not None else METRICS
+
+        self._queue: deque = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._processed_cond = threading.Condition(self._lock)
+        self._flush_requested = False
+        self._closed = False
+
+        self.enqueued = 0
+        self.processed = 0   # written + failed
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.max_depth = 0
+        self._flush_latency = Histogram()
+
+        self._thread = threading.Thread(target=self._run, name="analytics-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, event: Dict) -> bool:
+        """
+        Queue one event
+
+        Returns:
+            False if the event was dropped (queue full or writer closed)
+        """
+        with self._lock:
+            if self._closed:
+                self.dropped += 1
+                return False
+            if len(self._queue) >= self.max_queue:
+                if self.full_policy == BLOCK:
+                    self._not_full.wait_for(
+                        lambda: len(self._queue) < self.max_queue or self._closed,
+                        timeout=self.block_timeout
+                    )
+                if len(self._queue) >= self.max_queue or self._closed:
+                    self.dropped += 1
+                    return False
+            self._queue.append(event)
+            self.enqueued += 1
+            depth = len(self._queue)
+            if depth > self.max_depth:
+                self.max_depth = depth
+            if depth >= self.batch_size:
+                self._not_empty.notify()
+            return True
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """
+        Write everything queued before this call
+
+        Returns:
+            False if it did not finish within `timeout` seconds
+        """
+        with self._lock:
+            target = self.enqueued
+            self._flush_requested = True
+            self._not_empty.notify()
+            return self._processed_cond.wait_for(lambda: self.processed >= target, timeout=timeout)
+
+    def close(self, timeout: float = 10.0):
+        """Flush and stop the writer thread (idempotent, also runs at exit)"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._not_empty.notify()
+            self._not_full.notify_all()
+        self._thread.join(timeout)
+        atexit.unregister(self.close)
+
+    def get_stats(self) -> Dict:
+        """Queue depth, throughput counters and flush latency"""
+        with self._lock:
+            return {
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self.max_depth,
+                "max_queue": self.max_queue,
+                "full_policy": self.full_policy,
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "flushes": self.flushes,
+                "flush_latency": self._flush_latency.summary(),
+            }
+
+    # ==================== WORKER ====================
+
+    def _run(self):
+        while True:
+            with self._lock:
+                deadline = time.monotonic() + self.flush_interval
+                while (len(self._queue) < self.batch_size and not self._flush_requested
+                       and not self._closed):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._not_empty.wait(remaining)
+                drain = self._flush_requested or self._closed
+                self._flush_requested = False
+                closing = self._closed
+
+            # An explicit flush / close drains the whole queue, batch by batch
+            while True:
+                batch = self._take_batch()
+                if batch:
+                    self._write(batch)
+                if not drain or not batch:
+                    break
+
+            if closing:
+                with self._lock:
+                    if not self._queue:
+                        return
+
+    def _take_batch(self) -> List[Dict]:
+        with self._lock:
+            count = min(len(self._queue), self.batch_size)
+            batch = [self._queue.popleft() for _ in range(count)]
+            if batch:
+                self._not_full.notify_all()
+            return batch
+
+    def _write(self, batch: List[Dict]):
+        start = time.perf_counter_ns()
+        try:
+            self.collection.insert_many(batch, ordered=False)
+            failed = 0
+        except Exception as e:
+            # Best effort, like the old insert_one path: report and move on
+            print(f"⚠️ Analytics logging failed ({len(batch)} events): {e}")
+            failed = len(batch)
+        elapsed_ms = (time.perf_counter_ns() - start) / 1e6
+        self.metrics.record(self.FLUSH_SPAN, elapsed_ms)
+
+        with self._lock:
+            self._flush_latency.record(elapsed_ms)
+            self.flushes += 1
+            self.failed += failed
+            self.written += len(batch) - failed
+            self.processed += len(batch)
+            self._processed_cond.notify_all()
+
+
+# Example usage
+if __name__ == "__main__":
+    print("🧪 Testing Event Writer...\n")
+
+    class FakeCollection:
+        """insert_many sink with a fixed round-trip delay"""
+
+        def __init__(self, delay: float = 0.002):
+            self.delay = delay
+            self.docs = []
+            self.calls = 0
+
+        def insert_many(self, docs, ordered=True):
+            time.sleep(self.delay)
+            self.calls += 1
+            self.docs.extend(docs)
+
+    sink = FakeCollection()
+    writer = BufferedEventWriter(sink, batch_size=100, flush_interval=0.05,
+                                 metrics=Instrumentation())
+    start = time.perf_counter()
+    for i in range(1000):
+        writer.put({"event_type": "test", "data": {"i": i}})
+    put_ms = (time.perf_counter() - start) * 1000
+    assert writer.flush()
+    assert len(sink.docs) == 1000 and sink.calls <= 20, (len(sink.docs), sink.calls)
+    print(f"✅ 1000 events in {put_ms:.1f} ms of put() time, {sink.calls} insert_many calls")
+
+    # Time threshold: a lone event is written without an explicit flush
+    writer.put({"event_type": "lonely"})
+    time.sleep(0.2)
+    assert sink.docs[-1]["event_type"] == "lonely"
+    print("✅ Time-based flush")
+
+    # Drop policy when the queue is full
+    slow = FakeCollection(delay=0.2)
+    small = BufferedEventWriter(slow, max_queue=10, batch_size=10, flush_interval=10,
+                                metrics=Instrumentation())
+    accepted = sum(small.put({"i": i}) for i in range(50))
+    assert small.get_stats()["dropped"] == 50 - accepted > 0
+    small.close()
+    assert len(slow.docs) == accepted
+    print(f"✅ Drop policy: {accepted} accepted, {50 - accepted} dropped, rest written on close")
+
+    # Block policy waits for room instead
+    blocking = BufferedEventWriter(FakeCollection(delay=0.01), max_queue=10, batch_size=10,
+                                   flush_interval=10, full_policy=BLOCK, block_timeout=1.0,
+                                   metrics=Instrumentation())
+    assert all(blocking.put({"i": i}) for i in range(50))
+    blocking.close()
+    assert blocking.get_stats()["written"] == 50
+    print("✅ Block policy: nothing dropped")
+
+    writer.close()
+    print(f"📊 {writer.get_stats()}")
+    print("\n✅ All tests passed!")
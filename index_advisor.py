@@ -0,0 +1,185 @@
+"""
+Index Advisor
+Runs explain() for every hot Database query method against a local test
+database (seeded with sample orders, indexed from Database.INDEXES) and
+fails if any of them plans a COLLSCAN or an in-memory SORT.
+
+Also lists indexes present in the target database that the spec does not
+declare (e.g. the old single-field customer_phone / status / created_at
+indexes, now prefixes of compound ones) so they can be dropped.
+
+Usage:
+    python index_advisor.py                     # local MongoDB, scratch database
+    python index_advisor.py --uri mongodb://... --keep
+    python index_advisor.py --check-database restaurant_commerce   # also list extra indexes there
+"""
+
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+from database import Database, encode_page_token
+
+# Plan stages that mean the query reads the whole collection or sorts in memory
+BAD_STAGES = {"COLLSCAN": "collection scan", "SORT": "in-memory sort"}
+
+
+def plan_stages(plan) -> List[str]:
+    """Every stage name in an explain() plan tree (classic and SBE layouts)"""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for key in ("inputStage", "queryPlan", "winningPlan", "outerStage", "innerStage"):
+            if key in plan:
+                stages.extend(plan_stages(plan[key]))
+        for child in plan.get("inputStages", []):
+            stages.extend(plan_stages(child))
+    return stages
+
+
+def winning_plans(explain: Dict) -> List[Dict]:
+    """Winning plans of a find or aggregate explain() result"""
+    if "queryPlanner" in explain:
+        return [explain["queryPlanner"]["winningPlan"]]
+    plans = []
+    for stage in explain.get("stages", []):
+        cursor = stage.get("$cursor")
+        if cursor and "queryPlanner" in cursor:
+            plans.append(cursor["queryPlanner"]["winningPlan"])
+    for shard in explain.get("shards", {}).values():
+        plans.extend(winning_plans(shard))
+    return plans
+
+
+def query_shapes(db) -> List[Tuple[str, Callable[[], Dict]]]:
+    """(method, explain thunk) for every hot query the Database issues"""
+    now = datetime.now()
+    first_page = db.orders.find({"status": {"$in": db.ACTIVE_STATUSES}}).sort(db.ORDER_PAGE_SORT).limit(1)
+    last = next(iter(first_page), None) or {"created_at": now, "order_id": "ORD"}
+    token = encode_page_token(last)
+    phone = "+923000000001"
+    active = {"status": {"$in": db.ACTIVE_STATUSES}}
+
+    def explain_find(collection, query, limit=1):
+        return lambda: collection.find(query).limit(limit).explain()
+
+    def explain_aggregate(collection, pipeline):
+        return lambda: db.db.command("explain", {"aggregate": collection.name, "pipeline": pipeline,
+                                                 "cursor": {}}, verbosity="queryPlanner")
+
+    return [
+        ("get_order", explain_find(db.orders, {"order_id": "ORD-0001"})),
+        ("transition_order_status", explain_find(
+            db.orders, {"order_id": "ORD-0001", "status": {"$in": db.allowed_previous("COOKING")}})),
+        ("get_payment", explain_find(db.payments, {"payment_id": "PAY-0001"})),
+        ("get_customer", explain_find(db.customers, {"phone": phone})),
+        ("get_customer_orders_page (first)",
+         lambda: db._order_page_cursor({"customer_phone": phone}, 10, None).explain()),
+        ("get_customer_orders_page (next)",
+         lambda: db._order_page_cursor({"customer_phone": phone}, 10, token).explain()),
+        ("get_active_orders_page (first)", lambda: db._order_page_cursor(active, 100, None).explain()),
+        ("get_active_orders_page (next)", lambda: db._order_page_cursor(active, 100, token).explain()),
+        ("iter_active_orders",
+         lambda: db.orders.find(active).sort(db.ORDER_PAGE_SORT).explain()),
+        ("_scan_analytics", explain_aggregate(db.orders, db._analytics_pipeline(now - timedelta(days=7)))),
+        ("analytics_rollups.summary", lambda: db.rollups.collection.find(
+            db.rollups._window_query(now - timedelta(days=7), now + timedelta(hours=1))
+        ).explain()),
+    ]
+
+
+def seed(db, orders: int = 2000):
+    """Sample orders / payments / customers so the planner has real choices"""
+    rng = random.Random(1)
+    now = datetime.now()
+    statuses = ["PENDING_PAYMENT", "PAID", "COOKING", "READY", "DISPATCHED", "DELIVERED", "CANCELLED"]
+    docs = []
+    for i in range(orders):
+        created_at = now - timedelta(minutes=rng.randrange(60 * 24 * 60))
+        docs.append({
+            "order_id": f"ORD-{i:04d}",
+            "customer_phone": f"+92300{rng.randrange(300):07d}",
+            "items": [{"name": "Chicken Biryani", "qty": 1, "price": 650}],
+            "total": 650,
+            "status": rng.choice(statuses),
+            "created_at": created_at,
+            "updated_at": created_at,
+        })
+    db.orders.insert_many(docs)
+    db.payments.insert_many([{"payment_id": f"PAY-{i:04d}", "order_id": f"ORD-{i:04d}"}
+                             for i in range(orders)])
+    db.customers.insert_many([{"phone": f"+92300{i:07d}", "customer_id": f"C{i}"} for i in range(300)])
+    for order in docs[:500]:
+        db.rollups.record_order(order)
+
+
+def check(db) -> List[Dict]:
+    """Explain every query shape; one row per method"""
+    rows = []
+    for method, explain in query_shapes(db):
+        stages = []
+        for plan in winning_plans(explain()):
+            stages.extend(plan_stages(plan))
+        problems = [BAD_STAGES[stage] for stage in stages if stage in BAD_STAGES]
+        rows.append({"method": method, "plan": " → ".join(reversed(stages)), "problems": problems})
+    return rows
+
+
+def extra_indexes(database) -> List[Tuple[str, str]]:
+    """(collection, index name) present in `database` but not in Database.INDEXES"""
+    extra = []
+    for collection, specs in Database.INDEXES.items():
+        declared = {tuple(tuple(key) for key in spec["keys"]) for spec in specs}
+        for name, info in database[collection].index_information().items():
+            if name != "_id_" and tuple(tuple(key) for key in info["key"]) not in declared:
+                extra.append((collection, name))
+    return extra
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Explain hot queries; fail on COLLSCAN / in-memory SORT")
+    parser.add_argument("--uri", help="MongoDB URI (default: MONGODB_URI)")
+    parser.add_argument("--database", default="restaurant_commerce_indexcheck",
+                        help="Scratch database (dropped afterwards unless --keep)")
+    parser.add_argument("--check-database", help="Also list undeclared indexes in this database")
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    db = Database(args.uri, database_name=args.database, index_migrations="sync")
+    try:
+        if not db.wait_for_indexes():
+            print(f"❌ Index migration did not complete: {db.get_schema_status()}")
+            return 1
+        if db.orders.estimated_document_count() == 0:
+            seed(db)
+        rows = check(db)
+        failed = [row for row in rows if row["problems"]]
+
+        print("\n📊 Query plans")
+        for row in rows:
+            icon = "❌" if row["problems"] else "✅"
+            note = f"  ← {', '.join(row['problems'])}" if row["problems"] else ""
+            print(f"{icon} {row['method']:<36} {row['plan']}{note}")
+
+        if args.check_database:
+            extra = extra_indexes(db.client[args.check_database])
+            print(f"\n🗂️ Indexes in {args.check_database} not in Database.INDEXES:")
+            for collection, name in extra or [("-", "none")]:
+                print(f"   {collection}.{name}")
+
+        if failed:
+            print(f"\n❌ {len(failed)} hot queries without a usable index")
+            return 1
+        print("\n✅ All hot queries are index-backed")
+        return 0
+    finally:
+        if not args.keep:
+            db.client.drop_database(args.database)
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+Fuzzy Menu Item Resolver
+Trigram index built once per menu load that maps free text - including
+misspellings like "biriyani" or "bryani" - to the closest menu items.
+"""
+
+import heapq
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def normalize(text: str) -> List[str]:
+    """Lowercased alphanumeric words"""
+    return _NON_WORD.sub(" ", text.lower()).split()
+
+
+def trigrams(text: str) -> set:
+    """
+    Word-level trigrams with boundary padding ("  b", " bi", "bir", ..., "ni ")
+
+    Padding makes word starts/ends count, so short names still match and
+    word order in the text does not matter.
+    """
+    grams = set()
+    for word in normalize(text):
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+@dataclass
+class ItemMatch:
+    """A menu item resolved from text"""
+    item: Any       # The indexed object (MenuItem, cart dict, ...)
+    score: float    # 0..1 - share of the item name's trigrams found in the text
+
+
+class ItemResolver:
+    """
+    Trigram index over menu item names
+
+    Usage:
+        resolver = ItemResolver(rag.menu_items)
+        resolver.resolve("2 chicken biriyani pls", k=3)
+        # [ItemMatch(item=MenuItem(name='Chicken Biryani', ...), score=0.88), ...]
+    """
+
+    def __init__(self, items: Sequence[Any], key: Callable[[Any], str] = lambda item: item.name):
+        """
+        Args:
+            items: Objects to index (MenuItems by default)
+            key: Returns the name to index for an item
+        """
+        self.items = list(items)
+        self._sizes: List[int] = []
+        self._postings: Dict[str, List[int]] = {}
+        for item_id, item in enumerate(self.items):
+            grams = trigrams(key(item))
+            self._sizes.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(item_id)
+
+    def resolve(self, text: str, k: int = 5, min_score: float = 0.5) -> List[ItemMatch]:
+        """
+        Top-k items whose names best match `text`
+
+        Score = shared trigrams / item-name trigrams, so a name mentioned
+        inside a longer sentence still scores ~1.0. Ties go to the item whose
+        name is closest in length to the text (then menu order).
+
+        Args:
+            text: Free text - a dish name or a whole customer message
+            k: Max matches returned
+            min_score: Drop matches below this score
+        """
+        query = trigrams(text)
+        if not query or not self.items:
+            return []
+
+        shared = Counter()
+        postings = self._postings
+        for gram in query:
+            item_ids = postings.get(gram)
+            if item_ids:
+                shared.update(item_ids)
+
+        sizes = self._sizes
+        query_size = len(query)
+        candidates = []
+        for item_id, count in shared.items():
+            score = count / sizes[item_id]
+            if score >= min_score:
+                # Dice coefficient breaks ties between "Biryani" and "Biryani Special"
+                dice = 2 * count / (sizes[item_id] + query_size)
+                candidates.append((score, dice, -item_id))
+
+        best = heapq.nlargest(k, candidates)
+        return [ItemMatch(item=self.items[-neg_id], score=round(score, 4))
+                for score, _, neg_id in best]
+
+    def best(self, text: str, min_score: float = 0.6) -> Optional[ItemMatch]:
+        """Single best match, or None"""
+        matches = self.resolve(text, k=1, min_score=min_score)
+        return matches[0] if matches else None
+
+
+# Example usage
+if __name__ == "__main__":
+    import time
+    from dataclasses import dataclass as _dataclass
+
+    print("🧪 Testing Item Resolver...\n")
+
+    @_dataclass
+    class Item:
+        name: str
+        price: float
+
+    menu = [Item("Chicken Biryani", 650), Item("Mutton Biryani", 850), Item("Chicken Karahi", 1200),
+            Item("Mango Lassi", 250), Item("Garlic Naan", 120), Item("Chicken Biryani Special", 900)]
+    resolver = ItemResolver(menu)
+
+    for text in ("chicken biryani", "chicken biriyani", "chiken bryani", "I want 2 chicken biriyani please"):
+        match = resolver.best(text)
+        assert match and match.item.name == "Chicken Biryani", (text, resolver.resolve(text))
+        print(f"✅ {text!r} → {match.item.name} ({match.score:.2f})")
+
+    assert resolver.best("mango lasi").item.name == "Mango Lassi"
+    assert resolver.best("pizza margherita") is None
+    assert resolver.best("") is None
+
+    # Cart dicts resolve too
+    cart = ItemResolver([{"name": "Garlic Naan", "price": 120}], key=lambda item: item["name"])
+    assert cart.best("add the garlik naan")
+
+    # Latency on a large menu
+    from benchmarks.common import generate_menu_items
+    items = [Item(item["name"], item["price"]) for item in generate_menu_items(2000, 1)]
+    big = ItemResolver(items)
+    queries = ["chicken biriyani", "i want something with mango lasi", "beef nihari please", "garlik naan"]
+    n = 500
+    start = time.perf_counter()
+    for _ in range(n):
+        for text in queries:
+            big.resolve(text, k=5)
+    per_query_ms = (time.perf_counter() - start) / (n * len(queries)) * 1000
+    print(f"\n⏱️ resolve() on {len(items)} items: {per_query_ms:.3f} ms/query")
+
+    print("\n✅ All tests passed!")
@@ -0,0 +1,153 @@
+"""
+Shared Keyword Matcher
+Checks every keyword vocabulary (order triggers, intent/item categories,
+menu tags, refer-back words) in one pass and reports all category hits
+of a text at once.
+
+Matching keeps the original `any(word in text for word in words)`
+semantics (plain substring, overlaps allowed), so swapping it in does not
+change which categories fire.
+
+The vocabularies are flattened into one list of unique keywords, each
+mapped to every category it belongs to: a keyword shared by several
+categories or namespaces ("add", "order") is searched once, and each
+search is a single C-level `in`. A trie-shaped regex scanned with a
+lookahead was tried first and measured slower than the loops it replaced.
+"""
+
+from typing import Dict, List, Optional
+
+# {namespace: {category: [keywords]}}
+Vocabularies = Dict[str, Dict[str, List[str]]]
+
+
+class KeywordMatcher:
+    """
+    All-vocabulary substring matcher
+
+    Usage:
+        matcher = KeywordMatcher({
+            "intent": {"spicy": ["spicy", "hot"], "rice": ["rice", "biryani"]},
+            "order": {"order": ["order", "want", "get me"]},
+        })
+        matcher.match("i want something hot")
+        # {"intent": ["spicy"], "order": ["order"]}
+    """
+
+    def __init__(self, vocabularies: Vocabularies):
+        """
+        Args:
+            vocabularies: {namespace: {category: [keywords]}} - keywords are
+                matched case-insensitively as substrings
+        """
+        self.vocabularies = {
+            namespace: {category: list(words) for category, words in categories.items()}
+            for namespace, categories in vocabularies.items()
+        }
+
+        # Hit ids are assigned in vocabulary order so results keep that order
+        self._hit_labels: List[tuple] = []
+        word_hits: Dict[str, set] = {}
+        for namespace, categories in self.vocabularies.items():
+            for category, words in categories.items():
+                hit_id = len(self._hit_labels)
+                self._hit_labels.append((namespace, category))
+                for word in words:
+                    word = word.lower()
+                    if word:
+                        word_hits.setdefault(word, set()).add(hit_id)
+
+        # One entry per distinct keyword, with every category it belongs to
+        self._keywords: List[tuple] = [(word, frozenset(hits)) for word, hits in word_hits.items()]
+
+    def match(self, text: str) -> Dict[str, List[str]]:
+        """
+        Every category with at least one keyword in `text`
+
+        Args:
+            text: Lowercased text
+
+        Returns:
+            {namespace: [categories in vocabulary order]} - every namespace is
+            present, with an empty list when nothing matched
+        """
+        result = {namespace: [] for namespace in self.vocabularies}
+        hits = set()
+        for word, word_hits in self._keywords:
+            if word in text:
+                hits |= word_hits
+
+        labels = self._hit_labels
+        for hit_id in sorted(hits):
+            namespace, category = labels[hit_id]
+            result[namespace].append(category)
+        return result
+
+    def categories(self, text: str, namespace: str) -> List[str]:
+        """Matched categories of one namespace"""
+        return self.match(text)[namespace]
+
+
+def merge_vocabularies(defaults: Vocabularies, overrides: Optional[Vocabularies]) -> Vocabularies:
+    """
+    Per-restaurant vocabularies: each namespace in `overrides` replaces the
+    default namespace of the same name entirely
+    """
+    merged = dict(defaults)
+    merged.update(overrides or {})
+    return merged
+
+
+# Example usage
+if __name__ == "__main__":
+    import random
+    import time
+
+    print("🧪 Testing Keyword Matcher...\n")
+
+    vocabularies = {
+        "order": {"order": ["order", "want", "get me", "add"]},
+        "item": {
+            "rice": ["rice", "biryani", "pulao"],
+            "spicy": ["spicy", "hot"],
+            "dessert": ["dessert", "sweet", "ice cream", "cake"],
+        },
+        "action": {"action": ["add", "order", "get"]},
+        "refer": {"refer": ["these", "those", "them", "that", "it"]},
+    }
+    matcher = KeywordMatcher(vocabularies)
+
+    def reference(text):
+        return {
+            namespace: [category for category, words in categories.items()
+                        if any(word in text for word in words)]
+            for namespace, categories in vocabularies.items()
+        }
+
+    assert matcher.match("get me a hot biryani")["order"] == ["order"]
+    assert matcher.match("get me a hot biryani")["action"] == ["action"]  # 'get' inside 'get me'
+    assert matcher.match("get me a hot biryani")["item"] == ["rice", "spicy"]
+    assert matcher.match("shotgun")["item"] == ["spicy"]  # substring, like `in`
+
+    # Randomized equivalence with the any()-loops
+    rng = random.Random(0)
+    words = ["add", "these", "hot", "cake", "rice", "get", "me", "order", "cheesecake",
+             "with", "them", "price", "sweet", "pulao", "want", "x", "ice", "cream"]
+    for _ in range(5000):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(0, 8)))
+        assert matcher.match(text) == reference(text), text
+    print("✅ Matches any()-loop semantics on 5000 random texts")
+
+    text = "i want to order something spicy with rice under 800, and add those too"
+    n = 20000
+    start = time.perf_counter()
+    for _ in range(n):
+        reference(text)
+    loops_us = (time.perf_counter() - start) / n * 1e6
+    start = time.perf_counter()
+    for _ in range(n):
+        matcher.match(text)
+    matcher_us = (time.perf_counter() - start) / n * 1e6
+    print(f"⏱️ any()-loops: {loops_us:.2f} µs   matcher: {matcher_us:.2f} µs")
+
+    print("\n✅ All tests passed!")
@@ -0,0 +1,264 @@
+"""
+In-Memory Storage Backend
+Orders, customers, payments and analytics events in plain dicts inside
+this process: no server, no I/O, so tests and benchmarks run in
+milliseconds. Nothing survives a restart and nothing is shared between
+worker processes - use DATABASE_BACKEND=sqlite or mongo for that.
+
+Concurrency without locks on the read path: stored documents are never
+modified in place. Inserts are a single dict.setdefault (atomic under
+the GIL, and it doubles as the unique-key check), updates build a new
+document and swap it in with one assignment, and readers copy what they
+find. Only read-modify-write updates (status changes, upserts) take a
+short writer lock so two of them cannot overwrite each other.
+"""
+
+import copy
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from storage import StorageBackend, decode_page_token, project, summarize_orders
+
+
+def matches(document: Dict, query: Dict) -> bool:
+    """Equality / {"$in": [...]} filters (the order filters StorageBackend issues)"""
+    for field, condition in query.items():
+        value = document.get(field)
+        if isinstance(condition, dict):
+            if set(condition) != {"$in"}:
+                raise ValueError(f"Unsupported filter on {field}: {condition}")
+            if value not in condition["$in"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class InMemoryStorage(StorageBackend):
+    """
+    Process-local storage backend
+
+    Usage:
+        db = InMemoryStorage()
+        db.create_order({...})
+        db.get_analytics(days=7)
+    """
+
+    backend = "memory"
+
+    def __init__(self, max_events: int = 100000):
+        """
+        Args:
+            max_events: Analytics events kept (oldest dropped beyond this)
+        """
+        self.orders: Dict[str, Dict] = {}
+        self.customers: Dict[str, Dict] = {}
+        self.payments: Dict[str, Dict] = {}
+        self.events: deque = deque(maxlen=max_events)
+        self._write_lock = threading.Lock()
+        print("✅ In-memory storage ready")
+
+    # ==================== HELPERS ====================
+
+    @staticmethod
+    def _insert(table: Dict[str, Dict], key: str, document: Dict, kind: str):
+        stored = copy.deepcopy(document)
+        if table.setdefault(key, stored) is not stored:
+            raise ValueError(f"Duplicate {kind}: {key}")
+
+    @staticmethod
+    def _update(table: Dict[str, Dict], key: str, fields: Dict) -> Optional[Dict]:
+        """$set `fields` on a document; returns it as it was before (None if missing)"""
+        previous = table.get(key)
+        if previous is None:
+            return None
+        table[key] = {**previous, **copy.deepcopy(fields)}
+        return previous
+
+    def _sorted_orders(self, query: Dict) -> List[Dict]:
+        """Orders matching `query` in ORDER_PAGE_SORT order (newest first)"""
+        found = [order for order in list(self.orders.values()) if matches(order, query)]
+        found.sort(key=lambda order: (order["created_at"], order["order_id"]), reverse=True)
+        return found
+
+    # ==================== ORDERS ====================
+
+    def create_order(self, order_data: Dict) -> str:
+        """Create new order (ValueError on a duplicate order_id)"""
+        try:
+            order_data['created_at'] = datetime.now()
+            order_data['updated_at'] = datetime.now()
+            self._insert(self.orders, order_data['order_id'], order_data, "order_id")
+            print(f"✅ Order created: {order_data['order_id']}")
+            return order_data['order_id']
+        except Exception as e:
+            print(f"❌ Error creating order: {e}")
+            raise
+
+    def get_order(self, order_id: str, projection=None) -> Optional[Dict]:
+        """Get order by ID (projection: see Database.get_order)"""
+        try:
+            return project(self.orders.get(order_id), self._projection(projection))
+        except Exception as e:
+            print(f"❌ Error fetching order: {e}")
+            return None
+
+    def transition_order_status(self, order_id: str, new_status: str,
+                                from_statuses: Optional[List[str]] = None,
+                                **kwargs) -> Optional[Dict]:
+        """Move an order to `new_status` if its status allows it (see StorageBackend)"""
+        try:
+            if from_statuses is None:
+                from_statuses = self.allowed_previous(new_status)
+            update_data, entry = self._status_update(new_status, kwargs)
+
+            with self._write_lock:
+                previous = self.orders.get(order_id)
+                if previous is not None and previous.get("status") in from_statuses:
+                    self.orders[order_id] = {
+                        **previous, **copy.deepcopy(update_data),
+                        "status_history": [*previous.get("status_history", []), copy.deepcopy(entry)]
+                    }
+                else:
+                    previous = None
+            if previous is None:
+                print(f"⚠️ Order {order_id}: {new_status} rejected (missing or not from {from_statuses})")
+                return None
+            print(f"✅ Order {order_id} status: {previous.get('status')} → {new_status}")
+            return project(previous, self.TRANSITION_PROJECTION)
+        except Exception as e:
+            # Not None: that means missing / rejected, and this is neither
+            print(f"❌ Error updating order: {e}")
+            raise
+
+    def _order_page_cursor(self, query: Dict, page_size: int, page_token: Optional[str],
+                           projection=None) -> List[Dict]:
+        orders = self._sorted_orders(query)
+        if page_token:
+            boundary = decode_page_token(page_token)
+            orders = [order for order in orders if (order["created_at"], order["order_id"]) < boundary]
+        fields = self._page_projection(projection)
+        return [project(order, fields) for order in orders[:page_size + 1]]
+
+    def _iter_orders(self, query: Dict, batch_size: int, projection=None) -> Iterator[Dict]:
+        fields = self._projection(projection)
+        for order in self._sorted_orders(query):
+            yield project(order, fields)
+
+    # ==================== CUSTOMERS ====================
+
+    def create_customer(self, customer_data: Dict) -> str:
+        """Create or update customer profile"""
+        try:
+            customer_data['created_at'] = datetime.now()
+            customer_data['updated_at'] = datetime.now()
+            phone = customer_data['phone']
+            with self._write_lock:
+                if self._update(self.customers, phone, customer_data) is None:
+                    self.customers[phone] = copy.deepcopy(customer_data)
+            print(f"✅ Customer profile updated: {phone}")
+            return phone
+        except Exception as e:
+            print(f"❌ Error creating customer: {e}")
+            raise
+
+    def get_customer(self, phone: str, projection=None) -> Optional[Dict]:
+        """Get customer by phone"""
+        try:
+            return project(self.customers.get(phone), self._projection(projection))
+        except Exception as e:
+            print(f"❌ Error fetching customer: {e}")
+            return None
+
+    def update_customer_preferences(self, phone: str, preferences: Dict) -> bool:
+        """Update customer preferences"""
+        with self._write_lock:
+            previous = self._update(self.customers, phone, {
+                "preferences": preferences,
+                "updated_at": datetime.now()
+            })
+        return previous is not None
+
+    # ==================== PAYMENTS ====================
+
+    def create_payment(self, payment_data: Dict) -> str:
+        """Record payment transaction"""
+        try:
+            payment_data['created_at'] = datetime.now()
+            self._insert(self.payments, payment_data['payment_id'], payment_data, "payment_id")
+            print(f"✅ Payment recorded: {payment_data['payment_id']}")
+            return payment_data['payment_id']
+        except Exception as e:
+            print(f"❌ Error recording payment: {e}")
+            raise
+
+    def update_payment_status(self, payment_id: str, status: str, **kwargs) -> bool:
+        """Update payment status"""
+        update_data = {
+            "status": status,
+            "updated_at": datetime.now()
+        }
+        update_data.update(kwargs)
+        with self._write_lock:
+            previous = self._update(self.payments, payment_id, update_data)
+        return previous is not None
+
+    def get_payment(self, payment_id: str, projection=None) -> Optional[Dict]:
+        """Get payment by ID"""
+        try:
+            return project(self.payments.get(payment_id), self._projection(projection))
+        except Exception as e:
+            print(f"❌ Error fetching payment: {e}")
+            return None
+
+    # ==================== ANALYTICS ====================
+
+    def _insert_events(self, events: List[Dict]):
+        self.events.extend(copy.deepcopy(events))
+
+    def _scan_analytics(self, days: int = 7) -> Dict:
+        """Analytics summary over the orders created in the last `days` days"""
+        try:
+            start_date = datetime.now() - timedelta(days=days)
+            return summarize_orders(
+                (order for order in list(self.orders.values()) if order["created_at"] >= start_date),
+                days
+            )
+        except Exception as e:
+            print(f"❌ Error fetching analytics: {e}")
+            return {}
+
+
+# Example usage
+if __name__ == "__main__":
+    print("🧪 Testing In-Memory Storage...\n")
+
+    db = InMemoryStorage()
+    db.create_order({"order_id": "A1", "customer_phone": "+923001234567", "total": 730,
+                     "items": [{"name": "Chicken Biryani", "qty": 1, "price": 650}],
+                     "status": "PENDING_PAYMENT"})
+    try:
+        db.create_order({"order_id": "A1"})
+        raise AssertionError("duplicate order_id accepted")
+    except ValueError:
+        pass
+    print("✅ Unique order_id")
+
+    # Concurrent duplicate transitions: exactly one applies
+    writers = [
+        threading.Thread(target=db.update_order_status, args=("A1", "PAID"), kwargs={f"note_{i}": i})
+        for i in range(20)
+    ]
+    for thread in writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    order = db.get_order("A1")
+    assert sum(f"note_{i}" in order for i in range(20)) == 1 and len(order["status_history"]) == 1
+    print("✅ Concurrent transitions")
+
+    assert db.get_analytics(days=1)["total_revenue"] == 730
+    print(f"📊 {db.get_analytics(days=1)}")
+    print("\n✅ All tests passed!")
@@ -0,0 +1,186 @@
+"""
+Menu-Structure-Aware Chunker
+One chunk per menu section (or item group) - dishes never get cut from their prices
+"""
+
+import re
+from typing import List, Optional, Sequence
+
+PRICE_PATTERN = re.compile(r'\d{2,5}')
+HEADER_PATTERN = re.compile(r"^[A-Za-z][A-Za-z\s&/'\-]*:?$")
+
+# Where an oversized entry may be cut, best first: lines, sentences, words
+_BREAKS = [
+    (re.compile(r'\n'), "\n"),
+    (re.compile(r'(?<=[.!?;])\s+'), " "),
+    (re.compile(r'\s+'), " "),
+]
+
+
+def is_section_header(line: str, next_line: Optional[str] = None) -> bool:
+    """
+    Heuristic section header check ("STARTERS", "Main Course:", "Hot Drinks")
+
+    Headers have no prices, are short, and are either ALL CAPS, end with a
+    colon, or are Title Case followed directly by a priced item line.
+    """
+    line = line.strip()
+    if not line or len(line) > 40 or len(line.split()) > 5:
+        return False
+    if not HEADER_PATTERN.match(line):
+        return False
+    if line.isupper() or line.endswith(':'):
+        return True
+    return line.istitle() and next_line is not None and is_item_line(next_line)
+
+
+def is_item_line(line: str, item_names: Sequence[str] = ()) -> bool:
+    """A line holding a priced dish (or a dish found by parse_menu_items)"""
+    line_lower = line.lower()
+    if PRICE_PATTERN.search(line) and re.search(r'[A-Za-z]{3,}', line):
+        return True
+    return any(name in line_lower for name in item_names)
+
+
+def split_oversized(text: str, limit: int) -> List[str]:
+    """
+    Cut text longer than `limit` at the gentlest boundary that fits
+
+    Lines first, then sentences, then words; a single word longer than
+    the limit is sliced hard.
+    """
+    if len(text) <= limit:
+        return [text]
+    for pattern, separator in _BREAKS:
+        parts = [part for part in pattern.split(text) if part.strip()]
+        if len(parts) < 2:
+            continue
+        pieces = []
+        for part in parts:
+            pieces.extend(split_oversized(part.strip(), limit))
+        # Re-pack neighbouring pieces up to the limit
+        packed = [pieces[0]]
+        for piece in pieces[1:]:
+            if len(packed[-1]) + len(separator) + len(piece) <= limit:
+                packed[-1] = f"{packed[-1]}{separator}{piece}"
+            else:
+                packed.append(piece)
+        return packed
+    return [text[start:start + limit] for start in range(0, len(text), limit)]
+
+
+def chunk_menu(text: str,
+               items: Sequence = (),
+               max_chars: int = 600,
+               min_chars: int = 120) -> List[str]:
+    """
+    Split menu text along its own structure
+
+    - Sections start at detected headers
+    - Each item line keeps its following description lines
+    - Sections longer than max_chars split into item groups at item
+      boundaries, each group re-prefixed with its section header
+    - Sections shorter than min_chars merge into the next one
+    - An entry longer than max_chars on its own (unstructured text) is cut
+      at line / sentence / word boundaries
+    - No overlap: every line is embedded exactly once
+
+    Args:
+        text: Extracted menu text
+        items: MenuItems from parse_menu_items (helps spot unpriced item lines)
+        max_chars: Upper bound per chunk
+        min_chars: Sections below this are merged with their neighbour
+
+    Returns:
+        Chunk texts
+    """
+    item_names = [item.name.lower() for item in items if len(item.name) >= 4]
+    lines = [line.rstrip() for line in text.splitlines()]
+    lines = [line for line in lines if line.strip()]
+    if not lines:
+        return []
+
+    # Group lines into sections → entries (item line + its description lines)
+    sections = []  # [(header, [entry, ...])]
+    header, entries = None, []
+    for idx, line in enumerate(lines):
+        next_line = lines[idx + 1] if idx + 1 < len(lines) else None
+        if is_section_header(line, next_line):
+            if header is not None or entries:
+                sections.append((header, entries))
+            header, entries = line.strip(), []
+        elif is_item_line(line, item_names) or not entries:
+            entries.append([line.strip()])
+        else:
+            entries[-1].append(line.strip())
+    if header is not None or entries:
+        sections.append((header, entries))
+
+    # Pack each section into chunks of whole entries
+    section_chunks = []
+    for header, entries in sections:
+        prefix = f"{header}\n" if header else ""
+        current = []
+        current_len = len(prefix)
+        room = max(max_chars - len(prefix), 1)
+        pieces = [piece for entry in entries for piece in split_oversized("\n".join(entry), room)]
+        for piece in pieces:
+            if current and current_len + len(piece) + 1 > max_chars:
+                section_chunks.append(prefix + "\n".join(current))
+                current, current_len = [], len(prefix)
+            current.append(piece)
+            current_len += len(piece) + 1
+        if current or prefix:
+            section_chunks.append((prefix + "\n".join(current)).strip())
+
+    # Merge tiny neighbouring sections so we don't embed near-empty chunks
+    chunks = []
+    for chunk in section_chunks:
+        if chunks and len(chunks[-1]) < min_chars and len(chunks[-1]) + len(chunk) + 2 <= max_chars:
+            chunks[-1] = f"{chunks[-1]}\n\n{chunk}"
+        else:
+            chunks.append(chunk)
+    return chunks
+
+
+# Example usage
+if __name__ == "__main__":
+    print("🧪 Testing Menu Chunker...\n")
+
+    menu = """STARTERS
+Chicken Samosa Rs 150
+Crispy pastry with spiced chicken
+Veggie Spring Roll Rs 200
+
+MAIN COURSE
+Chicken Biryani Rs 650
+Mutton Karahi Rs 1400
+
+DRINKS
+Mango Lassi Rs 200
+"""
+    chunks = chunk_menu(menu, max_chars=80, min_chars=0)
+    for chunk in chunks:
+        print(f"--- ({len(chunk)} chars)\n{chunk}")
+
+    assert all("Rs" in chunk and len(chunk) <= 80 for chunk in chunks)
+    assert any("Chicken Samosa Rs 150\nCrispy pastry" in chunk for chunk in chunks)
+    assert sum(chunk.count("Mutton Karahi") for chunk in chunks) == 1
+
+    # Layouts with no priced item lines come out as one entry; it must still fit
+    prose = "\n".join(
+        f"Our kitchen has served family recipes since 19{i:02d}. Every dish is cooked fresh to order."
+        for i in range(35)
+    )
+    name_then_price = "\n".join(f"House Special Platter Number {i}\n{600 + i}" for i in range(80))
+    one_line = "word " * 700 + "x" * 900
+    for layout in (prose, name_then_price, one_line, "DEALS\n" + prose):
+        chunks = chunk_menu(layout, max_chars=500)
+        assert len(chunks) > 1 and all(len(chunk) <= 500 for chunk in chunks), \
+            max(len(chunk) for chunk in chunks)
+        # Nothing lost or duplicated (the header is repeated on purpose)
+        assert "".join(layout.replace("DEALS", "").split()) == \
+            "".join("".join(chunks).replace("DEALS", "").split())
+    print("✅ Oversized entries split to max_chars")
+
+    print("\n✅ All tests passed!")
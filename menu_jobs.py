@@ -0,0 +1,304 @@
+"""
+Background Menu Processing Jobs
+Runs RestaurantRAG menu ingestion (PDF → items → chunks → embeddings →
+indexes) in a worker pool so the Streamlit script never blocks on it.
+
+Each upload becomes a job with an ID, live stage progress and cooperative
+cancellation; the finished engine is handed to the first session that
+claims the job - even after a browser refresh, since the registry lives in
+the server process, not in st.session_state. Claiming removes the job, so
+the registry never keeps a second reference to a loaded engine.
+"""
+
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from config import config
+
+# Share of the whole job each process_menu stage accounts for (progress bar)
+STAGE_WEIGHTS = {
+    'extract': 0.15,
+    'parse': 0.10,
+    'chunk': 0.05,
+    'embed': 0.60,
+    'index': 0.10,
+}
+STAGE_LABELS = {
+    'queued': "⏳ Waiting for a free worker",
+    'extract': "📄 Extracting text from PDF",
+    'parse': "🍽️ Parsing menu items",
+    'chunk': "✂️ Chunking text",
+    'embed': "🧠 Creating embeddings",
+    'index': "🔎 Building search indexes",
+    'done': "✅ Menu processed",
+}
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job was cancelled"""
+
+
+@dataclass
+class MenuJob:
+    """State of one menu ingestion"""
+    job_id: str
+    filename: str
+    status: str = "queued"        # queued | running | done | failed | cancelled
+    stage: str = "queued"
+    progress: float = 0.0         # 0..1 over all stages
+    error: Optional[str] = None
+    engine: object = None         # Ready RestaurantRAG once status == 'done' (until claimed)
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    @property
+    def stage_label(self) -> str:
+        return STAGE_LABELS.get(self.stage, self.stage)
+
+    def to_dict(self) -> Dict:
+        """JSON-friendly status (no engine)"""
+        return {
+            "job_id": self.job_id,
+            "filename": self.filename,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class MenuJobExecutor:
+    """
+    Worker pool for menu ingestion jobs
+
+    Usage:
+        jobs = get_menu_jobs()
+        job_id = jobs.submit(pdf_bytes, "menu.pdf", lambda: RestaurantRAG(api_key=...))
+        job = jobs.get(job_id)   # job.status / job.stage / job.progress
+        jobs.cancel(job_id)
+        engine = jobs.claim(job_id)  # once job.status == 'done'
+    """
+
+    def __init__(self, max_workers: int = None, keep_finished_seconds: float = 3600):
+        """
+        Args:
+            max_workers: Menus processed concurrently
+            keep_finished_seconds: How long unclaimed finished jobs (and their engines) are kept
+        """
+        self.max_workers = max_workers or config.MENU_JOB_WORKERS
+        self.keep_finished_seconds = keep_finished_seconds
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="menu-job")
+        self._jobs: Dict[str, MenuJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, pdf_bytes: bytes, filename: str, engine_factory: Callable[[], object]) -> str:
+        """
+        Queue a menu PDF for processing
+
+        Args:
+            pdf_bytes: Uploaded PDF content
+            filename: Shown in progress displays
+            engine_factory: Builds the (unprocessed) RestaurantRAG inside the worker
+
+        Returns:
+            Job ID
+        """
+        self.prune()
+        job = MenuJob(job_id=uuid.uuid4().hex[:12], filename=filename)
+
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
+            tmp.write(pdf_bytes)
+            pdf_path = tmp.name
+
+        with self._lock:
+            self._jobs[job.job_id] = job
+        job.future = self._pool.submit(self._run, job, pdf_path, engine_factory)
+        print(f"📥 Menu job {job.job_id} queued: {filename}")
+        return job.job_id
+
+    def get(self, job_id: Optional[str]) -> Optional[MenuJob]:
+        """Job by ID (None if unknown, claimed or pruned)"""
+        self.prune()
+        with self._lock:
+            return self._jobs.get(job_id) if job_id else None
+
+    def list_jobs(self) -> List[MenuJob]:
+        """All known jobs, newest first"""
+        self.prune()
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def claim(self, job_id: Optional[str]) -> Optional[object]:
+        """
+        Take the engine of a finished job and forget the job
+
+        Returns:
+            The processed RestaurantRAG (None if the job is unknown, not done
+            or already claimed by another session)
+        """
+        with self._lock:
+            job = self._jobs.get(job_id) if job_id else None
+            if job is None or job.status != "done":
+                return None
+            del self._jobs[job_id]
+            engine, job.engine = job.engine, None
+        return engine
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a job: queued jobs never start, running jobs stop at the next
+        stage / embedding batch boundary
+
+        Returns:
+            False if the job is unknown or already finished
+        """
+        job = self.get(job_id)
+        if not job or job.finished:
+            return False
+        job.cancel_event.set()
+        if job.future and job.future.cancel():
+            self._finish(job, "cancelled")
+        print(f"🛑 Menu job {job_id} cancellation requested")
+        return True
+
+    def prune(self):
+        """Forget finished jobs older than keep_finished_seconds"""
+        cutoff = time.time() - self.keep_finished_seconds
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items()
+                           if job.finished and job.finished_at and job.finished_at < cutoff]:
+                del self._jobs[job_id]
+
+    def shutdown(self, wait: bool = False):
+        """Cancel everything and stop the pool"""
+        for job in self.list_jobs():
+            self.cancel(job.job_id)
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    # ==================== WORKER ====================
+
+    def _run(self, job: MenuJob, pdf_path: str, engine_factory: Callable[[], object]):
+        job.status = "running"
+        job.started_at = time.time()
+
+        def progress(stage: str, fraction: float):
+            if job.cancel_event.is_set():
+                raise JobCancelled()
+            done = 0.0
+            for name, weight in STAGE_WEIGHTS.items():
+                if name == stage:
+                    done += weight * min(max(fraction, 0.0), 1.0)
+                    break
+                done += weight
+            job.stage = stage
+            job.progress = done
+
+        try:
+            progress('extract', 0.0)
+            engine = engine_factory()
+            engine.process_menu(pdf_path, progress=progress)
+            if job.cancel_event.is_set():
+                raise JobCancelled()
+            job.engine = engine
+            job.stage = "done"
+            job.progress = 1.0
+            self._finish(job, "done")
+        except JobCancelled:
+            self._finish(job, "cancelled")
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, "failed")
+        finally:
+            try:
+                os.unlink(pdf_path)
+            except OSError:
+                pass
+
+    def _finish(self, job: MenuJob, status: str):
+        job.status = status
+        job.finished_at = time.time()
+        icon = {"done": "✅", "failed": "❌", "cancelled": "🛑"}[status]
+        took = job.finished_at - (job.started_at or job.created_at)
+        print(f"{icon} Menu job {job.job_id} {status} after {took:.1f}s"
+              + (f": {job.error}" if job.error else ""))
+
+
+# ==================== SINGLETON ====================
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_menu_jobs() -> MenuJobExecutor:
+    """Process-wide job executor (shared by every Streamlit session)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = MenuJobExecutor()
+        return _executor
+
+
+# Example usage
+if __name__ == "__main__":
+    from benchmarks.common import HashingEmbeddings, StubGenerativeModel
+    from benchmarks.synthetic_pdf import write_menu_pdf
+    from rag_engine import RestaurantRAG
+
+    print("🧪 Testing Menu Jobs...\n")
+
+    embeddings = HashingEmbeddings()
+
+    def factory():
+        return RestaurantRAG(api_key="offline", embeddings=embeddings,
+                             generative_model=StubGenerativeModel())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for pages in (5, 40):
+            path = os.path.join(tmp, f"menu_{pages}p.pdf")
+            write_menu_pdf(path, pages)
+            paths.append(path)
+
+        executor = MenuJobExecutor(max_workers=2)
+        small = executor.submit(open(paths[0], "rb").read(), "small.pdf", factory)
+        large = executor.submit(open(paths[1], "rb").read(), "large.pdf", factory)
+        executor.cancel(large)
+
+        while not all(executor.get(job_id).finished for job_id in (small, large)):
+            time.sleep(0.05)
+
+        assert executor.get(small).status == "done", executor.get(small).error
+        assert executor.get(large).status == "cancelled"
+        print(f"\n✅ {executor.get(small).to_dict()}")
+        print(f"✅ {executor.get(large).to_dict()}")
+
+        # Claiming hands the engine over and drops the registry's reference
+        job = executor.get(small)
+        engine = executor.claim(small)
+        assert engine.vectorstore is not None and job.engine is None
+        assert executor.get(small) is None and executor.claim(small) is None
+        assert executor.claim(large) is None
+
+        # Expired jobs are pruned on read, not only on the next submit
+        executor.keep_finished_seconds = 0
+        time.sleep(0.01)
+        assert executor.get(large) is None and executor.list_jobs() == []
+        executor.shutdown()
+
+    print("\n✅ All tests passed!")
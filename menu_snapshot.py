@@ -0,0 +1,178 @@
+"""
+Menu Snapshot Format
+One versioned, checksummed file holding a fully processed menu
+(items, chunk texts, embedding matrix, metadata) - workers boot from it
+in milliseconds instead of re-running PDF extraction and embedding.
+
+File layout (little-endian):
+    magic          8 bytes   b"RMENUSNP"
+    version        uint32
+    header_len     uint32
+    sha256         32 bytes  digest of everything after the preamble
+    header         header_len bytes of UTF-8 JSON
+    padding        zero bytes up to a 64-byte boundary
+    embeddings     float32 matrix, C order (rows = chunks)
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import numpy as np
+
+MAGIC = b"RMENUSNP"
+FORMAT_VERSION = 1
+PREAMBLE = struct.Struct("<8sII32s")
+ALIGNMENT = 64
+
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot file is missing, corrupt or incompatible"""
+
+
+@dataclass
+class MenuSnapshot:
+    """A fully processed menu"""
+    items: List[Dict]                 # MenuItem fields as dicts
+    chunks: List[str]                 # Chunk texts (row i of embeddings)
+    embeddings: np.ndarray            # float32 (n_chunks, dim)
+    metadata: Dict = field(default_factory=dict)
+
+
+def write_snapshot(path: str, snapshot: MenuSnapshot) -> int:
+    """
+    Write a snapshot file (atomically, via a temp file + rename)
+
+    Returns:
+        File size in bytes
+    """
+    matrix = np.ascontiguousarray(snapshot.embeddings, dtype="<f4")
+    if matrix.ndim != 2 or matrix.shape[0] != len(snapshot.chunks):
+        raise SnapshotError(
+            f"Embedding matrix shape {matrix.shape} does not match {len(snapshot.chunks)} chunks"
+        )
+
+    header = json.dumps({
+        "items": snapshot.items,
+        "chunks": snapshot.chunks,
+        "metadata": snapshot.metadata,
+        "embeddings": {"dtype": "<f4", "shape": list(matrix.shape)},
+    }, ensure_ascii=False).encode("utf-8")
+
+    padding = -(PREAMBLE.size + len(header)) % ALIGNMENT
+    body = [header, b"\0" * padding, matrix.tobytes()]
+
+    digest = hashlib.sha256()
+    for part in body:
+        digest.update(part)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header), digest.digest()))
+        for part in body:
+            f.write(part)
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def read_snapshot(path: str, verify: bool = True) -> MenuSnapshot:
+    """
+    Read a snapshot file
+
+    The embedding matrix is a read-only NumPy view straight onto the
+    memory-mapped file (zero-copy); pages are shared between processes
+    that map the same snapshot.
+
+    Args:
+        path: Snapshot file
+        verify: Check the SHA-256 checksum (reads the whole file once)
+    """
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"Cannot open snapshot {path}: {e}")
+
+    if len(buffer) < PREAMBLE.size:
+        raise SnapshotError(f"Snapshot too small: {path}")
+
+    magic, version, header_len, checksum = PREAMBLE.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise SnapshotError(f"Not a menu snapshot: {path}")
+    if version != FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {version} (expected {FORMAT_VERSION})")
+
+    body = memoryview(buffer)[PREAMBLE.size:]
+    if verify and hashlib.sha256(body).digest() != checksum:
+        raise SnapshotError(f"Snapshot checksum mismatch: {path}")
+
+    try:
+        header = json.loads(bytes(body[:header_len]).decode("utf-8"))
+    except ValueError as e:
+        raise SnapshotError(f"Corrupt snapshot header: {e}")
+
+    rows, dim = header["embeddings"]["shape"]
+    offset = PREAMBLE.size + header_len
+    offset += -offset % ALIGNMENT
+    if len(buffer) != offset + rows * dim * np.dtype(header["embeddings"]["dtype"]).itemsize:
+        raise SnapshotError(f"Snapshot truncated or padded: {path}")
+    embeddings = np.frombuffer(
+        buffer, dtype=header["embeddings"]["dtype"], count=rows * dim, offset=offset
+    ).reshape(rows, dim)
+
+    return MenuSnapshot(
+        items=header["items"],
+        chunks=header["chunks"],
+        embeddings=embeddings,
+        metadata=header["metadata"],
+    )
+
+
+# Example usage
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    print("🧪 Testing Menu Snapshot...\n")
+
+    rng = np.random.default_rng(0)
+    original = MenuSnapshot(
+        items=[{"name": "Chicken Biryani", "price": 650.0, "description": "",
+                "category": "MAIN COURSE", "tags": ["meat"]}],
+        chunks=[f"MAIN COURSE\nChicken Biryani Rs {600 + i}" for i in range(2000)],
+        embeddings=rng.standard_normal((2000, 384)).astype(np.float32),
+        metadata={"menu_version": "abc123", "embedding_model": "all-MiniLM-L6-v2"},
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "menu.snap")
+        size = write_snapshot(path, original)
+
+        start = time.perf_counter()
+        loaded = read_snapshot(path)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        assert loaded.items == original.items
+        assert loaded.chunks == original.chunks
+        assert loaded.metadata == original.metadata
+        assert np.array_equal(loaded.embeddings, original.embeddings)
+        assert not loaded.embeddings.flags.owndata  # view onto the mmap
+        print(f"✅ Round trip: {size / 1024:.0f} KB loaded in {elapsed:.2f} ms")
+
+        # Flip one byte in the matrix → checksum must catch it
+        with open(path, "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            last = f.read(1)
+            f.seek(-1, os.SEEK_END)
+            f.write(bytes([last[0] ^ 0xFF]))
+        try:
+            read_snapshot(path)
+            raise AssertionError("Corruption not detected")
+        except SnapshotError as e:
+            print(f"✅ Corruption detected: {e}")
+
+    print("\n✅ All tests passed!")
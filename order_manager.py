@@ -4,7 +4,7 @@ Handles complete order lifecycle from creation to delivery
 """
 
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import uuid
 from database import get_database
 
@@ -168,54 +168,75 @@ class OrderManager:
             notes: Optional notes
             
         Returns:
-            Success boolean
+            Success boolean (False: invalid status, unknown order or a move
+            the current status does not allow)
+            
+        Raises:
+            Storage errors, so callers can tell an outage from a rejection
         """
         try:
             # Validate status
             if new_status not in self.ORDER_STATUSES:
                 raise ValueError(f"Invalid status: {new_status}")
             
-            # Get current order
-            order = self.db.get_order(order_id)
-            if not order:
-                raise ValueError(f"Order not found: {order_id}")
-            
-            # Update in database
+            # One round trip: the status precondition rejects illegal moves
+            # and the previous status comes back with the write
             update_data = {"notes": notes} if notes else {}
-            success = self.db.update_order_status(order_id, new_status, **update_data)
+            previous = self.db.transition_order_status(order_id, new_status, **update_data)
+            success = previous is not None
             
             if success:
-                # Log event
+                # Log event (buffered, off the request path)
                 self.db.log_event("order_status_changed", {
                     "order_id": order_id,
-                    "old_status": order.get('status'),
+                    "old_status": previous.get('status'),
                     "new_status": new_status
                 })
                 
-                print(f"✅ Order {order_id} → {new_status}")
+                print(f"✅ Order {order_id}: {previous.get('status')} → {new_status}")
             
             return success
             
-        except Exception as e:
+        except ValueError as e:
             print(f"❌ Error updating status: {e}")
             return False
     
-    def get_order(self, order_id: str) -> Optional[Dict]:
-        """Get order details"""
-        return self.db.get_order(order_id)
+    def get_order(self, order_id: str, projection=None) -> Optional[Dict]:
+        """Get order details (projection: view name or fields, see Database.get_order)"""
+        return self.db.get_order(order_id, projection)
     
     def get_customer_orders(
         self,
         customer_phone: str,
-        limit: int = 10
+        limit: int = 10,
+        projection=None
     ) -> List[Dict]:
         """Get customer's order history"""
-        return self.db.get_customer_orders(customer_phone, limit)
+        return self.db.get_customer_orders(customer_phone, limit, projection)
     
     def get_active_orders(self) -> List[Dict]:
         """Get all active orders"""
         return self.db.get_active_orders()
     
+    def get_active_orders_page(
+        self,
+        page_size: int = 100,
+        page_token: Optional[str] = None,
+        projection=None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """One page of active orders: (orders, next_page_token or None)"""
+        return self.db.get_active_orders_page(page_size, page_token, projection)
+    
+    def get_customer_orders_page(
+        self,
+        customer_phone: str,
+        page_size: int = 10,
+        page_token: Optional[str] = None,
+        projection=None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """One page of a customer's order history: (orders, next_page_token or None)"""
+        return self.db.get_customer_orders_page(customer_phone, page_size, page_token, projection)
+    
     def cancel_order(
         self,
         order_id: str,
@@ -229,41 +250,30 @@ class OrderManager:
             reason: Cancellation reason
             
         Returns:
-            Success boolean
-        """
-        try:
-            order = self.db.get_order(order_id)
-            
-            if not order:
-                return False
-            
-            # Can only cancel if not yet delivered
-            if order['status'] in ["DELIVERED", "CANCELLED"]:
-                print(f"⚠️ Cannot cancel order in status: {order['status']}")
-                return False
-            
-            # Update status
-            success = self.db.update_order_status(
-                order_id,
-                "CANCELLED",
-                cancellation_reason=reason,
-                cancelled_at=datetime.now()
-            )
+            Success boolean (False: unknown, delivered or already cancelled)
             
-            if success:
-                # Log event
-                self.db.log_event("order_cancelled", {
-                    "order_id": order_id,
-                    "reason": reason
-                })
-                
-                print(f"✅ Order cancelled: {order_id}")
-            
-            return success
+        Raises:
+            Storage errors
+        """
+        # Only orders not yet delivered / cancelled (checked by the write
+        # itself; the reason goes into the status_history entry)
+        previous = self.db.transition_order_status(
+            order_id,
+            "CANCELLED",
+            cancellation_reason=reason
+        )
+        success = previous is not None
+        
+        if success:
+            # Log event
+            self.db.log_event("order_cancelled", {
+                "order_id": order_id,
+                "reason": reason
+            })
             
-        except Exception as e:
-            print(f"❌ Error cancelling order: {e}")
-            return False
+            print(f"✅ Order cancelled: {order_id}")
+        
+        return success
     
     def reorder(self, previous_order_id: str, customer_phone: str) -> Optional[Dict]:
         """
@@ -311,7 +321,7 @@ class OrderManager:
             List of status events with timestamps
         """
         try:
-            order = self.db.get_order(order_id)
+            order = self.db.get_order(order_id, projection='order_timeline')
             
             if not order:
                 return []
@@ -356,7 +366,7 @@ class OrderManager:
             Formatted order summary text
         """
         try:
-            order = self.db.get_order(order_id)
+            order = self.db.get_order(order_id, projection='order_summary')
             
             if not order:
                 return "Order not found"
@@ -399,10 +409,18 @@ class OrderManager:
             print(f"❌ Error generating summary: {e}")
             return "Error loading order summary"
     
-    def validate_order_items(self, items: List[Dict]) -> tuple[bool, str]:
+    def validate_order_items(self, items: List[Dict], menu_resolver=None,
+                             min_score: float = 0.6) -> tuple[bool, str]:
         """
         Validate order items
         
+        Args:
+            items: Order items ({name, qty, price, subtotal})
+            menu_resolver: Optional ItemResolver over the menu (e.g.
+                rag.item_resolver) - names must then match a menu item,
+                misspellings tolerated
+            min_score: Minimum trigram score for a name to count as on the menu
+        
         Returns:
             (is_valid, error_message)
         """
@@ -427,6 +445,12 @@ class OrderManager:
             expected_subtotal = item['qty'] * item['price']
             if abs(item['subtotal'] - expected_subtotal) > 0.01:
                 return False, f"Subtotal mismatch for {item['name']}"
+            
+            # Validate against the menu
+            if menu_resolver is not None and menu_resolver.best(item['name'], min_score) is None:
+                suggestions = menu_resolver.resolve(item['name'], k=1, min_score=0.3)
+                hint = f" (did you mean {suggestions[0].item.name}?)" if suggestions else ""
+                return False, f"Not on the menu: {item['name']}{hint}"
         
         return True, "Valid"
 
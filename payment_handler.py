@@ -273,7 +273,7 @@ class PaymentHandler:
             (is_successful, status_message)
         """
         try:
-            payment = self.db.get_payment(payment_id)
+            payment = self.db.get_payment(payment_id, projection='payment_status')
             
             if not payment:
                 return False, "Payment not found"
@@ -305,7 +305,7 @@ class PaymentHandler:
             Processing result
         """
         try:
-            payment = self.db.get_payment(payment_id)
+            payment = self.db.get_payment(payment_id, projection='payment_status')
             
             if not payment:
                 raise ValueError("Payment not found")
@@ -340,7 +340,7 @@ class PaymentHandler:
             )
             
             # Update order
-            payment = self.db.get_payment(payment_id)
+            payment = self.db.get_payment(payment_id, projection='payment_status')
             from order_manager import OrderManager
             om = OrderManager()
             om.update_status(payment['order_id'], "PAID")
@@ -412,7 +412,7 @@ class PaymentHandler:
             Success boolean
         """
         try:
-            payment = self.db.get_payment(payment_id)
+            payment = self.db.get_payment(payment_id, projection='payment_status')
             
             if not payment:
                 print("❌ Payment not found")
@@ -475,7 +475,7 @@ class PaymentHandler:
     def get_payment_summary(self, payment_id: str) -> str:
         """Get human-readable payment summary"""
         try:
-            payment = self.db.get_payment(payment_id)
+            payment = self.db.get_payment(payment_id, projection='payment_status')
             
             if not payment:
                 return "Payment not found"
@@ -0,0 +1,327 @@
+"""
+Pre-Fork Launcher for Multi-Worker Deployments
+Load MiniLM + processed menus ONCE in a parent process, then fork workers
+so the read-only model weights and vector indexes are shared copy-on-write.
+
+Usage:
+    # Serve WhatsApp webhooks from 4 forked workers on one port
+    python prefork.py --snapshot menu.snap --role webhook --workers 4 --port 5001
+
+    # Poll Green API from one forked bot worker (always exactly one)
+    python prefork.py --snapshot menu.snap --role bot \\
+        --instance-id 7103... --api-token ...
+
+    # Measure per-worker memory: pre-fork vs every worker loading its own copy
+    python prefork.py --snapshot menu.snap --workers 4 --compare
+"""
+
+import argparse
+import gc
+import multiprocessing as mp
+import os
+import signal
+import socket
+import time
+from typing import Dict, List, Optional
+
+# Tokenizer thread pools do not survive fork(); keep them single-threaded
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+from config import config
+
+
+class _ForkPendingModel:
+    """
+    Placeholder generative model used in the parent
+
+    The Gemini client (gRPC) must not be shared across fork(), so each
+    worker attaches its own client after forking.
+    """
+
+    def generate_content(self, prompt):
+        raise RuntimeError("Gemini client not attached - call attach_llm() in the worker")
+
+
+# ==================== PARENT: LOAD ONCE ====================
+
+def load_shared_state(snapshot_paths: List[str], api_key: str, model: str) -> Dict:
+    """
+    Load the embedding model and every processed menu in the parent
+
+    Returns:
+        {snapshot_path: RestaurantRAG}
+    """
+    from rag_engine import RestaurantRAG
+
+    embeddings = RestaurantRAG._load_embeddings()
+    _limit_torch_threads()
+
+    engines = {}
+    for path in snapshot_paths:
+        engine = RestaurantRAG(
+            api_key=api_key,
+            model=model,
+            embeddings=embeddings,
+            generative_model=_ForkPendingModel(),
+            reranker=config.RERANKER or None
+        )
+        engine.load_snapshot(path)
+        engines[path] = engine
+
+    # Warm up lazily-initialized model state so workers never build it privately
+    embeddings.embed_query("warm up")
+    return engines
+
+
+def _limit_torch_threads():
+    """OpenMP thread pools used before fork() can deadlock children"""
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+
+
+def freeze_heap():
+    """
+    Move every object allocated so far into the permanent GC generation
+
+    Otherwise the first garbage collection in each worker touches (and so
+    copies) every page holding a tracked object.
+    """
+    gc.collect()
+    if hasattr(gc, "freeze"):
+        gc.freeze()
+
+
+# ==================== WORKER SIDE ====================
+
+def attach_llm(engines: Dict, api_key: str):
+    """Give each engine a Gemini client owned by this worker process"""
+    import google.generativeai as genai
+
+    genai.configure(api_key=api_key)
+    for engine in engines.values():
+        engine.gemini_model = genai.GenerativeModel(engine.model)
+
+
+def run_bot_worker(engines: Dict, args):
+    """
+    Poll Green API with the first loaded menu
+
+    Only one poller may run per Green API instance: a notification is
+    deleted after it has been processed, so a second poller would receive
+    the same customer message and answer (and order) it twice.
+    """
+    from whatsapp_handler import WhatsAppBot
+
+    attach_llm(engines, args.api_key)
+    engine = next(iter(engines.values()))
+    bot = WhatsAppBot(instance_id=args.instance_id, api_token=args.api_token, rag_engine=engine)
+    bot.start_polling(interval=args.interval)
+
+
+def run_webhook_worker(engines: Dict, args, listen_fd: int):
+    """Serve WhatsApp webhooks on the socket inherited from the parent"""
+    from werkzeug.serving import make_server
+    from whatsapp_handler import WhatsAppBot, create_webhook_server
+
+    attach_llm(engines, args.api_key)
+    engine = next(iter(engines.values()))
+    bot = WhatsAppBot(instance_id=args.instance_id, api_token=args.api_token, rag_engine=engine)
+    app = create_webhook_server(bot)
+    server = make_server(args.host, args.port, app, threaded=True, fd=listen_fd)
+    print(f"✅ Webhook worker {os.getpid()} serving on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+def run_idle_worker(engines: Dict, ready, stop):
+    """Measurement worker: touch the shared indexes like real traffic, then wait"""
+    for engine in engines.values():
+        for question in ("chicken biryani price", "something under 500", "mango lassi"):
+            embedding = engine.embeddings.embed_query(question)
+            engine._retrieve(question, embedding)
+    ready.set()
+    stop.wait()
+
+
+def _spawned_idle_worker(snapshot_paths, api_key, model, ready, stop):
+    """Current approach: the worker imports everything and loads its own copy"""
+    engines = load_shared_state(snapshot_paths, api_key, model)
+    run_idle_worker(engines, ready, stop)
+
+
+# ==================== MEMORY MEASUREMENT ====================
+
+def read_memory(pid: int) -> Optional[Dict[str, float]]:
+    """
+    Memory of one process in MB (Linux /proc/<pid>/smaps_rollup)
+
+    rss: resident pages, shared ones counted in full
+    pss: proportional share - shared pages divided among their users
+    uss: private pages only (what this worker really costs)
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    except OSError:
+        return None
+
+    return {
+        "rss": fields.get("Rss", 0.0),
+        "pss": fields.get("Pss", 0.0),
+        "uss": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+        "shared": fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0),
+    }
+
+
+def measure_workers(mode: str, snapshot_paths: List[str], workers: int,
+                    api_key: str, model: str, engines: Optional[Dict] = None) -> Dict:
+    """
+    Start idle workers in 'fork' (pre-loaded parent) or 'spawn' (current) mode
+    and read their memory once they have served a few queries
+    """
+    ctx = mp.get_context(mode)
+    stop = ctx.Event()
+    processes, readies = [], []
+
+    if mode == "fork":
+        freeze_heap()
+
+    for _ in range(workers):
+        ready = ctx.Event()
+        if mode == "fork":
+            proc = ctx.Process(target=run_idle_worker, args=(engines, ready, stop))
+        else:
+            proc = ctx.Process(target=_spawned_idle_worker,
+                               args=(snapshot_paths, api_key, model, ready, stop))
+        proc.start()
+        processes.append(proc)
+        readies.append(ready)
+
+    for ready in readies:
+        ready.wait(timeout=600)
+    time.sleep(0.5)
+
+    per_worker = [read_memory(proc.pid) for proc in processes]
+    parent = read_memory(os.getpid()) if mode == "fork" else None
+
+    stop.set()
+    for proc in processes:
+        proc.join(timeout=10)
+
+    per_worker = [m for m in per_worker if m]
+    total_pss = sum(m["pss"] for m in per_worker) + (parent["pss"] if parent else 0.0)
+    return {"mode": mode, "workers": per_worker, "parent": parent, "total_pss": total_pss}
+
+
+def print_memory_report(results: List[Dict]):
+    """Print per-worker memory (MB) for each launch mode"""
+    print("\n" + "=" * 72)
+    print("🧠 PER-WORKER MEMORY (MB)")
+    print("=" * 72)
+    print(f"{'mode':<8}{'worker':<8}{'rss':>10}{'pss':>10}{'uss':>10}{'shared':>10}")
+    for result in results:
+        rows = list(enumerate(result["workers"], 1))
+        if result["parent"]:
+            rows.insert(0, ("parent", result["parent"]))
+        for label, mem in rows:
+            print(f"{result['mode']:<8}{str(label):<8}{mem['rss']:>10.1f}{mem['pss']:>10.1f}"
+                  f"{mem['uss']:>10.1f}{mem['shared']:>10.1f}")
+        print(f"{'':<8}{'total':<8}{'':>10}{result['total_pss']:>10.1f}")
+    print("=" * 72)
+    print("pss = proportional share of shared pages; total = real memory used on the box")
+
+
+# ==================== LAUNCHER ====================
+
+def launch(args):
+    """Load once, open the listening socket, fork workers and supervise them"""
+    if args.role == "bot" and args.workers != 1:
+        raise ValueError("The bot role runs exactly one Green API poller (--workers 1)")
+
+    if args.workers > 1 and config.DB_CACHE_BACKEND == "memory":
+        print("⚠️ DB_CACHE_BACKEND=memory is per process: workers will serve each other's "
+              "status changes late. Use 'redis' or 'none' with several workers")
+
+    engines = load_shared_state(args.snapshot, args.api_key, args.model)
+
+    listen_sock = None
+    if args.role == "webhook":
+        listen_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listen_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listen_sock.bind((args.host, args.port))
+        listen_sock.listen(128)
+        listen_sock.set_inheritable(True)
+
+    freeze_heap()
+
+    ctx = mp.get_context("fork")
+    children = []
+    for _ in range(args.workers):
+        if args.role == "webhook":
+            proc = ctx.Process(target=run_webhook_worker,
+                               args=(engines, args, listen_sock.fileno()))
+        else:
+            proc = ctx.Process(target=run_bot_worker, args=(engines, args))
+        proc.start()
+        children.append(proc)
+
+    print(f"🚀 Started {len(children)} {args.role} workers from parent {os.getpid()}")
+
+    def shutdown(signum, frame):
+        for proc in children:
+            proc.terminate()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    for proc in children:
+        proc.join()
+    print("🛑 All workers stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork launcher for bot/webhook workers")
+    parser.add_argument("--snapshot", nargs="+", required=True,
+                        help="Menu snapshot(s) written by RestaurantRAG.export_snapshot()")
+    parser.add_argument("--workers", type=int,
+                        help=f"Webhook workers (default {config.WORKER_PROCESSES}); the bot role runs one")
+    parser.add_argument("--role", choices=["bot", "webhook"], default="webhook")
+    parser.add_argument("--compare", action="store_true",
+                        help="Report per-worker memory for pre-fork vs per-worker loading")
+    parser.add_argument("--api-key", default=config.GEMINI_API_KEY)
+    parser.add_argument("--model", default=config.GEMINI_MODEL.split("/")[-1])
+    parser.add_argument("--instance-id", default="")
+    parser.add_argument("--api-token", default="")
+    parser.add_argument("--interval", type=int, default=5)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5001)
+    args = parser.parse_args()
+
+    if args.role == "bot" and not args.compare:
+        if args.workers not in (None, 1):
+            parser.error("--role bot polls Green API from exactly one worker; "
+                         "use --role webhook to serve from several")
+        args.workers = 1
+    elif args.workers is None:
+        args.workers = config.WORKER_PROCESSES
+
+    if args.compare:
+        engines = load_shared_state(args.snapshot, args.api_key, args.model)
+        results = [
+            measure_workers("fork", args.snapshot, args.workers, args.api_key, args.model, engines),
+            measure_workers("spawn", args.snapshot, args.workers, args.api_key, args.model),
+        ]
+        print_memory_report(results)
+        return
+
+    launch(args)
+
+
+if __name__ == "__main__":
+    main()
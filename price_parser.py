@@ -0,0 +1,203 @@
+"""
+Price / Budget Constraint Extraction
+One precompiled expression that pulls the customer's price constraint out
+of a message: limits ("under 500"), floors ("above 300"), ranges
+("between 300 and 600"), budgets ("my budget is 2k"), Roman Urdu
+("1000 tak", "500 se kam") and Urdu / Arabic-Indic digits ("۵۰۰").
+
+Only amounts count: a number followed by a unit or quantity word
+("30 minutes", "5 people", "3 drinks") is skipped, and a bare number with
+no currency marker must be a plausible price. Every constraint in the
+message is combined, so "more than 2 naan and under 800" keeps the cap.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+# Urdu (Extended Arabic-Indic) and Arabic-Indic digits → ASCII
+_DIGITS = {ord(c): str(i) for i, c in enumerate("۰۱۲۳۴۵۶۷۸۹")}
+_DIGITS.update({ord(c): str(i) for i, c in enumerate("٠١٢٣٤٥٦٧٨٩")})
+_DIGITS[ord("٬")] = ","  # Arabic thousands separator
+
+_THOUSANDS = re.compile(r"(?<=\d),(?=\d{3}\b)")
+
+_CURRENCY = r"(?:rs\.?|pkr|₨|rupees?)\s*"
+# Words after a number that make it a duration, head count or quantity
+_UNITS = (r"(?:minutes?|mins?|hours?|hrs?|days?|people|persons?|pax|guests?|pcs|pieces?"
+          r"|plates?|servings?|portions?|items?|naans?|rotis?|drinks?|bottles?|cans?|glasses?"
+          r"|cups?|dozen|boxes?|kg|grams?|gm|ml|litres?|liters?|ltr|km|x|times?|%|percent)\b")
+# (?!\.?\d) stops the number from matching a prefix of a longer one ("3" of "30")
+_NUMBER = rf"\d+(?:\.\d+)?(?!\.?\d)(?:\s*k\b)?(?!\s*{_UNITS})"
+_AMOUNT = rf"(?:{_CURRENCY})?{_NUMBER}(?:\s*(?:rs|pkr|rupees?)\b)?"
+
+# Named group = constraint kind; the first alternative that matches at a position wins.
+# The leading lookahead lets the scan skip positions no alternative can start at.
+_PRICE_PATTERN = re.compile(
+    r"(?=[a-z₨\d])(?:" + "|".join([
+        # between 300 and 600 / from 300 to 600 / rs 300-600
+        rf"(?P<range>\b(?:between|from)\s+{_AMOUNT}\s*(?:and|to|-)\s*{_AMOUNT}"
+        rf"|(?<![a-z]){_CURRENCY}{_NUMBER}\s*(?:-|to)\s*{_AMOUNT})",
+        # under 500 / below / less than / max / up to / within / not more than
+        rf"(?P<max>\b(?:under|below|less than|maximum|max|up ?to|within|not more than"
+        rf"|no more than|cheaper than)\s+{_AMOUNT})",
+        # above 300 / over / more than / at least / minimum
+        rf"(?P<min>\b(?:above|over|more than|at least|minimum|min)\s+{_AMOUNT})",
+        # Roman Urdu: 1000 tak / 500 se kam / 300 se zyada
+        rf"(?P<urdu_max>{_AMOUNT}\s+(?:tak|se kam)\b)",
+        rf"(?P<urdu_min>{_AMOUNT}\s+se (?:zyada|ziada|upar)\b)",
+        # 2000 budget / budget is rs 2k
+        rf"(?P<budget_after>{_AMOUNT}\s+budget)",
+        rf"(?P<budget>\bbudget\D*?{_AMOUNT})",
+    ]) + ")"
+)
+
+# Every constraint contains a number - most chat messages have none
+_DIGIT = re.compile(r"\d")  # Unicode \d also covers Urdu digits
+
+# Amounts inside the matched span: (digits, optional 'k')
+_AMOUNTS = re.compile(r"(\d+(?:\.\d+)?)(\s*k\b)?")
+
+# Marks a span as money even when its numbers are small
+_MONEY = re.compile(rf"{_CURRENCY}\d|\d\s*(?:k|rs|pkr|rupees?)\b")
+
+# Smallest bare number read as Rs ("max 3", "over 2" are counts, not prices)
+MIN_BARE_AMOUNT = 50
+
+_MAX_KINDS = {"max": "max", "urdu_max": "max", "budget": "budget", "budget_after": "budget"}
+
+
+@dataclass(frozen=True)
+class PriceConstraint:
+    """Price constraint of one customer message (Rs)"""
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    kind: Optional[str] = None  # 'max' | 'min' | 'range' | 'budget' | None
+
+    def __bool__(self) -> bool:
+        return self.kind is not None
+
+    def allows(self, price: Optional[float]) -> bool:
+        """Whether an item price satisfies the constraint"""
+        if price is None:
+            return True
+        if self.min_price is not None and price < self.min_price:
+            return False
+        if self.max_price is not None and price > self.max_price:
+            return False
+        return True
+
+
+NO_CONSTRAINT = PriceConstraint()
+
+
+def normalize_numbers(text: str) -> str:
+    """Lowercase, ASCII digits, no thousands separators"""
+    return _THOUSANDS.sub("", text.translate(_DIGITS).lower())
+
+
+def _amounts(span: str) -> Optional[list]:
+    """Rs amounts in a matched span (None when they read as counts, not prices)"""
+    amounts = [
+        float(number) * (1000 if thousands else 1)
+        for number, thousands in _AMOUNTS.findall(span)
+    ]
+    if not _MONEY.search(span) and min(amounts) < MIN_BARE_AMOUNT:
+        return None
+    return amounts
+
+
+def extract_price_constraint(text: str) -> PriceConstraint:
+    """
+    Price constraint expressed in a message (all constraints combined)
+
+    Examples:
+        "something under Rs. 500"          → max 500
+        "between 300 and 600"              → 300..600
+        "budget is 1.5k"                   → max 1500 (budget)
+        "۵۰۰ tak kuch spicy"               → max 500
+        "above 300, under 800"             → 300..800
+        "above 1000 under 500"             → max 500 (later bound wins)
+        "deliver within 30 minutes?"       → none
+    """
+    if not _DIGIT.search(text):
+        return NO_CONSTRAINT
+
+    low = high = None
+    max_kind = None
+    for match in _PRICE_PATTERN.finditer(normalize_numbers(text)):
+        kind = match.lastgroup
+        amounts = _amounts(match.group(kind))
+        if amounts is None:
+            continue
+        if kind == "range":
+            floor, cap = sorted(amounts[:2])
+        elif kind in ("min", "urdu_min"):
+            floor, cap = amounts[0], None
+        else:
+            floor, cap = None, amounts[0]
+        # A bound contradicting an earlier one ("above 1000 ... under 500")
+        # replaces it: the customer corrected themselves
+        if floor is not None:
+            if high is not None and floor > high:
+                high = max_kind = None
+            low = floor if low is None else max(low, floor)
+        if cap is not None:
+            if low is not None and cap < low:
+                low = None
+            if high is None or cap < high:
+                high, max_kind = cap, _MAX_KINDS.get(kind, "range")
+
+    if low is None and high is None:
+        return NO_CONSTRAINT
+    if low is not None and high is not None:
+        return PriceConstraint(min_price=low, max_price=high, kind="range")
+    if low is not None:
+        return PriceConstraint(min_price=low, kind="min")
+    return PriceConstraint(max_price=high, kind=max_kind)
+
+
+# Example usage
+if __name__ == "__main__":
+    print("🧪 Testing Price Parser...\n")
+
+    cases = {
+        "something under 500": (None, 500, "max"),
+        "anything below Rs. 800?": (None, 800, "max"),
+        "less than PKR 1,200 please": (None, 1200, "max"),
+        "between 300 and 600": (300, 600, "range"),
+        "from rs 600 to 300": (300, 600, "range"),
+        "rs 300-600 wala": (300, 600, "range"),
+        "my budget is 2k": (None, 2000, "budget"),
+        "1.5k budget for 3 people": (None, 1500, "budget"),
+        "above 1000": (1000, None, "min"),
+        "۵۰۰ tak kuch spicy": (None, 500, "max"),
+        "١٢٠٠ se kam": (None, 1200, "max"),
+        "500 se zyada": (500, None, "min"),
+        "2 chicken biryani": (None, None, None),
+        "5 kebabs under 900": (None, 900, "max"),
+        "leftover 2 naan, open hours 3-4": (None, None, None),
+        # Durations, head counts and quantities are not prices
+        "can you deliver within 30 minutes? i want biryani": (None, None, None),
+        "biryani for up to 5 people": (None, None, None),
+        "order 2 biryani, max 3 drinks": (None, None, None),
+        "more than 2 naan and under 800": (None, 800, "max"),
+        "max rs 40 for the drink": (None, 40, "max"),
+        "above 300 but under 800": (300, 800, "range"),
+        "under 1000, budget is 700": (None, 700, "budget"),
+        # Contradictions: the later bound wins, never a swapped range
+        "above 1000 under 500": (None, 500, "max"),
+        "under 500, actually above 1000": (1000, None, "min"),
+        "between 300 and 600, no wait under 200": (None, 200, "max"),
+    }
+    for text, (low, high, kind) in cases.items():
+        constraint = extract_price_constraint(text)
+        assert (constraint.min_price, constraint.max_price, constraint.kind) == (low, high, kind), \
+            (text, constraint)
+        print(f"✅ {text!r:34} → {constraint}")
+
+    assert extract_price_constraint("between 300 and 600").allows(450)
+    assert not extract_price_constraint("between 300 and 600").allows(650)
+    assert not NO_CONSTRAINT
+
+    print("\n✅ All tests passed!")
@@ -2,8 +2,12 @@ import os
 import re
 import json
 import time
+import hashlib
 from typing import List, Dict, Optional, Callable
-from dataclasses import dataclass
+from dataclasses import dataclass, field, asdict
+from contextlib import contextmanager
+
+import numpy as np
 
 # CORRECT Gemini import - modern SDK
 import google.generativeai as genai
@@ -11,6 +15,18 @@ import google.generativeai as genai
 # LangChain for embeddings and vector store ONLY
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.document import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
+
+from request_coalescer import SingleFlight, normalize_question
+from bm25_index import BM25Index, reciprocal_rank_fusion
+from menu_chunker import chunk_menu
+from menu_snapshot import MenuSnapshot, SnapshotError, read_snapshot, write_snapshot
+from instrumentation import METRICS, Instrumentation
+from keyword_matcher import KeywordMatcher, Vocabularies, merge_vocabularies
+from item_resolver import ItemMatch, ItemResolver
+from price_parser import NO_CONSTRAINT, PriceConstraint, extract_price_constraint
+from reranker import ChunkReranker, LexicalReranker, create_reranker
 
 # PDF Library Detection
 try:
@@ -36,17 +52,142 @@ class MenuItem:
     tags: List[str]
 
 
+@dataclass
+class QueryContext:
+    """
+    Per-turn retrieval plan
+    Everything derived from the question is computed ONCE and reused by
+    query_agentic, query and _get_relevant_items
+    """
+    question: str
+    question_lower: str
+    embedding: Optional[List[float]] = None
+    docs: List = field(default_factory=list)
+    price_limit: Optional[float] = None  # price_constraint.max_price
+    price_constraint: PriceConstraint = NO_CONSTRAINT
+    wants_to_order: bool = False
+    intent_keywords: List[str] = field(default_factory=list)
+    item_categories: List[str] = field(default_factory=list)
+    relevant_items: Dict = field(default_factory=dict)  # price_limit -> items
+    timings: Dict[str, float] = field(default_factory=dict)  # stage -> ms
+    stage_calls: Dict[str, int] = field(default_factory=dict)  # stage -> count
+    metrics: Optional[Instrumentation] = None  # Also feeds 'query.<stage>' histograms
+    
+    @contextmanager
+    def timed(self, stage: str):
+        """Accumulate wall time (ms) and call count for a stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.timings[stage] = self.timings.get(stage, 0.0) + elapsed
+            self.stage_calls[stage] = self.stage_calls.get(stage, 0) + 1
+            if self.metrics is not None:
+                self.metrics.record(f"query.{stage}", elapsed)
+    
+    def format_timings(self) -> str:
+        """One-line stage breakdown, e.g. 'embed=12.1ms(1) retrieve=0.4ms(1)'"""
+        return " ".join(
+            f"{stage}={ms:.1f}ms({self.stage_calls[stage]})"
+            for stage, ms in self.timings.items()
+        )
+
+
 class RestaurantRAG:
     """
     WORKING GEMINI RAG Engine - Simplified, No Agent (For Now)
     Gets it working first, then add agentic features
     """
     
+    # Chunks retrieved once per turn (query_agentic only shows the first 3)
+    RETRIEVAL_K = 4
+    
+    # Hybrid BM25 + vector retrieval: fuse wider candidate lists, keep fewer chunks
+    HYBRID_RETRIEVAL_K = 3
+    HYBRID_CANDIDATES = 8
+    
+    # Optional reranking: score a wide candidate set, keep the best chunks
+    # that fit the prompt token budget
+    RERANK_CANDIDATES = 20
+    RERANK_TOKEN_BUDGET = 300
+    RERANK_MAX_CHUNKS = 4
+    
+    # Chunks embedded per batch when reporting ingestion progress
+    EMBED_BATCH_SIZE = 64
+    
+    # Trigram score needed to count as "the question names this item"
+    ITEM_MATCH_MIN_SCORE = 0.5
+    # Refer-back: "add the biryani" picks just the named recommendation(s)
+    REFER_BACK_MIN_SCORE = 0.6
+    
+    # Order intent triggers
+    ORDER_TRIGGERS = [
+        'order', 'want', 'get me', 'i need', 'hungry',
+        'buy', 'purchase', 'add', 'give me'
+    ]
+    
+    # Food keywords for intent detection / auto-selection
+    INTENT_KEYWORDS = {
+        'chicken': ['chicken'],
+        'beef': ['beef'],
+        'mutton': ['mutton', 'lamb'],
+        'fish': ['fish'],
+        'vegetarian': ['vegetarian', 'vegan', 'veggie'],
+        'spicy': ['spicy', 'hot'],
+        'rice': ['rice', 'biryani', 'pulao'],
+        'bread': ['naan', 'roti', 'bread']
+    }
+    
+    # Keyword categories for matching questions to menu items
+    ITEM_KEYWORDS = {
+        'chicken': ['chicken'],
+        'beef': ['beef'],
+        'mutton': ['mutton', 'lamb'],
+        'fish': ['fish', 'seafood'],
+        'vegan': ['vegan', 'vegetarian'],
+        'spicy': ['spicy', 'hot'],
+        'rice': ['rice', 'biryani', 'pulao'],
+        'bread': ['bread', 'naan', 'roti'],
+        'drink': ['drink', 'juice', 'coffee', 'tea', 'lassi'],
+        'dessert': ['dessert', 'sweet', 'ice cream', 'cake']
+    }
+    
+    # Tags assigned to parsed menu items by name
+    TAG_KEYWORDS = {
+        'vegetarian': ['vegan', 'vegetarian', 'veggie'],
+        'spicy': ['spicy', 'hot', 'chili', 'jalapeño'],
+        'meat': ['chicken', 'beef', 'mutton', 'fish', 'meat', 'lamb']
+    }
+    
+    # "add these/those/them" - refer back to the last recommendations
+    REFERRING_WORDS = ['these', 'those', 'them', 'that', 'it', 'same', 'all']
+    ACTION_WORDS = ['add', 'order', 'want', 'get', 'buy', 'take']
+    
+    @classmethod
+    def default_vocabularies(cls) -> Vocabularies:
+        """Keyword vocabularies compiled into the engine's KeywordMatcher"""
+        return {
+            'order': {'order': cls.ORDER_TRIGGERS},
+            'intent': cls.INTENT_KEYWORDS,
+            'item': cls.ITEM_KEYWORDS,
+            'tag': cls.TAG_KEYWORDS,
+            'refer': {'refer': cls.REFERRING_WORDS},
+            'action': {'action': cls.ACTION_WORDS}
+        }
+    
     def __init__(self, 
                  api_key: str, 
                  model: str = "gemini-2.5-flash",
                  provider: str = "gemini",
-                 agentic_mode: bool = False):
+                 agentic_mode: bool = False,
+                 hybrid_retrieval: bool = True,
+                 chunk_strategy: str = "menu",
+                 embeddings=None,
+                 generative_model=None,
+                 metrics: Optional[Instrumentation] = None,
+                 vocabularies: Optional[Vocabularies] = None,
+                 reranker=None):
         """
         Initialize RAG engine with Gemini
         
@@ -55,14 +196,42 @@ class RestaurantRAG:
             model: Gemini model (gemini-2.5-flash or gemini-2.5-flash)
             provider: Always 'gemini'
             agentic_mode: Set to False for now (we'll add later)
+            hybrid_retrieval: Fuse BM25 and vector search (False = vector only)
+            chunk_strategy: 'menu' (section/item aware) or 'fixed' (500 chars, 50 overlap)
+            embeddings: Pre-loaded embeddings (default: load MiniLM)
+            generative_model: Object with generate_content() used instead of
+                Gemini (skips the API connection, e.g. offline benchmarks)
+            metrics: Stage timing registry (default: the process-wide METRICS)
+            vocabularies: Per-restaurant keyword namespaces replacing the
+                defaults (see default_vocabularies(), e.g. {'tag': {...}})
+            reranker: 'lexical', 'cross-encoder' or a ChunkReranker applied
+                after retrieval (None = keep the fused top-k as is)
         """
         self.api_key = api_key
         self.model = model
         self.provider = "gemini"
         self.agentic_mode = False  # Force disable for now
         self.vectorstore = None
+        self.chunks = []  # Chunk texts (position = chunk_id in both indexes)
+        self.chunk_embeddings = None  # float32 matrix, row i = chunks[i]
+        self.bm25_index = None
+        self.hybrid_retrieval = hybrid_retrieval
+        self.chunk_strategy = chunk_strategy
         self.menu_items = []
+        self.item_categories = []  # ITEM_KEYWORDS categories of menu_items[i]'s name
+        self.item_resolver = ItemResolver([])  # Typo-tolerant name → MenuItem lookup
+        self.keyword_matcher = KeywordMatcher(
+            merge_vocabularies(self.default_vocabularies(), vocabularies)
+        )
+        self.menu_version = None  # Content hash of the processed menu
+        self.llm_coalescer = SingleFlight()  # Shares identical in-flight Gemini calls
         self.last_recommended_items = []  # Store what AI just recommended
+        self.last_query_context = None  # Retrieval plan + timings of the last turn
+        self.metrics = metrics if metrics is not None else METRICS  # Stage histograms
+        if isinstance(reranker, str):
+            reranker = create_reranker(reranker, token_budget=self.RERANK_TOKEN_BUDGET,
+                                       max_chunks=self.RERANK_MAX_CHUNKS)
+        self.reranker: Optional[ChunkReranker] = reranker
         self.conversation_context = []
         
         # Agentic features (for later)
@@ -74,6 +243,12 @@ class RestaurantRAG:
             'chat_history': []
         }
         
+        if generative_model is not None:
+            self.embeddings = embeddings or self._load_embeddings()
+            self.gemini_model = generative_model
+            print(f"✅ Using injected generative model: {type(generative_model).__name__}")
+            return
+        
         print(f"🤖 Initializing GEMINI with model: {self.model}")
         
         # CRITICAL: Configure Gemini API with modern SDK
@@ -99,19 +274,25 @@ class RestaurantRAG:
             print(f"Proceeding with model: {self.model}")
         
         # Initialize embeddings (FREE HuggingFace)
+        self.embeddings = embeddings or self._load_embeddings()
+        
+        # Initialize Gemini model (CORRECT way)
+        self.gemini_model = genai.GenerativeModel(self.model)
+        print(f"✅ Gemini model initialized!")
+    
+    @staticmethod
+    def _load_embeddings():
+        """Load the FREE HuggingFace MiniLM embeddings"""
         try:
             from langchain_community.embeddings import HuggingFaceEmbeddings
-            self.embeddings = HuggingFaceEmbeddings(
+            embeddings = HuggingFaceEmbeddings(
                 model_name="sentence-transformers/all-MiniLM-L6-v2"
             )
             print("✅ Using FREE HuggingFace embeddings")
+            return embeddings
         except Exception as e:
             print(f"❌ HuggingFace embeddings failed: {e}")
             raise Exception("Please install: pip install sentence-transformers")
-        
-        # Initialize Gemini model (CORRECT way)
-        self.gemini_model = genai.GenerativeModel(self.model)
-        print(f"✅ Gemini model initialized!")
     
     # ============================================
     # PDF PROCESSING (UNCHANGED)
@@ -171,14 +352,7 @@ class RestaurantRAG:
                     if sum(c.isdigit() for c in name) > 3:
                         continue
                     
-                    tags = []
-                    name_lower = name.lower()
-                    if any(word in name_lower for word in ['vegan', 'vegetarian', 'veggie']):
-                        tags.append('vegetarian')
-                    if any(word in name_lower for word in ['spicy', 'hot', 'chili', 'jalapeño']):
-                        tags.append('spicy')
-                    if any(word in name_lower for word in ['chicken', 'beef', 'mutton', 'fish', 'meat', 'lamb']):
-                        tags.append('meat')
+                    tags = self.keyword_matcher.match(name.lower())['tag']
                     
                     items.append(MenuItem(
                         name=name,
@@ -199,6 +373,7 @@ class RestaurantRAG:
                 unique_items.append(item)
         
         self.menu_items = unique_items
+        self._index_menu_items()
         
         if len(unique_items) == 0:
             print("⚠️ WARNING: No menu items found!")
@@ -209,32 +384,169 @@ class RestaurantRAG:
         
         return unique_items
     
-    def process_menu(self, pdf_path: str):
-        """Main processing pipeline"""
+    def chunk_text(self, text: str, items: List[MenuItem]) -> List[str]:
+        """Split menu text into chunks for embedding"""
+        if self.chunk_strategy == "fixed":
+            text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=500,
+                chunk_overlap=50,
+                length_function=len,
+            )
+            return text_splitter.split_text(text)
+        
+        # One chunk per section / item group, no overlap
+        return chunk_menu(text, items)
+    
+    def process_menu(self, pdf_path: str, progress: Optional[Callable[[str, float], None]] = None):
+        """
+        Main processing pipeline
+        
+        Args:
+            pdf_path: Menu PDF
+            progress: Called as progress(stage, fraction_of_stage_done) at every
+                stage (extract, parse, chunk, embed, index); raising from it
+                aborts processing (used for job cancellation)
+        """
         print("📄 Extracting text from PDF...")
-        text = self.extract_text_from_pdf(pdf_path)
+        if progress:
+            progress('extract', 0.0)
+        with self.metrics.span('ingest.extract'):
+            text = self.extract_text_from_pdf(pdf_path)
+        self.process_menu_text(text, progress)
+    
+    def process_menu_text(self, text: str, progress: Optional[Callable[[str, float], None]] = None):
+        """Processing pipeline for already-extracted menu text"""
+        self.menu_version = hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
         
         print("🍽️ Parsing menu items...")
-        items = self.parse_menu_items(text)
+        if progress:
+            progress('parse', 0.0)
+        with self.metrics.span('ingest.parse'):
+            items = self.parse_menu_items(text)
         print(f"✅ Found {len(items)} menu items")
         
         print("✂️ Chunking text...")
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500,
-            chunk_overlap=50,
-            length_function=len,
-        )
-        chunks = text_splitter.split_text(text)
+        if progress:
+            progress('chunk', 0.0)
+        with self.metrics.span('ingest.chunk'):
+            chunks = self.chunk_text(text, items)
         print(f"✅ Created {len(chunks)} text chunks")
         
         print("🧠 Creating embeddings...")
-        self.vectorstore = FAISS.from_texts(
-            texts=chunks,
-            embedding=self.embeddings
-        )
+        with self.metrics.span('ingest.embed'):
+            if progress:
+                # Batches so long menus report progress (and can be cancelled) mid-embedding
+                vectors = []
+                for start in range(0, len(chunks), self.EMBED_BATCH_SIZE):
+                    progress('embed', start / max(len(chunks), 1))
+                    vectors.extend(self.embeddings.embed_documents(chunks[start:start + self.EMBED_BATCH_SIZE]))
+                embeddings = np.asarray(vectors, dtype=np.float32)
+            else:
+                embeddings = np.asarray(self.embeddings.embed_documents(chunks), dtype=np.float32)
+        if progress:
+            progress('index', 0.0)
+        with self.metrics.span('ingest.index'):
+            self._load_index(chunks, embeddings)
         
         print("✅ Menu processed successfully!")
     
+    def _load_index(self, chunks: List[str], embeddings: np.ndarray):
+        """Build FAISS + BM25 indexes from chunk texts and their embedding matrix"""
+        import faiss
+        
+        self.chunks = list(chunks)
+        self.chunk_embeddings = embeddings
+        
+        index = faiss.IndexFlatL2(embeddings.shape[1])
+        index.add(np.ascontiguousarray(embeddings, dtype=np.float32))
+        self.vectorstore = FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=InMemoryDocstore({
+                str(i): Document(page_content=chunk, metadata={"chunk_id": i})
+                for i, chunk in enumerate(self.chunks)
+            }),
+            index_to_docstore_id={i: str(i) for i in range(len(self.chunks))}
+        )
+        
+        print("🔎 Building BM25 index...")
+        self.bm25_index = BM25Index(self.chunks)
+        if self.reranker is not None and isinstance(self.reranker.scorer, LexicalReranker):
+            self.reranker.scorer.idf = self.bm25_index.idf
+    
+    def _index_menu_items(self):
+        """Precompute per-item keyword categories and the name trigram index once per menu load"""
+        self.item_categories = [
+            frozenset(self.keyword_matcher.match(item.name.lower())['item'])
+            for item in self.menu_items
+        ]
+        self.item_resolver = ItemResolver(self.menu_items)
+    
+    def resolve_items(self, text: str, k: int = 5, min_score: float = None) -> List[ItemMatch]:
+        """
+        Map free text (possibly misspelled, e.g. "chiken biriyani") to menu items
+        
+        Returns:
+            Up to k ItemMatch(item=MenuItem, score) - best first
+        """
+        if min_score is None:
+            min_score = self.ITEM_MATCH_MIN_SCORE
+        return self.item_resolver.resolve(text, k=k, min_score=min_score)
+    
+    # ============================================
+    # MENU SNAPSHOTS (fast worker cold start)
+    # ============================================
+    
+    def _embedding_model_name(self) -> str:
+        return getattr(self.embeddings, 'model_name', type(self.embeddings).__name__)
+    
+    def export_snapshot(self, path: str) -> int:
+        """
+        Save the fully processed menu (items, chunks, embeddings) to one file
+        
+        Returns:
+            Snapshot size in bytes
+        """
+        if self.chunk_embeddings is None:
+            raise Exception("Menu not processed yet. Call process_menu() first.")
+        
+        size = write_snapshot(path, MenuSnapshot(
+            items=[asdict(item) for item in self.menu_items],
+            chunks=self.chunks,
+            embeddings=self.chunk_embeddings,
+            metadata={
+                "menu_version": self.menu_version,
+                "embedding_model": self._embedding_model_name(),
+                "chunk_strategy": self.chunk_strategy,
+                "created_at": time.time()
+            }
+        ))
+        print(f"💾 Menu snapshot saved: {path} ({size / 1024:.0f} KB)")
+        return size
+    
+    def load_snapshot(self, path: str, verify: bool = True):
+        """
+        Load a processed menu from a snapshot instead of re-processing the PDF
+        
+        Args:
+            path: Snapshot written by export_snapshot()
+            verify: Check the snapshot checksum
+        """
+        snapshot = read_snapshot(path, verify=verify)
+        
+        snapshot_model = snapshot.metadata.get("embedding_model")
+        if snapshot_model and snapshot_model != self._embedding_model_name():
+            raise SnapshotError(
+                f"Snapshot was embedded with {snapshot_model}, "
+                f"engine uses {self._embedding_model_name()}"
+            )
+        
+        self.menu_items = [MenuItem(**item) for item in snapshot.items]
+        self._index_menu_items()
+        self.menu_version = snapshot.metadata.get("menu_version")
+        self._load_index(snapshot.chunks, snapshot.embeddings)
+        print(f"✅ Menu snapshot loaded: {len(self.menu_items)} items, {len(self.chunks)} chunks")
+    
     # ============================================
     # CALLBACKS
     # ============================================
@@ -248,54 +560,118 @@ class RestaurantRAG:
         """Set callback function to place orders"""
         self.order_callback = callback
         print("✅ Order callback connected")
-    # Add these methods to your RestaurantRAG class
+    # ============================================
+    # PER-TURN QUERY CONTEXT
+    # ============================================
+    
+    def _build_query_context(self,
+                             question: str,
+                             k: int = None,
+                             keyword_hits: Optional[Dict[str, List[str]]] = None) -> QueryContext:
+        """
+        Compute everything a turn needs from the question exactly once:
+        question embedding, retrieved chunks, price limit and keyword matches
+        
+        Args:
+            keyword_hits: keyword_matcher.match() of the question, if already run
+        """
+        if not self.vectorstore:
+            raise Exception("Menu not processed yet. Call process_menu() first.")
+        
+        ctx = QueryContext(question=question, question_lower=question.lower(), metrics=self.metrics)
+        
+        with ctx.timed('embed'):
+            ctx.embedding = self.embeddings.embed_query(question)
+        
+        with ctx.timed('retrieve'):
+            ctx.docs = self._retrieve(question, ctx.embedding, k)
+        
+        with ctx.timed('price_limit'):
+            ctx.price_constraint = extract_price_constraint(question)
+            ctx.price_limit = ctx.price_constraint.max_price
+        
+        with ctx.timed('keywords'):
+            hits = keyword_hits or self.keyword_matcher.match(ctx.question_lower)
+            ctx.wants_to_order = bool(hits['order'])
+            ctx.intent_keywords = hits['intent']
+            ctx.item_categories = hits['item']
+        
+        self.last_query_context = ctx
+        return ctx
+    
+    def _retrieve(self, question: str, embedding: List[float], k: int = None) -> List:
+        """
+        Retrieve menu chunks for a question
+        Hybrid mode fuses BM25 and vector rankings (RRF) and keeps fewer chunks;
+        with a reranker, RERANK_CANDIDATES are scored and only the best chunks
+        within RERANK_TOKEN_BUDGET are kept (k caps their number)
+        """
+        if self.reranker is not None:
+            candidates = self._retrieve_candidates(question, embedding, max(k or 0, self.RERANK_CANDIDATES))
+            with self.metrics.span('query.rerank'):
+                kept = self.reranker.rerank(
+                    question,
+                    [((self.menu_version, doc.metadata["chunk_id"]), doc.page_content) for doc in candidates],
+                    max_chunks=k
+                )
+            docs_by_id = {doc.metadata["chunk_id"]: doc for doc in candidates}
+            return [docs_by_id[chunk_id] for (_, chunk_id), _ in kept]
+        
+        if self.hybrid_retrieval and self.bm25_index:
+            return self._retrieve_candidates(question, embedding, k or self.HYBRID_RETRIEVAL_K)
+        return self._retrieve_candidates(question, embedding, k or self.RETRIEVAL_K)
+    
+    def _retrieve_candidates(self, question: str, embedding: List[float], k: int) -> List:
+        """Top-k chunks by vector similarity, or by BM25 + vector RRF in hybrid mode"""
+        if not (self.hybrid_retrieval and self.bm25_index):
+            return self.vectorstore.similarity_search_by_vector(embedding, k=k)
+        
+        candidates = max(k, self.HYBRID_CANDIDATES)
+        dense_docs = self.vectorstore.similarity_search_by_vector(embedding, k=candidates)
+        dense_ranking = [doc.metadata["chunk_id"] for doc in dense_docs]
+        sparse_ranking = [chunk_id for chunk_id, _ in self.bm25_index.search(question, k=candidates)]
+        
+        docs_by_id = {doc.metadata["chunk_id"]: doc for doc in dense_docs}
+        docs = []
+        for chunk_id, _ in reciprocal_rank_fusion([dense_ranking, sparse_ranking])[:k]:
+            doc = docs_by_id.get(chunk_id)
+            if doc is None:
+                doc = Document(page_content=self.chunks[chunk_id], metadata={"chunk_id": chunk_id})
+            docs.append(doc)
+        return docs
+    
+    def get_metrics(self) -> Dict[str, Dict[str, float]]:
+        """Percentile summary of every ingest/query stage recorded so far"""
+        return self.metrics.snapshot()
+    
+    def get_last_turn_timings(self) -> Dict[str, float]:
+        """Stage timing breakdown (ms) of the most recent turn"""
+        if not self.last_query_context:
+            return {}
+        return dict(self.last_query_context.timings)
 
-    def _detect_intent(self, question: str) -> Dict[str, any]:
+    def _detect_intent(self, question: str, context: Optional[QueryContext] = None) -> Dict[str, any]:
         """
         Detect what user wants to do
         Returns: {
             'intent': 'order' | 'browse' | 'ask',
             'has_budget': bool,
             'budget': float or None,
+            'price_constraint': PriceConstraint (ranges, minimums),
             'keywords': List[str]
         }
         """
-        question_lower = question.lower()
-        
-        # Order intent triggers
-        order_triggers = [
-            'order', 'want', 'get me', 'i need', 'hungry', 
-            'buy', 'purchase', 'add', 'give me'
-        ]
+        if context is None:
+            context = self._build_query_context(question)
         
-        # Check if user wants to order
-        wants_to_order = any(trigger in question_lower for trigger in order_triggers)
-        
-        # Extract budget
-        budget = self._extract_price_limit(question)
-        
-        # Extract food keywords
-        keywords = []
-        food_keywords = {
-            'chicken': ['chicken'],
-            'beef': ['beef'],
-            'mutton': ['mutton', 'lamb'],
-            'fish': ['fish'],
-            'vegetarian': ['vegetarian', 'vegan', 'veggie'],
-            'spicy': ['spicy', 'hot'],
-            'rice': ['rice', 'biryani', 'pulao'],
-            'bread': ['naan', 'roti', 'bread']
-        }
-        
-        for category, words in food_keywords.items():
-            if any(word in question_lower for word in words):
-                keywords.append(category)
+        budget = context.price_limit
         
         return {
-            'intent': 'order' if wants_to_order else 'browse',
+            'intent': 'order' if context.wants_to_order else 'browse',
             'has_budget': budget is not None,
             'budget': budget,
-            'keywords': keywords
+            'price_constraint': context.price_constraint,
+            'keywords': list(context.intent_keywords)
         }
 
     def _auto_select_items(self, intent_data: Dict) -> List[Dict]:
@@ -389,6 +765,11 @@ class RestaurantRAG:
         return selected_items
 
     def query_agentic(self, question: str) -> Dict[str, any]:
+        """Agentic turn (refer-back / order / browse), timed as 'turn.query_agentic'"""
+        with self.metrics.span('turn.query_agentic'):
+            return self._query_agentic(question)
+    
+    def _query_agentic(self, question: str) -> Dict[str, any]:
 
     
         # Add to conversation history
@@ -401,20 +782,24 @@ class RestaurantRAG:
         # ============================================
         # CHECK IF USER IS REFERRING TO PREVIOUS ITEMS
         # ============================================
-        referring_words = ['these', 'those', 'them', 'that', 'it', 'same', 'all']
-        action_words = ['add', 'order', 'want', 'get', 'buy', 'take']
-        
-        question_lower = question.lower()
-        is_referring_back = any(word in question_lower for word in referring_words)
-        wants_action = any(word in question_lower for word in action_words)
+        # One keyword pass for the whole turn (refer-back, order, intent, items)
+        keyword_hits = self.keyword_matcher.match(question.lower())
+        is_referring_back = bool(keyword_hits['refer'])
+        wants_action = bool(keyword_hits['action'])
         
         # If user says "add these/those/them" AND we have previous recommendations
         if is_referring_back and wants_action and self.last_recommended_items:
             print(f"🧠 MEMORY: User referring to previous {len(self.last_recommended_items)} items")
             
+            # "add the biryani" → only the named recommendation(s), else all of them
+            named = ItemResolver(self.last_recommended_items, key=lambda item: item['name']).resolve(
+                question, k=len(self.last_recommended_items), min_score=self.REFER_BACK_MIN_SCORE
+            )
+            to_add = [match.item for match in named] or self.last_recommended_items
+            
             # AUTO-ADD the previously recommended items
             added_items = []
-            for item in self.last_recommended_items:
+            for item in to_add:
                 if self.cart_callback:
                     self.cart_callback(item['name'], item['price'])
                     added_items.append(item)
@@ -455,11 +840,12 @@ class RestaurantRAG:
         # ============================================
         # DETECT INTENT
         # ============================================
-        intent = self._detect_intent(question)
+        # One retrieval plan for the whole turn (embedding, chunks, budget, keywords)
+        ctx = self._build_query_context(question, keyword_hits=keyword_hits)
+        intent = self._detect_intent(question, ctx)
         
         # Get vector search context
-        docs = self.vectorstore.similarity_search(question, k=3)
-        menu_context = "\n".join([doc.page_content for doc in docs])
+        docs = ctx.docs[:3]
         
         # ============================================
         # INTENT: USER WANTS TO ORDER
@@ -506,10 +892,13 @@ class RestaurantRAG:
             # Clear recommendations since we auto-added
             self.last_recommended_items = []
             
+            recommendations = self._get_relevant_items(question, None, ctx)
+            print(f"⏱️ Turn timings: {ctx.format_timings()}")
+            
             return {
                 "answer": answer,
                 "source_documents": docs,
-                "recommendations": self._get_relevant_items(question, None),
+                "recommendations": recommendations,
                 "actions_taken": [item['name'] for item in selected_items],
                 "agentic": True,
                 "auto_added": True
@@ -521,11 +910,11 @@ class RestaurantRAG:
         else:
             print(f"📖 BROWSE INTENT: Showing recommendations, storing for memory")
             
-            # Get normal query response
-            result = self.query(question)
+            # Get normal query response (reuses this turn's retrieval plan)
+            result = self.query(question, context=ctx)
             
             # Store recommended items for next turn
-            recommended = self._get_relevant_items(question, intent.get('budget'))
+            recommended = self._get_relevant_items(question, intent.get('budget'), ctx)
             self.last_recommended_items = recommended
             
             # Add to conversation context
@@ -536,6 +925,7 @@ class RestaurantRAG:
             })
             
             print(f"💾 STORED {len(recommended)} items in memory: {[i['name'] for i in recommended[:3]]}")
+            print(f"⏱️ Turn timings: {ctx.format_timings()}")
             
             # Return with stored recommendations
             return {
@@ -547,28 +937,43 @@ class RestaurantRAG:
     # SIMPLIFIED QUERY (NO AGENT - WORKING)
     # ============================================
     
-    def query(self, question: str) -> Dict[str, any]:
+    def query(self, question: str, context: Optional[QueryContext] = None) -> Dict[str, any]:
         """
         Simple working query with Gemini
         NO agent/function calling - just works!
+        
+        Args:
+            question: Customer question
+            context: Retrieval plan already built for this turn (built here if omitted)
         """
+        with self.metrics.span('turn.query'):
+            return self._query(question, context)
+    
+    def _query(self, question: str, context: Optional[QueryContext] = None) -> Dict[str, any]:
+        """query() body, timed as 'turn.query'"""
         
         if not self.vectorstore:
             raise Exception("Menu not processed yet. Call process_menu() first.")
         
+        ctx = context
         try:
-            # Get relevant menu context from vector store
-            docs = self.vectorstore.similarity_search(question, k=4)
-            menu_context = "\n\n".join([doc.page_content for doc in docs])
+            if ctx is None:
+                ctx = self._build_query_context(question)
             
-            # Build menu items list for context
-            menu_items_text = "\n".join([
-                f"- {item.name}: Rs {item.price} {('(' + ', '.join(item.tags) + ')') if item.tags else ''}"
-                for item in self.menu_items[:30]
-            ])
+            # Get relevant menu context from vector store
+            docs = ctx.docs
             
-            # Create prompt
-            prompt = f"""You are a helpful restaurant assistant. Answer customer questions about the menu.
+            with ctx.timed('prompt'):
+                menu_context = "\n\n".join([doc.page_content for doc in docs])
+                
+                # Build menu items list for context
+                menu_items_text = "\n".join([
+                    f"- {item.name}: Rs {item.price} {('(' + ', '.join(item.tags) + ')') if item.tags else ''}"
+                    for item in self.menu_items[:30]
+                ])
+                
+                # Create prompt
+                prompt = f"""You are a helpful restaurant assistant. Answer customer questions about the menu.
 
 MENU CONTEXT FROM PDF:
 {menu_context}
@@ -589,11 +994,14 @@ INSTRUCTIONS:
 Your answer:"""
 
             # Call Gemini (CORRECT way with modern SDK)
-            response = self.gemini_model.generate_content(prompt)
-            answer = response.text
+            with ctx.timed('generate'):
+                answer = self._generate_answer(question, prompt)
             
             # Get recommendations for display
-            recommendations = self._get_relevant_items(question, None)
+            recommendations = self._get_relevant_items(question, None, ctx)
+            
+            if context is None:
+                print(f"⏱️ Turn timings: {ctx.format_timings()}")
             
             # Save to history
             self.customer_memory['chat_history'].append({
@@ -621,7 +1029,7 @@ Your answer:"""
             return {
                 "answer": f"Sorry, I encountered an error: {str(e)}. Please try rephrasing your question.",
                 "source_documents": [],
-                "recommendations": self._get_relevant_items(question, None)[:3],
+                "recommendations": self._get_relevant_items(question, None, ctx)[:3],
                 "actions_taken": [],
                 "agentic": False
             }
@@ -630,61 +1038,107 @@ Your answer:"""
     # HELPER METHODS
     # ============================================
     
-    def _get_relevant_items(self, question: str, price_limit: Optional[float] = None) -> List[Dict]:
+    def _coalescing_key(self, question: str) -> str:
+        """Key for sharing identical in-flight questions against the same menu"""
+        return f"{self.model}:{self.menu_version}:{normalize_question(question)}"
+    
+    def _generate_answer(self, question: str, prompt: str) -> str:
+        """Call Gemini, sharing one call among concurrent identical questions"""
+        return self.llm_coalescer.do(
+            self._coalescing_key(question),
+            lambda: self.gemini_model.generate_content(prompt).text
+        )
+    
+    async def _generate_answer_async(self, question: str, prompt: str) -> str:
+        """Async variant of _generate_answer for asyncio callers"""
+        async def call():
+            response = await self.gemini_model.generate_content_async(prompt)
+            return response.text
+        
+        return await self.llm_coalescer.do_async(self._coalescing_key(question), call)
     
+    def get_coalescing_stats(self) -> Dict:
+        """How many Gemini calls were saved by request coalescing"""
+        return self.llm_coalescer.get_stats()
+    
+    def _get_relevant_items(self,
+                            question: str,
+                            price_limit: Optional[float] = None,
+                            context: Optional[QueryContext] = None) -> List[Dict]:
+        """
+        Match menu items to the question (memoized per turn when a context is given)
+        """
         if not self.menu_items:
             return []
         
-        question_lower = question.lower()
-        relevant_items = []
-        
-        keywords = {
-            'chicken': ['chicken'],
-            'beef': ['beef'],
-            'mutton': ['mutton', 'lamb'],
-            'fish': ['fish', 'seafood'],
-            'vegan': ['vegan', 'vegetarian'],
-            'spicy': ['spicy', 'hot'],
-            'rice': ['rice', 'biryani', 'pulao'],
-            'bread': ['bread', 'naan', 'roti'],
-            'drink': ['drink', 'juice', 'coffee', 'tea', 'lassi'],
-            'dessert': ['dessert', 'sweet', 'ice cream', 'cake']
-        }
+        if context is None:
+            question_lower = question.lower()
+            categories = self.keyword_matcher.match(question_lower)['item']
+            constraint = extract_price_constraint(question)
+            return self._match_relevant_items(
+                question_lower,
+                price_limit or constraint.max_price,
+                categories,
+                constraint.min_price
+            )
         
         # Extract price limit from question if mentioned
         if not price_limit:
-            price_limit = self._extract_price_limit(question)
+            price_limit = context.price_limit
         
-        for item in self.menu_items:
-            item_name_lower = item.name.lower()
-            
-            # Price filter FIRST
-            if price_limit and item.price > price_limit:
-                continue
-            
-            # Check if question directly mentions this item
-            if any(word in question_lower for word in item_name_lower.split()):
+        if price_limit not in context.relevant_items:
+            with context.timed('relevant_items'):
+                context.relevant_items[price_limit] = self._match_relevant_items(
+                    context.question_lower, price_limit, context.item_categories,
+                    context.price_constraint.min_price
+                )
+        return list(context.relevant_items[price_limit])
+    
+    def _match_relevant_items(self,
+                              question_lower: str,
+                              price_limit: Optional[float],
+                              categories: List[str],
+                              min_price: Optional[float] = None) -> List[Dict]:
+        """
+        Items named in the question (typo-tolerant, best match first),
+        then items sharing a keyword category with it (menu order)
+        """
+        relevant_items = []
+        categories = frozenset(categories)
+        if len(self.item_categories) != len(self.menu_items):
+            self._index_menu_items()  # menu_items replaced directly
+        
+        def within_budget(item):
+            if min_price and item.price < min_price:
+                return False
+            return not price_limit or item.price <= price_limit
+        
+        # Check if question directly mentions this item
+        named = set()
+        for match in self.resolve_items(question_lower, k=len(self.menu_items)):
+            if within_budget(match.item):
+                named.add(id(match.item))
                 relevant_items.append({
-                    "name": item.name, 
-                    "price": item.price,
-                    "tags": item.tags
+                    "name": match.item.name,
+                    "price": match.item.price,
+                    "tags": match.item.tags
                 })
-                continue
-            
-            # Check keyword categories
-            for category, words in keywords.items():
-                if any(word in question_lower for word in words):
-                    if any(word in item_name_lower for word in words):
-                        relevant_items.append({
-                            "name": item.name,
-                            "price": item.price,
-                            "tags": item.tags
-                        })
-                        break
+                if len(relevant_items) >= 6:
+                    return relevant_items
         
-        # Apply price filter if specified
-        if price_limit:
-            relevant_items = [item for item in relevant_items if item['price'] <= price_limit]
+        # Keyword categories shared by the question and the item name
+        if categories:
+            for item, item_categories in zip(self.menu_items, self.item_categories):
+                if id(item) in named or not within_budget(item):
+                    continue
+                if not categories.isdisjoint(item_categories):
+                    relevant_items.append({
+                        "name": item.name,
+                        "price": item.price,
+                        "tags": item.tags
+                    })
+                    if len(relevant_items) >= 6:
+                        break
         
         # If no specific matches, return popular items
         if not relevant_items:
@@ -700,21 +1154,8 @@ Your answer:"""
         return relevant_items[:6]
     
     def _extract_price_limit(self, question: str) -> Optional[float]:
-        """Extract price limit from question"""
-        patterns = [
-            r'under\s+(?:Rs\.?\s*|PKR\s*)?(\d+)',
-            r'below\s+(?:Rs\.?\s*|PKR\s*)?(\d+)',
-            r'less than\s+(?:Rs\.?\s*|PKR\s*)?(\d+)',
-            r'maximum\s+(?:Rs\.?\s*|PKR\s*)?(\d+)',
-            r'(?:Rs\.?\s*|PKR\s*)?(\d+)\s+budget',
-            r'budget.*?(?:Rs\.?\s*|PKR\s*)?(\d+)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, question.lower())
-            if match:
-                return float(match.group(1))
-        return None
+        """Extract price limit from question (upper bound of the price constraint)"""
+        return extract_price_constraint(question).max_price
     
     def reset_conversation(self):
         """Reset conversation memory"""
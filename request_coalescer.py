@@ -0,0 +1,192 @@
+"""
+Request Coalescing (Single-Flight)
+Concurrent identical requests share ONE provider call
+"""
+
+import asyncio
+import re
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a customer question so trivially different copies share a key"""
+    normalized = re.sub(r'\s+', ' ', question.lower()).strip()
+    return normalized.rstrip('?!. ')
+
+
+class _InFlightCall:
+    """A provider call that other callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Single-flight request coalescer
+
+    Features:
+    - First caller for a key runs the provider call (the leader)
+    - Concurrent callers with the same key wait and share its result
+    - Works from threads (Flask) and from asyncio coroutines
+    - Metrics for how many provider calls were saved
+    """
+
+    def __init__(self):
+        """Initialize coalescer"""
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _InFlightCall] = {}
+        self._async_calls: Dict[tuple, asyncio.Future] = {}
+        self._stats = {
+            "requests": 0,
+            "provider_calls": 0,
+            "coalesced": 0,
+            "errors": 0,
+        }
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once per key among concurrent threaded callers
+
+        Args:
+            key: Coalescing key (e.g. menu version + normalized question)
+            fn: Zero-argument provider call
+
+        Returns:
+            The (shared) result of fn; exceptions are re-raised to every waiter
+        """
+        with self._lock:
+            self._stats["requests"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                call = _InFlightCall()
+                self._calls[key] = call
+                self._stats["provider_calls"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            # Forget the key BEFORE waking waiters so later requests start fresh
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+        return call.result
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run the coroutine factory once per key among concurrent async callers
+
+        Args:
+            key: Coalescing key
+            fn: Zero-argument callable returning an awaitable provider call
+
+        Returns:
+            The (shared) result of the awaitable
+        """
+        loop = asyncio.get_running_loop()
+        # Futures belong to a single event loop, so keys are scoped per loop
+        loop_key = (id(loop), key)
+
+        with self._lock:
+            self._stats["requests"] += 1
+            future = self._async_calls.get(loop_key)
+            if future is not None:
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                future = loop.create_future()
+                self._async_calls[loop_key] = future
+                self._stats["provider_calls"] += 1
+                leader = True
+
+        if not leader:
+            # shield() so one cancelled waiter does not cancel everyone's result
+            return await asyncio.shield(future)
+
+        try:
+            result = await fn()
+        except BaseException as e:
+            with self._lock:
+                self._stats["errors"] += 1
+                self._async_calls.pop(loop_key, None)
+            if not future.done():
+                future.set_exception(e)
+                # Mark retrieved so asyncio does not warn when nobody waited
+                future.exception()
+            raise
+
+        with self._lock:
+            self._async_calls.pop(loop_key, None)
+        future.set_result(result)
+        return result
+
+    def get_stats(self) -> Dict:
+        """Get coalescing metrics"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls) + len(self._async_calls)
+        requests = stats["requests"]
+        stats["saved_ratio"] = stats["coalesced"] / requests if requests else 0
+        return stats
+
+    def reset_stats(self):
+        """Reset coalescing metrics"""
+        with self._lock:
+            for key in self._stats:
+                self._stats[key] = 0
+
+
+# Example usage
+if __name__ == "__main__":
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    print("🧪 Testing SingleFlight...\n")
+
+    flight = SingleFlight()
+
+    def slow_provider():
+        time.sleep(0.2)
+        return "Chicken Biryani is Rs 650"
+
+    key = "v1:" + normalize_question("  What is the price of BIRYANI? ")
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        results = list(pool.map(lambda _: flight.do(key, slow_provider), range(20)))
+
+    assert len(set(results)) == 1
+    print(f"✅ Threaded: {flight.get_stats()}")
+
+    async def async_demo():
+        async def provider():
+            await asyncio.sleep(0.2)
+            return "Mango Lassi is Rs 200"
+
+        return await asyncio.gather(*[flight.do_async("v1:lassi", provider) for _ in range(20)])
+
+    flight.reset_stats()
+    answers = asyncio.run(async_demo())
+    assert len(set(answers)) == 1
+    print(f"✅ Async: {flight.get_stats()}")
+
+    print("\n✅ All tests passed!")
@@ -0,0 +1,265 @@
+"""
+Local Chunk Reranking
+Optional CPU stage after retrieval: score a wide candidate set (~20 chunks)
+against the question and keep only the best ones that fit a prompt token
+budget - shorter prompts, faster generation.
+
+Scorers:
+- LexicalReranker: IDF-weighted term overlap, best-line focus and bigram
+  bonus (pure Python, microseconds per chunk)
+- CrossEncoderReranker: a small sentence-transformers cross-encoder
+  (e.g. ms-marco-MiniLM-L-6-v2, ~5 ms per chunk on CPU)
+
+Scores are cached per (question hash, chunk id), so repeated questions
+skip scoring entirely.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from bm25_index import tokenize
+from request_coalescer import normalize_question
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt-token estimate (~4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+def question_hash(question: str) -> str:
+    """Cache key of a question (normalized, so trivial variants share scores)"""
+    return hashlib.sha1(normalize_question(question).encode("utf-8")).hexdigest()[:16]
+
+
+class RerankCache:
+    """Thread-safe LRU of rerank scores keyed by (question hash, chunk key)"""
+
+    def __init__(self, max_entries: int = 50000):
+        self.max_entries = max_entries
+        self._scores: "OrderedDict[Tuple[str, Hashable], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, question_key: str, chunk_keys: Sequence[Hashable]) -> Dict[Hashable, float]:
+        found = {}
+        with self._lock:
+            for chunk_key in chunk_keys:
+                score = self._scores.get((question_key, chunk_key))
+                if score is not None:
+                    self._scores.move_to_end((question_key, chunk_key))
+                    found[chunk_key] = score
+            self.hits += len(found)
+            self.misses += len(chunk_keys) - len(found)
+        return found
+
+    def put_many(self, question_key: str, scores: Dict[Hashable, float]):
+        with self._lock:
+            for chunk_key, score in scores.items():
+                self._scores[(question_key, chunk_key)] = score
+            while len(self._scores) > self.max_entries:
+                self._scores.popitem(last=False)
+
+    def get_stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._scores),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+class LexicalReranker:
+    """
+    Lexical relevance scorer
+
+    score = IDF-weighted share of question terms in the chunk
+          + the same for the single best line (menu items are one line each)
+          + a bonus per question bigram found verbatim ("chicken biryani")
+    """
+
+    name = "lexical"
+
+    def __init__(self, idf: Optional[Dict[str, float]] = None, default_idf: float = 1.0):
+        """
+        Args:
+            idf: Term → inverse document frequency (e.g. BM25Index.idf)
+            default_idf: Weight of terms missing from `idf`
+        """
+        self.idf = idf or {}
+        self.default_idf = default_idf
+
+    def score(self, question: str, chunks: Sequence[str]) -> List[float]:
+        terms = list(dict.fromkeys(tokenize(question)))
+        if not terms:
+            return [0.0] * len(chunks)
+        weights = {term: self.idf.get(term, self.default_idf) for term in terms}
+        total = sum(weights.values()) or 1.0
+        bigrams = [f"{a} {b}" for a, b in zip(terms, terms[1:])]
+
+        scores = []
+        for chunk in chunks:
+            chunk_lower = chunk.lower()
+            chunk_terms = set(tokenize(chunk_lower))
+            coverage = sum(weights[term] for term in terms if term in chunk_terms) / total
+
+            best_line = 0.0
+            if coverage:
+                for line in chunk_lower.splitlines():
+                    line_terms = set(tokenize(line))
+                    line_score = sum(weights[term] for term in terms if term in line_terms)
+                    if line_score > best_line:
+                        best_line = line_score
+            phrase = sum(1 for bigram in bigrams if bigram in chunk_lower)
+            scores.append(coverage + best_line / total + 0.25 * phrase)
+        return scores
+
+
+class CrossEncoderReranker:
+    """sentence-transformers cross-encoder scorer (CPU)"""
+
+    name = "cross-encoder"
+
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2", batch_size: int = 32):
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError:
+            raise Exception("Please install: pip install sentence-transformers")
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.model = CrossEncoder(model_name, device="cpu")
+
+    def score(self, question: str, chunks: Sequence[str]) -> List[float]:
+        if not chunks:
+            return []
+        pairs = [(question, chunk) for chunk in chunks]
+        return [float(score) for score in self.model.predict(pairs, batch_size=self.batch_size)]
+
+
+def select_within_budget(ranked: Sequence[Tuple[float, str]],
+                         token_budget: int,
+                         max_chunks: int,
+                         min_relative_score: float = 0.2) -> List[int]:
+    """
+    Positions of the best chunks that fit the budget
+
+    Args:
+        ranked: (score, text) pairs, best first
+        token_budget: Max estimated prompt tokens for all kept chunks
+        max_chunks: Max chunks kept
+        min_relative_score: Drop chunks scoring below this share of the best score
+
+    Returns:
+        Indexes into `ranked` (the top chunk is always kept)
+    """
+    if not ranked:
+        return []
+    top_score = ranked[0][0]
+    keep, used = [0], estimate_tokens(ranked[0][1])
+    for position in range(1, len(ranked)):
+        if len(keep) >= max_chunks:
+            break
+        score, text = ranked[position]
+        if top_score > 0 and score < top_score * min_relative_score:
+            break
+        tokens = estimate_tokens(text)
+        if used + tokens <= token_budget:
+            keep.append(position)
+            used += tokens
+    return keep
+
+
+class ChunkReranker:
+    """
+    Scorer + score cache + token-budget selection
+
+    Usage:
+        reranker = ChunkReranker(LexicalReranker(bm25.idf), token_budget=300)
+        kept = reranker.rerank(question, [(chunk_key, text), ...])  # [(chunk_key, score), ...]
+    """
+
+    def __init__(self, scorer, token_budget: int = 300, max_chunks: int = 4,
+                 min_relative_score: float = 0.2, cache: Optional[RerankCache] = None):
+        self.scorer = scorer
+        self.token_budget = token_budget
+        self.max_chunks = max_chunks
+        self.min_relative_score = min_relative_score
+        self.cache = cache if cache is not None else RerankCache()
+
+    def rerank(self, question: str, candidates: Sequence[Tuple[Hashable, str]],
+               max_chunks: Optional[int] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Args:
+            question: Customer question
+            candidates: (chunk_key, chunk_text) pairs - chunk_key must be unique
+                per menu (e.g. (menu_version, chunk_id))
+            max_chunks: Override the configured max_chunks for this call
+
+        Returns:
+            Kept (chunk_key, score) pairs, best first
+        """
+        if not candidates:
+            return []
+        question_key = question_hash(question)
+        keys = [key for key, _ in candidates]
+        scores = self.cache.get_many(question_key, keys)
+
+        missing = [(key, text) for key, text in candidates if key not in scores]
+        if missing:
+            fresh = dict(zip(
+                [key for key, _ in missing],
+                self.scorer.score(question, [text for _, text in missing])
+            ))
+            self.cache.put_many(question_key, fresh)
+            scores.update(fresh)
+
+        # Stable: ties keep retrieval order
+        order = sorted(range(len(candidates)), key=lambda i: -scores[keys[i]])
+        ranked = [(scores[keys[i]], candidates[i][1]) for i in order]
+        kept = select_within_budget(ranked, self.token_budget, max_chunks or self.max_chunks,
+                                    self.min_relative_score)
+        return [(keys[order[position]], ranked[position][0]) for position in kept]
+
+
+def create_reranker(kind: str, idf: Optional[Dict[str, float]] = None, **kwargs) -> ChunkReranker:
+    """
+    Args:
+        kind: 'lexical' or 'cross-encoder'
+        idf: Term IDF for the lexical scorer
+        **kwargs: ChunkReranker options (token_budget, max_chunks, ...)
+    """
+    if kind == "lexical":
+        scorer = LexicalReranker(idf)
+    elif kind == "cross-encoder":
+        scorer = CrossEncoderReranker()
+    else:
+        raise ValueError(f"Unknown reranker: {kind} (use 'lexical' or 'cross-encoder')")
+    return ChunkReranker(scorer, **kwargs)
+
+
+# Example usage
+if __name__ == "__main__":
+    print("🧪 Testing Reranker...\n")
+
+    chunks = [
+        "DRINKS\nMango Lassi Rs 280\nSweet Lassi Rs 220\nCold Coffee Rs 340",
+        "RICE\nChicken Biryani Rs 650\nMutton Biryani Rs 890\nVegetable Pulao Rs 520",
+        "BBQ\nChicken Tikka Rs 720\nSeekh Kebab Rs 680\nMalai Boti Rs 850",
+        "MAIN COURSE\nChicken Karahi Rs 1450\nMutton Karahi Rs 2200\nBeef Nihari Rs 980",
+    ]
+    reranker = ChunkReranker(LexicalReranker(), token_budget=40, max_chunks=3)
+    candidates = [(("menu", i), text) for i, text in enumerate(chunks)]
+
+    kept = reranker.rerank("How much is the chicken biryani?", candidates)
+    assert kept[0][0] == ("menu", 1), kept
+    assert sum(estimate_tokens(chunks[key[1]]) for key, _ in kept) <= 40 or len(kept) == 1
+    print(f"✅ Kept {[key[1] for key, _ in kept]} (budget 40 tokens)")
+
+    reranker.rerank("how much is the chicken biryani", candidates)
+    assert reranker.cache.get_stats()["hits"] == len(chunks)
+    print(f"✅ Cache: {reranker.cache.get_stats()}")
+
+    print("\n✅ All tests passed!")
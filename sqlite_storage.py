@@ -0,0 +1,539 @@
+"""
+SQLite Storage Backend
+All data in one local SQLite file, for single-box deployments that do not
+want to run MongoDB (DATABASE_BACKEND=sqlite, SQLITE_PATH=restaurant.db).
+
+- WAL journal: readers never block the writer or each other, so the
+  webhook server's threads can poll orders while payments come in
+- One connection per thread (sqlite3 connections are not thread-safe)
+- Each document is stored whole as JSON next to the columns queries
+  filter and sort on; the indexes mirror Database.INDEXES
+- Analytics are one SQL aggregation over the window (json_each for items)
+  instead of MongoDB rollups
+
+Datetimes are stored as ISO strings ({"$date": ...} inside documents), so
+documents come back exactly as MongoDB would return them.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from analytics_rollups import REVENUE_STATUSES
+from config import config
+from event_writer import BufferedEventWriter
+from storage import StorageBackend, decode_page_token, project
+
+# Bump with every SCHEMA change (recorded in PRAGMA user_version)
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    order_id TEXT PRIMARY KEY,
+    customer_phone TEXT,
+    status TEXT,
+    created_at TEXT NOT NULL,
+    total NUMERIC,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS orders_customer_created
+    ON orders (customer_phone, created_at DESC, order_id DESC);
+CREATE INDEX IF NOT EXISTS orders_status_created
+    ON orders (status, created_at DESC, order_id DESC);
+CREATE INDEX IF NOT EXISTS orders_created ON orders (created_at);
+
+CREATE TABLE IF NOT EXISTS customers (
+    phone TEXT PRIMARY KEY,
+    customer_id TEXT UNIQUE,
+    doc TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS payments (
+    payment_id TEXT PRIMARY KEY,
+    order_id TEXT,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS payments_order ON payments (order_id);
+
+CREATE TABLE IF NOT EXISTS analytics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_type TEXT,
+    timestamp TEXT,
+    data TEXT
+);
+"""
+
+# Columns order filters may use (everything else lives only in the JSON)
+ORDER_COLUMNS = ("order_id", "customer_phone", "status")
+
+
+# ==================== JSON ENCODING ====================
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"$date": sql_time(value)}
+    raise TypeError(f"Cannot store {type(value).__name__} in SQLite document")
+
+
+def _decode_object(obj: Dict):
+    if len(obj) == 1 and "$date" in obj:
+        return datetime.fromisoformat(obj["$date"])
+    return obj
+
+
+def dumps(document: Dict) -> str:
+    return json.dumps(document, default=_encode_value, ensure_ascii=False)
+
+
+def loads(text: str) -> Dict:
+    return json.loads(text, object_hook=_decode_object)
+
+
+def sql_time(value: datetime) -> str:
+    """Fixed-width ISO timestamp (sorts as text in time order)"""
+    return value.isoformat(timespec="microseconds")
+
+
+def _where(query: Dict) -> Tuple[str, List]:
+    """SQL WHERE clause for an equality / $in order filter"""
+    clauses, params = [], []
+    for field, condition in query.items():
+        if field not in ORDER_COLUMNS:
+            raise ValueError(f"Unsupported order filter field: {field}")
+        if isinstance(condition, dict):
+            if set(condition) != {"$in"}:
+                raise ValueError(f"Unsupported filter on {field}: {condition}")
+            values = list(condition["$in"])
+            clauses.append(f"{field} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        else:
+            clauses.append(f"{field} = ?")
+            params.append(condition)
+    return " AND ".join(clauses) or "1", params
+
+
+class _EventTable:
+    """insert_many sink for BufferedEventWriter"""
+
+    def __init__(self, storage: "SQLiteStorage"):
+        self.storage = storage
+
+    def insert_many(self, events: List[Dict], ordered: bool = True):
+        self.storage._insert_events(events)
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    SQLite (WAL) storage backend
+
+    Usage:
+        db = SQLiteStorage("restaurant.db")
+        db.create_order({...})
+        db.get_analytics(days=7)
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str = None, busy_timeout_ms: int = 5000):
+        """
+        Args:
+            path: Database file (default: config.SQLITE_PATH; must be a
+                file - every thread opens its own connection to it)
+            busy_timeout_ms: How long a writer waits for another one
+        """
+        self.path = path or config.SQLITE_PATH
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        self.schema_state = self._migrate()
+        print(f"✅ SQLite storage ready: {self.path}")
+
+        # Analytics events are written behind the request path
+        self.event_writer = None
+        if config.ANALYTICS_BUFFERED:
+            self.event_writer = BufferedEventWriter(
+                _EventTable(self),
+                max_queue=config.ANALYTICS_QUEUE_SIZE,
+                batch_size=config.ANALYTICS_BATCH_SIZE,
+                flush_interval=config.ANALYTICS_FLUSH_SECONDS,
+                full_policy=config.ANALYTICS_FULL_POLICY
+            )
+
+    # ==================== CONNECTIONS ====================
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection (autocommit; WAL)"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+            connection.execute("PRAGMA journal_mode = WAL")
+            # WAL + NORMAL: durable across app crashes, fsync only at checkpoints
+            connection.execute("PRAGMA synchronous = NORMAL")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def _migrate(self) -> str:
+        """Create tables / indexes only when the file's schema version is older"""
+        connection = self._connection()
+        if connection.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return "current"
+        connection.executescript(SCHEMA)
+        connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        return "applied"
+
+    def _update_document(self, table: str, key_column: str, key: str, fields: Dict,
+                         upsert: bool = False, status_in: Optional[List[str]] = None,
+                         push: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        $set `fields` (and $push `push`) on one document inside a write transaction
+
+        Args:
+            status_in: Only update if the row's status is one of these (orders)
+
+        Returns:
+            The document as it was before (None if it did not exist / match)
+        """
+        where, params = f"{key_column} = ?", [key]
+        if status_in is not None:
+            where += f" AND status IN ({', '.join('?' * len(status_in))})"
+            params += list(status_in)
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(f"SELECT doc FROM {table} WHERE {where}", params).fetchone()
+            previous = loads(row[0]) if row else None
+            if previous is not None:
+                document = {**previous, **fields}
+                for field, value in (push or {}).items():
+                    document[field] = [*previous.get(field, []), value]
+                self._write_document(connection, table, document, replace=True)
+            elif upsert:
+                self._write_document(connection, table, fields)
+            connection.execute("COMMIT")
+            return previous
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _write_document(connection: sqlite3.Connection, table: str, document: Dict,
+                        replace: bool = False):
+        verb = "INSERT OR REPLACE" if replace else "INSERT"
+        if table == "orders":
+            connection.execute(
+                f"{verb} INTO orders (order_id, customer_phone, status, created_at, total, doc)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (document["order_id"], document.get("customer_phone"), document.get("status"),
+                 sql_time(document["created_at"]), document.get("total"), dumps(document))
+            )
+        elif table == "customers":
+            connection.execute(
+                f"{verb} INTO customers (phone, customer_id, doc) VALUES (?, ?, ?)",
+                (document["phone"], document.get("customer_id"), dumps(document))
+            )
+        else:
+            connection.execute(
+                f"{verb} INTO payments (payment_id, order_id, doc) VALUES (?, ?, ?)",
+                (document["payment_id"], document.get("order_id"), dumps(document))
+            )
+
+    def _find_one(self, table: str, key_column: str, key: str, projection=None) -> Optional[Dict]:
+        row = self._connection().execute(
+            f"SELECT doc FROM {table} WHERE {key_column} = ?", (key,)
+        ).fetchone()
+        return project(loads(row[0]), self._projection(projection)) if row else None
+
+    # ==================== ORDERS ====================
+
+    def create_order(self, order_data: Dict) -> str:
+        """Create new order (sqlite3.IntegrityError on a duplicate order_id)"""
+        try:
+            order_data['created_at'] = datetime.now()
+            order_data['updated_at'] = datetime.now()
+            self._write_document(self._connection(), "orders", order_data)
+            print(f"✅ Order created: {order_data['order_id']}")
+            return order_data['order_id']
+        except Exception as e:
+            print(f"❌ Error creating order: {e}")
+            raise
+
+    def get_order(self, order_id: str, projection=None) -> Optional[Dict]:
+        """Get order by ID (projection: see Database.get_order)"""
+        try:
+            return self._find_one("orders", "order_id", order_id, projection)
+        except Exception as e:
+            print(f"❌ Error fetching order: {e}")
+            return None
+
+    def transition_order_status(self, order_id: str, new_status: str,
+                                from_statuses: Optional[List[str]] = None,
+                                **kwargs) -> Optional[Dict]:
+        """Move an order to `new_status` if its status allows it (see StorageBackend)"""
+        try:
+            if from_statuses is None:
+                from_statuses = self.allowed_previous(new_status)
+            update_data, entry = self._status_update(new_status, kwargs)
+
+            previous = self._update_document("orders", "order_id", order_id, update_data,
+                                             status_in=from_statuses,
+                                             push={"status_history": entry})
+            if previous is None:
+                print(f"⚠️ Order {order_id}: {new_status} rejected (missing or not from {from_statuses})")
+                return None
+            print(f"✅ Order {order_id} status: {previous.get('status')} → {new_status}")
+            return project(previous, self.TRANSITION_PROJECTION)
+        except Exception as e:
+            # Not None: that means missing / rejected, and this is neither
+            print(f"❌ Error updating order: {e}")
+            raise
+
+    def _order_page_cursor(self, query: Dict, page_size: int, page_token: Optional[str],
+                           projection=None) -> List[Dict]:
+        where, params = _where(query)
+        if page_token:
+            created_at, order_id = decode_page_token(page_token)
+            # Same shape as the MongoDB keyset: the <= bound keeps it an index range
+            where += " AND created_at <= ? AND (created_at < ? OR order_id < ?)"
+            params += [sql_time(created_at), sql_time(created_at), order_id]
+        rows = self._connection().execute(
+            f"SELECT doc FROM orders WHERE {where}"
+            " ORDER BY created_at DESC, order_id DESC LIMIT ?",
+            params + [page_size + 1]
+        )
+        fields = self._page_projection(projection)
+        return [project(loads(doc), fields) for (doc,) in rows]
+
+    def _iter_orders(self, query: Dict, batch_size: int, projection=None) -> Iterator[Dict]:
+        where, params = _where(query)
+        cursor = self._connection().execute(
+            f"SELECT doc FROM orders WHERE {where} ORDER BY created_at DESC, order_id DESC",
+            params
+        )
+        fields = self._projection(projection)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for (doc,) in rows:
+                    yield project(loads(doc), fields)
+        finally:
+            cursor.close()
+
+    # ==================== CUSTOMERS ====================
+
+    def create_customer(self, customer_data: Dict) -> str:
+        """Create or update customer profile"""
+        try:
+            customer_data['created_at'] = datetime.now()
+            customer_data['updated_at'] = datetime.now()
+            self._update_document("customers", "phone", customer_data['phone'], customer_data,
+                                  upsert=True)
+            print(f"✅ Customer profile updated: {customer_data['phone']}")
+            return customer_data['phone']
+        except Exception as e:
+            print(f"❌ Error creating customer: {e}")
+            raise
+
+    def get_customer(self, phone: str, projection=None) -> Optional[Dict]:
+        """Get customer by phone"""
+        try:
+            return self._find_one("customers", "phone", phone, projection)
+        except Exception as e:
+            print(f"❌ Error fetching customer: {e}")
+            return None
+
+    def update_customer_preferences(self, phone: str, preferences: Dict) -> bool:
+        """Update customer preferences"""
+        try:
+            previous = self._update_document("customers", "phone", phone, {
+                "preferences": preferences,
+                "updated_at": datetime.now()
+            })
+            return previous is not None
+        except Exception as e:
+            print(f"❌ Error updating preferences: {e}")
+            return False
+
+    # ==================== PAYMENTS ====================
+
+    def create_payment(self, payment_data: Dict) -> str:
+        """Record payment transaction"""
+        try:
+            payment_data['created_at'] = datetime.now()
+            self._write_document(self._connection(), "payments", payment_data)
+            print(f"✅ Payment recorded: {payment_data['payment_id']}")
+            return payment_data['payment_id']
+        except Exception as e:
+            print(f"❌ Error recording payment: {e}")
+            raise
+
+    def update_payment_status(self, payment_id: str, status: str, **kwargs) -> bool:
+        """Update payment status"""
+        try:
+            update_data = {
+                "status": status,
+                "updated_at": datetime.now()
+            }
+            update_data.update(kwargs)
+            return self._update_document("payments", "payment_id", payment_id, update_data) is not None
+        except Exception as e:
+            print(f"❌ Error updating payment: {e}")
+            return False
+
+    def get_payment(self, payment_id: str, projection=None) -> Optional[Dict]:
+        """Get payment by ID"""
+        try:
+            return self._find_one("payments", "payment_id", payment_id, projection)
+        except Exception as e:
+            print(f"❌ Error fetching payment: {e}")
+            return None
+
+    # ==================== ANALYTICS ====================
+
+    def _insert_events(self, events: List[Dict]):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "INSERT INTO analytics (event_type, timestamp, data) VALUES (?, ?, ?)",
+                [(event.get("event_type"), sql_time(event["timestamp"]), dumps(event.get("data")))
+                 for event in events]
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _scan_analytics(self, days: int = 7) -> Dict:
+        """
+        Analytics summary over the orders created in the last `days` days
+
+        Two queries on the created_at index: totals (count, paid revenue,
+        distinct customers) and popular items (items array via json_each)
+        """
+        try:
+            start_date = sql_time(datetime.now() - timedelta(days=days))
+            statuses = sorted(REVENUE_STATUSES)
+            connection = self._connection()
+
+            total_orders, total_revenue, unique_customers = connection.execute(
+                "SELECT COUNT(*),"
+                f" COALESCE(SUM(CASE WHEN status IN ({', '.join('?' * len(statuses))})"
+                "   THEN total ELSE 0 END), 0),"
+                " COUNT(DISTINCT customer_phone)"
+                " FROM orders WHERE created_at >= ?",
+                statuses + [start_date]
+            ).fetchone()
+
+            popular_items = [
+                {"_id": name, "count": count}
+                for name, count in connection.execute(
+                    "SELECT json_extract(item.value, '$.name') AS name,"
+                    " SUM(COALESCE(json_extract(item.value, '$.qty'), 0)) AS count"
+                    " FROM orders, json_each(orders.doc, '$.items') AS item"
+                    " WHERE orders.created_at >= ?"
+                    " GROUP BY name ORDER BY count DESC LIMIT 10",
+                    (start_date,)
+                )
+            ]
+
+            return {
+                "period_days": days,
+                "total_orders": total_orders,
+                "total_revenue": total_revenue,
+                "unique_customers": unique_customers,
+                "popular_items": popular_items,
+                "avg_order_value": total_revenue / total_orders if total_orders > 0 else 0
+            }
+        except Exception as e:
+            print(f"❌ Error fetching analytics: {e}")
+            return {}
+
+    # ==================== UTILITIES ====================
+
+    def health_check(self) -> bool:
+        """Check if the database file is readable"""
+        try:
+            self._connection().execute("SELECT 1").fetchone()
+            return True
+        except Exception:
+            return False
+
+    def get_schema_status(self) -> Dict:
+        """Schema version of the database file"""
+        return {"state": self.schema_state, "version": SCHEMA_VERSION}
+
+    def close(self):
+        """Flush queued analytics events and close every thread's connection"""
+        try:
+            super().close()
+            with self._connections_lock:
+                for connection in self._connections:
+                    connection.close()
+                self._connections.clear()
+            self._local = threading.local()
+            print("✅ SQLite storage closed")
+        except Exception as e:
+            print(f"⚠️ Error closing SQLite storage: {e}")
+
+
+# Example usage
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    print("🧪 Testing SQLite Storage...\n")
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "restaurant.db")
+        db = SQLiteStorage(path)
+        assert db._connection().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        print("✅ WAL journal")
+        assert db.get_schema_status()["state"] == "applied"
+        reopened = SQLiteStorage(path)
+        assert reopened.get_schema_status() == {"state": "current", "version": SCHEMA_VERSION}
+        reopened.close()
+        print("✅ Schema created once per version")
+
+        eta = datetime.now() + timedelta(minutes=30)
+        db.create_order({"order_id": "S1", "customer_phone": "+923001234567", "total": 1300,
+                         "items": [{"name": "Chicken Biryani", "qty": 2, "price": 650}],
+                         "status": "PENDING_PAYMENT", "estimated_delivery": eta})
+        assert db.get_order("S1")["estimated_delivery"] == eta
+        print("✅ Datetimes round-trip")
+
+        # Duplicate transitions on several threads (each with its own connection)
+        def pay(i):
+            db.update_order_status("S1", "PAID", **{f"note_{i}": i})
+
+        threads = [threading.Thread(target=pay, args=(i,)) for i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        order = db.get_order("S1")
+        assert sum(f"note_{i}" in order for i in range(10)) == 1 and len(order["status_history"]) == 1
+        print("✅ Concurrent transitions (BEGIN IMMEDIATE): exactly one applied")
+
+        plan = " ".join(row[-1] for row in db._connection().execute(
+            "EXPLAIN QUERY PLAN SELECT doc FROM orders WHERE status IN ('PAID', 'COOKING')"
+            " ORDER BY created_at DESC, order_id DESC LIMIT 11"))
+        assert "orders_status_created" in plan, plan
+        print(f"✅ Active-orders page uses the index: {plan}")
+
+        db.log_event("order_created", {"order_id": "S1"})
+        assert db.flush_events()
+        assert db._connection().execute("SELECT COUNT(*) FROM analytics").fetchone()[0] == 1
+        print(f"📊 {db.get_analytics(days=1)}")
+        db.close()
+
+    print("\n✅ All tests passed!")
@@ -0,0 +1,593 @@
+"""
+Storage Backend Interface
+The methods OrderManager, PaymentHandler and the webhook server call on
+their database, shared by every backend:
+
+- database.Database: MongoDB (production, multi-process)
+- memory_storage.InMemoryStorage: dicts in this process (tests, benchmarks)
+- sqlite_storage.SQLiteStorage: one SQLite file in WAL mode (single-box shops)
+
+Pick one with DATABASE_BACKEND ('mongo', 'memory' or 'sqlite');
+database.get_database() builds it.
+
+Documents, projections (view names, field lists or MongoDB projection
+dicts), page tokens and analytics summaries look the same whatever the
+backend, so callers never need to know which one they got.
+"""
+
+import base64
+import copy
+import json
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from analytics_rollups import REVENUE_STATUSES
+
+
+# Order statuses in lifecycle order (OrderManager.ORDER_STATUSES minus CANCELLED)
+ORDER_LIFECYCLE = [
+    "PENDING_PAYMENT", "PAID", "CONFIRMED", "COOKING", "READY", "DISPATCHED", "DELIVERED"
+]
+
+
+def forward_transitions(lifecycle: List[str]) -> Dict[str, List[str]]:
+    """
+    Every forward move of a lifecycle (steps may be skipped) plus
+    cancellation of any order not yet delivered
+    """
+    transitions = {
+        status: lifecycle[index + 1:] + (["CANCELLED"] if index + 1 < len(lifecycle) else [])
+        for index, status in enumerate(lifecycle)
+    }
+    transitions["CANCELLED"] = []
+    return transitions
+
+
+class PageTokenError(ValueError):
+    """Raised for a malformed or tampered next_page_token"""
+
+
+def encode_page_token(order: Dict) -> str:
+    """Opaque keyset cursor pointing just after `order` in (created_at, order_id) order"""
+    payload = json.dumps({"c": order["created_at"].isoformat(), "o": order["order_id"]})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_page_token(token: str) -> Tuple[datetime, str]:
+    """(created_at, order_id) of the last order on the previous page"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        return datetime.fromisoformat(payload["c"]), str(payload["o"])
+    except Exception:
+        raise PageTokenError("Invalid page token")
+
+
+# ==================== DOCUMENT HELPERS ====================
+
+def _copy_path(source: Dict, target: Dict, parts: List[str]):
+    """Copy one dotted field (through sub-documents and arrays of them)"""
+    key = parts[0]
+    if key not in source:
+        return
+    value = source[key]
+    if len(parts) == 1:
+        target[key] = value
+    elif isinstance(value, dict):
+        _copy_path(value, target.setdefault(key, {}), parts[1:])
+    elif isinstance(value, list):
+        documents = [item for item in value if isinstance(item, dict)]
+        projected = target.setdefault(key, [{} for _ in documents])
+        for item, out in zip(documents, projected):
+            _copy_path(item, out, parts[1:])
+
+
+def project(document: Optional[Dict], projection: Optional[Dict]) -> Optional[Dict]:
+    """
+    Copy of `document` shaped by a MongoDB projection dict
+
+    Supports inclusion ({"status": 1, "items.name": 1}, _id kept unless
+    {"_id": 0}) and exclusion ({"gateway_response": 0}) of top-level and
+    dotted fields, which is all StorageBackend._projection produces
+    """
+    if document is None:
+        return None
+    if not projection:
+        return copy.deepcopy(document)
+
+    included = [field for field, value in projection.items() if value and field != "_id"]
+    if not included:
+        result = copy.deepcopy(document)
+        for field in projection:
+            *parents, leaf = field.split(".")
+            target = result
+            for parent in parents:
+                target = target.get(parent) if isinstance(target, dict) else None
+            if isinstance(target, dict):
+                target.pop(leaf, None)
+        return result
+
+    result = {}
+    if projection.get("_id", 1) and "_id" in document:
+        result["_id"] = document["_id"]
+    for field in included:
+        _copy_path(document, result, field.split("."))
+    return copy.deepcopy(result)
+
+
+def summarize_orders(orders: Iterable[Dict], days: int) -> Dict:
+    """
+    get_analytics summary computed in Python from the orders in the window
+
+    Same numbers as the MongoDB $facet scan: order count, revenue of paid
+    statuses, distinct customer phones and the ten most ordered items
+    """
+    total_orders, total_revenue = 0, 0
+    customers = set()
+    items: Counter = Counter()
+    for order in orders:
+        total_orders += 1
+        if order.get("status") in REVENUE_STATUSES:
+            total_revenue += order.get("total", 0)
+        if order.get("customer_phone") is not None:
+            customers.add(order["customer_phone"])
+        for item in order.get("items", []):
+            items[item.get("name")] += item.get("qty", 0)
+
+    return {
+        "period_days": days,
+        "total_orders": total_orders,
+        "total_revenue": total_revenue,
+        "unique_customers": len(customers),
+        "popular_items": [{"_id": name, "count": count} for name, count in items.most_common(10)],
+        "avg_order_value": total_revenue / total_orders if total_orders > 0 else 0
+    }
+
+
+# ==================== INTERFACE ====================
+
+class StorageBackend:
+    """
+    Orders, customers, payments and analytics storage
+
+    Subclasses implement the CRUD methods, _order_page_cursor /
+    _iter_orders (keyset pages and streams over an order filter),
+    _insert_events and _scan_analytics; paging, views and the analytics
+    event path are shared here.
+
+    Order filters are MongoDB-style and limited to what the methods below
+    issue: equality on a field, or {"$in": [...]} on status.
+    """
+
+    backend = "base"
+
+    # Named lightweight views: (document kind, fields returned)
+    VIEWS = {
+        'order_status': ('order', [
+            'order_id', 'status', 'payment_status', 'estimated_delivery', 'updated_at'
+        ]),
+        'order_timeline': ('order', [
+            'order_id', 'status', 'created_at', 'paid_at', 'confirmed_at', 'cooking_at',
+            'ready_at', 'dispatched_at', 'delivered_at', 'cancelled_at', 'status_history'
+        ]),
+        'order_summary': ('order', [
+            'order_id', 'customer_name', 'customer_phone', 'items', 'subtotal',
+            'delivery_fee', 'tax', 'total', 'status', 'payment_status', 'delivery_type',
+            'delivery_address', 'special_instructions', 'estimated_delivery', 'created_at'
+        ]),
+        'payment_status': ('payment', [
+            'payment_id', 'order_id', 'method', 'amount', 'status', 'transaction_id',
+            'failure_reason', 'created_at', 'updated_at', 'paid_at'
+        ]),
+    }
+
+    # Orders still moving through the kitchen / delivery
+    ACTIVE_STATUSES = [
+        "PENDING_PAYMENT", "PAID", "CONFIRMED",
+        "COOKING", "READY", "DISPATCHED"
+    ]
+
+    # Newest first; order_id breaks created_at ties so pages never overlap
+    ORDER_PAGE_SORT = [("created_at", -1), ("order_id", -1)]
+
+    # Legal status changes (from → to): any later lifecycle status, so the
+    # kitchen may skip steps (PAID → READY, CONFIRMED → DISPATCHED), or
+    # CANCELLED until delivery. Never backwards or sideways, so racing
+    # updates (duplicate webhooks, kitchen + cancel) cannot both apply.
+    # transition_order_status checks them in the same write
+    ORDER_TRANSITIONS = forward_transitions(ORDER_LIFECYCLE)
+
+    # Update fields copied into the status_history entry of a transition
+    HISTORY_FIELDS = ("notes", "cancellation_reason")
+
+    # Fields of the previous order transition_order_status returns
+    TRANSITION_PROJECTION = {"_id": 0, "order_id": 1, "status": 1, "total": 1, "created_at": 1}
+
+    # Background analytics writer (event_writer.BufferedEventWriter) or None
+    event_writer = None
+
+    # ==================== PROJECTIONS ====================
+
+    def _projection(self, projection) -> Optional[Dict]:
+        """
+        MongoDB projection from a view name, a list of fields or a dict
+        (views and field lists leave out _id)
+        """
+        if projection is None or isinstance(projection, dict):
+            return projection
+        if isinstance(projection, str):
+            if projection not in self.VIEWS:
+                raise ValueError(f"Unknown view: {projection}")
+            projection = self.VIEWS[projection][1]
+        return {"_id": 0, **{field: 1 for field in projection}}
+
+    def _page_projection(self, projection) -> Optional[Dict]:
+        """Projection that always keeps the keyset fields (created_at, order_id)"""
+        fields = self._projection(projection)
+        if fields and any(value for key, value in fields.items() if key != "_id"):
+            fields = {**fields, "created_at": 1, "order_id": 1}
+        return fields
+
+    def get_cache_stats(self) -> Dict:
+        """Hit/miss counters of the read-through cache"""
+        return {"backend": "none"}
+
+    # ==================== ORDERS ====================
+
+    def create_order(self, order_data: Dict) -> str:
+        raise NotImplementedError
+
+    def get_order(self, order_id: str, projection=None) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def allowed_previous(self, new_status: str) -> List[str]:
+        """Statuses an order may move to `new_status` from"""
+        return [status for status, targets in self.ORDER_TRANSITIONS.items() if new_status in targets]
+
+    def _status_update(self, new_status: str, fields: Dict) -> Tuple[Dict, Dict]:
+        """($set fields, status_history entry) of one transition"""
+        now = datetime.now()
+        update_data = {
+            "status": new_status,
+            "updated_at": now,
+            f"{new_status.lower()}_at": now
+        }
+        update_data.update(fields)
+        entry = {"status": new_status, "at": now}
+        entry.update({field: fields[field] for field in self.HISTORY_FIELDS if fields.get(field)})
+        return update_data, entry
+
+    def transition_order_status(self, order_id: str, new_status: str,
+                                from_statuses: Optional[List[str]] = None,
+                                **kwargs) -> Optional[Dict]:
+        """
+        Move an order to `new_status` in one atomic write
+
+        The status precondition, the update, the status_history entry (the
+        status-change event) and reading the previous state are a single
+        operation, so there is no read-then-write window
+
+        Args:
+            order_id: Order ID
+            new_status: New status
+            from_statuses: Statuses the order must currently be in
+                (default: allowed_previous(new_status))
+            **kwargs: Additional fields to update
+
+        Returns:
+            The order before the change (TRANSITION_PROJECTION fields), or
+            None if it does not exist or the transition is not allowed
+
+        Raises:
+            Storage errors (connection lost, ...) - never reported as None,
+            so callers cannot mistake an outage for a rejected move
+        """
+        raise NotImplementedError
+
+    def update_order_status(self, order_id: str, new_status: str, **kwargs) -> bool:
+        """Update order status (False if missing or not a legal transition; storage errors raise)"""
+        return self.transition_order_status(order_id, new_status, **kwargs) is not None
+
+    def _order_page_cursor(self, query: Dict, page_size: int, page_token: Optional[str],
+                           projection=None) -> Iterable[Dict]:
+        """Orders of one keyset page matching `query`, plus one look-ahead order"""
+        raise NotImplementedError
+
+    def _iter_orders(self, query: Dict, batch_size: int, projection=None) -> Iterator[Dict]:
+        """Stream orders matching `query` newest first"""
+        raise NotImplementedError
+
+    def _order_page(self, query: Dict, page_size: int, page_token: Optional[str],
+                    projection=None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        One keyset page of orders matching `query`
+
+        Returns:
+            (orders, next_page_token or None on the last page)
+        """
+        # One extra document tells whether another page exists
+        orders = list(self._order_page_cursor(query, page_size, page_token, projection))
+        if len(orders) > page_size:
+            orders = orders[:page_size]
+            return orders, encode_page_token(orders[-1])
+        return orders, None
+
+    def get_customer_orders(self, customer_phone: str, limit: int = 10,
+                            projection=None) -> List[Dict]:
+        """Get customer's order history (projection: see get_order)"""
+        try:
+            orders, _ = self.get_customer_orders_page(customer_phone, limit, projection=projection)
+            return orders
+        except Exception as e:
+            print(f"❌ Error fetching customer orders: {e}")
+            return []
+
+    def get_customer_orders_page(self, customer_phone: str, page_size: int = 10,
+                                 page_token: Optional[str] = None,
+                                 projection=None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        One page of a customer's order history, newest first
+
+        Args:
+            customer_phone: Customer phone
+            page_size: Orders per page
+            page_token: next_page_token of the previous page (None = first page)
+            projection: See get_order (created_at / order_id are always kept)
+
+        Returns:
+            (orders, next_page_token or None)
+
+        Raises:
+            PageTokenError: Malformed page_token
+        """
+        return self._order_page({"customer_phone": customer_phone}, page_size, page_token, projection)
+
+    def iter_customer_orders(self, customer_phone: str, batch_size: int = 100,
+                             projection=None) -> Iterator[Dict]:
+        """Stream a customer's whole order history from the cursor, newest first"""
+        return self._iter_orders({"customer_phone": customer_phone}, batch_size, projection)
+
+    def get_active_orders(self, projection=None) -> List[Dict]:
+        """Get all active orders (not delivered/cancelled; projection: see get_order)"""
+        try:
+            return list(self.iter_active_orders(projection=projection))
+        except Exception as e:
+            print(f"❌ Error fetching active orders: {e}")
+            return []
+
+    def get_active_orders_page(self, page_size: int = 100, page_token: Optional[str] = None,
+                               projection=None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        One page of active orders, newest first
+
+        Returns:
+            (orders, next_page_token or None)
+
+        Raises:
+            PageTokenError: Malformed page_token
+        """
+        return self._order_page({"status": {"$in": self.ACTIVE_STATUSES}}, page_size, page_token, projection)
+
+    def iter_active_orders(self, batch_size: int = 100, projection=None) -> Iterator[Dict]:
+        """Stream active orders from the cursor, newest first"""
+        return self._iter_orders({"status": {"$in": self.ACTIVE_STATUSES}}, batch_size, projection)
+
+    # ==================== CUSTOMERS ====================
+
+    def create_customer(self, customer_data: Dict) -> str:
+        raise NotImplementedError
+
+    def get_customer(self, phone: str, projection=None) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def update_customer_preferences(self, phone: str, preferences: Dict) -> bool:
+        raise NotImplementedError
+
+    # ==================== PAYMENTS ====================
+
+    def create_payment(self, payment_data: Dict) -> str:
+        raise NotImplementedError
+
+    def update_payment_status(self, payment_id: str, status: str, **kwargs) -> bool:
+        raise NotImplementedError
+
+    def get_payment(self, payment_id: str, projection=None) -> Optional[Dict]:
+        raise NotImplementedError
+
+    # ==================== ANALYTICS ====================
+
+    def _insert_events(self, events: List[Dict]):
+        """Write analytics events synchronously"""
+        raise NotImplementedError
+
+    def log_event(self, event_type: str, event_data: Dict):
+        """Log analytics event (queued for the background writer when buffered)"""
+        try:
+            event = {
+                "event_type": event_type,
+                "data": event_data,
+                "timestamp": datetime.now()
+            }
+
+            if self.event_writer is not None:
+                self.event_writer.put(event)
+            else:
+                self._insert_events([event])
+        except Exception as e:
+            print(f"⚠️ Analytics logging failed: {e}")
+
+    def flush_events(self, timeout: float = 10.0) -> bool:
+        """Write all queued analytics events now (True once written)"""
+        if self.event_writer is None:
+            return True
+        return self.event_writer.flush(timeout)
+
+    def get_event_writer_stats(self) -> Dict:
+        """Analytics queue depth, write counters and flush latency"""
+        if self.event_writer is None:
+            return {"buffered": False}
+        return {"buffered": True, **self.event_writer.get_stats()}
+
+    def get_analytics(self, days: int = 7) -> Dict:
+        """Get analytics summary (orders created in the last `days` days)"""
+        return self._scan_analytics(days)
+
+    def _scan_analytics(self, days: int = 7) -> Dict:
+        """Analytics summary computed from the orders themselves"""
+        raise NotImplementedError
+
+    # ==================== UTILITIES ====================
+
+    def health_check(self) -> bool:
+        """Check if the storage is usable"""
+        return True
+
+    def wait_for_indexes(self, timeout: float = 60.0) -> bool:
+        """Block until the schema / indexes are in place (False on failure / timeout)"""
+        return True
+
+    def get_schema_status(self) -> Dict:
+        """Applied schema version and migration state"""
+        return {"state": "current"}
+
+    def close(self):
+        """Flush queued analytics events and release the storage"""
+        if self.event_writer is not None:
+            self.event_writer.close()
+
+
+# Example usage
+if __name__ == "__main__":
+    import os
+    import tempfile
+    import threading
+    from datetime import timedelta
+
+    from memory_storage import InMemoryStorage
+    from sqlite_storage import SQLiteStorage
+
+    print("🧪 Testing Storage Backends...\n")
+
+    order = {
+        "_id": "x", "order_id": "A", "status": "PAID", "created_at": datetime(2026, 1, 1),
+        "items": [{"name": "Tea", "qty": 2, "price": 80}, {"name": "Naan", "qty": 1, "price": 40}],
+    }
+    assert project(order, {"_id": 0, "items.name": 1}) == {"items": [{"name": "Tea"}, {"name": "Naan"}]}
+    assert project(order, {"items": 0, "_id": 0}) == {"order_id": "A", "status": "PAID",
+                                                     "created_at": datetime(2026, 1, 1)}
+    assert project(order, {"status": 1})["_id"] == "x"
+    print("✅ Projections")
+
+    def check_backend(db: StorageBackend):
+        """Same scenario against any backend"""
+        now = datetime.now()
+        for i in range(25):
+            db.create_order({
+                "order_id": f"ORD{i:03d}",
+                "customer_phone": f"+9230000000{i % 3}",
+                "items": [{"name": "Chicken Biryani", "qty": 1 + i % 2, "price": 650},
+                          {"name": "Raita", "qty": 1, "price": 80}],
+                "total": 650 * (1 + i % 2) + 80,
+                "status": "PENDING_PAYMENT" if i % 5 else "DELIVERED",
+                "estimated_delivery": now + timedelta(minutes=45),
+            })
+
+        order = db.get_order("ORD001")
+        assert order["order_id"] == "ORD001" and isinstance(order["created_at"], datetime)
+        order["items"].clear()
+        assert len(db.get_order("ORD001")["items"]) == 2, "get_order must return a copy"
+        assert set(db.get_order("ORD001", projection="order_status")) == {
+            "order_id", "status", "estimated_delivery", "updated_at"}
+        assert db.get_order("missing") is None
+
+        assert db.update_order_status("ORD001", "PAID", notes="cash")
+        paid = db.get_order("ORD001")
+        assert paid["status"] == "PAID" and paid["notes"] == "cash" and "paid_at" in paid
+        assert [entry["status"] for entry in paid["status_history"]] == ["PAID"]
+        assert paid["status_history"][0]["notes"] == "cash"
+        assert not db.update_order_status("missing", "PAID")
+
+        # Illegal transitions are rejected by the write itself
+        assert not db.update_order_status("ORD001", "PAID")
+        assert not db.update_order_status("ORD000", "COOKING")  # DELIVERED is final
+        assert db.update_order_status("ORD001", "READY")         # kitchen may skip steps
+        assert not db.update_order_status("ORD001", "COOKING")   # but never go back
+        previous = db.transition_order_status("ORD002", "CANCELLED", cancellation_reason="test")
+        assert previous == {"order_id": "ORD002", "status": "PENDING_PAYMENT",
+                            "total": previous["total"], "created_at": previous["created_at"]}
+        assert db.transition_order_status("ORD002", "PAID") is None
+        assert db.transition_order_status("ORD002", "PAID", from_statuses=["CANCELLED"])["status"] == "CANCELLED"
+        history = db.get_order("ORD002", projection="order_timeline")["status_history"]
+        assert [entry["status"] for entry in history] == ["CANCELLED", "PAID"]
+        assert history[0]["cancellation_reason"] == "test"
+        assert db.update_order_status("ORD002", "CANCELLED", notes="customer asked")
+
+        # Racing duplicates: exactly one of them applies
+        results = []
+        racers = [threading.Thread(target=lambda: results.append(
+            db.transition_order_status("ORD003", "PAID") is not None)) for _ in range(8)]
+        for thread in racers:
+            thread.start()
+        for thread in racers:
+            thread.join()
+        assert results.count(True) == 1, results
+        assert len(db.get_order("ORD003")["status_history"]) == 1
+
+        # Keyset pages: newest first, no overlap, nothing missed
+        seen, token = [], None
+        active_count = len(db.get_active_orders())
+        while True:
+            page, token = db.get_active_orders_page(page_size=7, page_token=token, projection="order_status")
+            seen.extend(order["order_id"] for order in page)
+            if token is None:
+                break
+        active = [order["order_id"] for order in db.iter_active_orders(projection=["order_id"])]
+        assert seen == active and len(seen) == active_count == 19 and len(set(seen)) == 19, seen
+        assert [o["order_id"] for o in db.get_active_orders()] == active
+
+        history = db.get_customer_orders("+92300000001", limit=3)
+        assert len(history) == 3 and all(o["customer_phone"] == "+92300000001" for o in history)
+        assert [o["created_at"] for o in history] == sorted((o["created_at"] for o in history), reverse=True)
+        assert len(list(db.iter_customer_orders("+92300000001", batch_size=2))) == 8
+        try:
+            db.get_customer_orders_page("+92300000001", page_token="garbage")
+            raise AssertionError("bad page token accepted")
+        except ValueError:  # PageTokenError
+            pass
+
+        db.create_customer({"phone": "+92300000001", "name": "Ayesha"})
+        assert db.update_customer_preferences("+92300000001", {"spice": "mild"})
+        customer = db.get_customer("+92300000001")
+        assert customer["name"] == "Ayesha" and customer["preferences"] == {"spice": "mild"}
+        assert not db.update_customer_preferences("+92399999999", {})
+
+        db.create_payment({"payment_id": "PAY1", "order_id": "ORD001", "amount": 730, "status": "PENDING"})
+        assert db.update_payment_status("PAY1", "COMPLETED", transaction_id="T1")
+        assert db.get_payment("PAY1", projection="payment_status")["transaction_id"] == "T1"
+
+        db.log_event("order_created", {"order_id": "ORD001"})
+        assert db.flush_events()
+
+        analytics = db.get_analytics(days=1)
+        assert analytics["total_orders"] == 25
+        assert analytics["unique_customers"] == 3
+        # 5 delivered + ORD001 / ORD003 paid
+        paid_totals = [650 * (1 + i % 2) + 80 for i in range(25) if i % 5 == 0 or i in (1, 3)]
+        assert analytics["total_revenue"] == sum(paid_totals), analytics
+        assert analytics["popular_items"][0] == {"_id": "Chicken Biryani", "count": 37}
+        assert db.health_check()
+        return analytics
+
+    memory = InMemoryStorage()
+    memory_analytics = check_backend(memory)
+    memory.close()
+    print("✅ InMemoryStorage")
+
+    with tempfile.TemporaryDirectory() as folder:
+        sqlite = SQLiteStorage(os.path.join(folder, "restaurant.db"))
+        sqlite_analytics = check_backend(sqlite)
+        sqlite.close()
+    assert sqlite_analytics == memory_analytics
+    print("✅ SQLiteStorage (same analytics as the in-memory backend)")
+
+    print("\n✅ All tests passed!")
@@ -0,0 +1,111 @@
+"""
+Round-trip test for the menu snapshot format
+Run directly (python test_menu_snapshot.py) or with pytest.
+"""
+
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+from menu_snapshot import PREAMBLE, MenuSnapshot, SnapshotError, read_snapshot, write_snapshot
+
+
+def _sample_snapshot() -> MenuSnapshot:
+    rng = np.random.default_rng(7)
+    return MenuSnapshot(
+        items=[
+            {"name": "Chicken Biryani", "price": 650.0, "description": "Spicy rice",
+             "category": "MAIN COURSE", "tags": ["meat", "spicy"]},
+            {"name": "Mango Lassi", "price": 250.0, "description": "",
+             "category": "DRINKS", "tags": ["sweet"]},
+        ],
+        chunks=[f"MAIN COURSE\nChicken Biryani Rs {600 + i} — ذائقہ" for i in range(37)],
+        embeddings=rng.standard_normal((37, 384)).astype(np.float32),
+        metadata={"menu_version": "abc123", "embedding_model": "all-MiniLM-L6-v2"},
+    )
+
+
+def _stored_checksum(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return PREAMBLE.unpack(f.read(PREAMBLE.size))[3]
+
+
+def _expect_rejected(path: str, verify: bool = True) -> str:
+    try:
+        read_snapshot(path, verify=verify)
+    except SnapshotError as e:
+        return str(e)
+    raise AssertionError(f"Damaged snapshot was accepted: {path}")
+
+
+def test_round_trip():
+    original = _sample_snapshot()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "menu.snap")
+        write_snapshot(path, original)
+        loaded = read_snapshot(path)
+
+        assert loaded.items == original.items
+        assert loaded.chunks == original.chunks
+        assert loaded.metadata == original.metadata
+        assert loaded.embeddings.dtype == np.float32
+        assert np.array_equal(loaded.embeddings, original.embeddings)
+
+        # The stored checksum covers the body, and rewriting the loaded
+        # snapshot reproduces the file byte for byte
+        with open(path, "rb") as f:
+            data = f.read()
+        assert hashlib.sha256(data[PREAMBLE.size:]).digest() == _stored_checksum(path)
+
+        copy_path = os.path.join(tmp, "copy.snap")
+        write_snapshot(copy_path, loaded)
+        assert _stored_checksum(copy_path) == _stored_checksum(path)
+        with open(copy_path, "rb") as f:
+            assert f.read() == data
+    print("✅ Round trip: items, chunks, vectors and checksum identical")
+
+
+def test_corrupted_file_rejected():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "menu.snap")
+        write_snapshot(path, _sample_snapshot())
+        with open(path, "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            last = f.read(1)
+            f.seek(-1, os.SEEK_END)
+            f.write(bytes([last[0] ^ 0xFF]))
+        print(f"✅ Corrupted: {_expect_rejected(path)}")
+
+
+def test_truncated_file_rejected():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "menu.snap")
+        size = write_snapshot(path, _sample_snapshot())
+
+        os.truncate(path, size - 4)
+        print(f"✅ Truncated: {_expect_rejected(path)}")
+        # Caught by the size check even without the checksum pass
+        print(f"✅ Truncated (verify=False): {_expect_rejected(path, verify=False)}")
+
+        os.truncate(path, PREAMBLE.size - 1)
+        print(f"✅ Truncated preamble: {_expect_rejected(path)}")
+
+
+def test_not_a_snapshot_rejected():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "menu.snap")
+        with open(path, "wb") as f:
+            f.write(b"%PDF-1.7" + b"\0" * 100)
+        print(f"✅ Wrong magic: {_expect_rejected(path)}")
+        print(f"✅ Missing file: {_expect_rejected(os.path.join(tmp, 'missing.snap'))}")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Menu Snapshot Round Trip...\n")
+    test_round_trip()
+    test_corrupted_file_rejected()
+    test_truncated_file_rejected()
+    test_not_a_snapshot_rejected()
+    print("\n✅ All tests passed!")
@@ -10,12 +10,13 @@ from functools import wraps
 import hashlib
 import hmac
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Optional
 import os
 
 from payment_handler import PaymentHandler, PaymentMethod
 from order_manager import OrderManager
-from database import get_database
+from database import Database, get_database
+from instrumentation import METRICS
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -49,6 +50,30 @@ def require_api_key(f):
     return decorated_function
 
 
+def view_projection(kind: str, default: str = 'full') -> Optional[str]:
+    """
+    Database view for the ?view= query param ('status' on an order → 'order_status')
+    'full' returns the whole document; unknown views raise ValueError
+    """
+    view = request.args.get('view', default)
+    if view == 'full':
+        return None
+    name = f"{kind}_{view}"
+    if name not in Database.VIEWS:
+        raise ValueError(f"Unknown view: {view}")
+    return name
+
+
+# Largest page any list endpoint returns
+MAX_PAGE_SIZE = 500
+
+
+def page_size_param(default: int) -> int:
+    """?page_size= clamped to 1..MAX_PAGE_SIZE"""
+    page_size = request.args.get('page_size', default, type=int)
+    return max(1, min(page_size or default, MAX_PAGE_SIZE))
+
+
 # ==================== HEALTH & STATUS ====================
 
 @app.route('/', methods=['GET'])
@@ -205,9 +230,16 @@ def initiate_payment_api():
 
 @app.route('/api/payment/<payment_id>', methods=['GET'])
 def get_payment_api(payment_id):
-    """Get payment details"""
+    """
+    Get payment details
+    Query params: ?view=full (default, incl. gateway data) | status
+    """
     try:
-        payment = db.get_payment(payment_id)
+        try:
+            projection = view_projection('payment')
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        payment = db.get_payment(payment_id, projection=projection)
         
         if not payment:
             return jsonify({"error": "Payment not found"}), 404
@@ -298,10 +330,19 @@ def get_payment_methods_api():
 
 @app.route('/api/customer/<phone>/orders', methods=['GET'])
 def get_customer_orders_api(phone):
-    """Get customer order history"""
+    """
+    Get customer order history, newest first
+    Query params: ?page_size=10 (or limit)&page_token=...&view=full (default) | status | summary
+    """
     try:
-        limit = request.args.get('limit', 10, type=int)
-        orders = om.get_customer_orders(phone, limit)
+        page_size = page_size_param(default=request.args.get('limit', 10, type=int))
+        try:
+            projection = view_projection('order')
+            orders, next_page_token = om.get_customer_orders_page(
+                phone, page_size, request.args.get('page_token'), projection=projection
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         # Clean and serialize
         for order in orders:
@@ -313,7 +354,8 @@ def get_customer_orders_api(phone):
         
         return jsonify({
             "success": True,
-            "orders": orders
+            "orders": orders,
+            "next_page_token": next_page_token
         }), 200
         
     except Exception as e:
@@ -347,9 +389,19 @@ def get_analytics_api():
 @app.route('/api/analytics/orders/active', methods=['GET'])
 @require_api_key
 def get_active_orders_api():
-    """Get all active orders"""
+    """
+    Get active orders, newest first, one page at a time
+    Query params: ?page_size=100&page_token=...&view=full (default) | status | summary
+    """
     try:
-        orders = om.get_active_orders()
+        page_size = page_size_param(default=100)
+        try:
+            projection = view_projection('order')
+            orders, next_page_token = om.get_active_orders_page(
+                page_size, request.args.get('page_token'), projection=projection
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         # Clean and serialize
         for order in orders:
@@ -362,7 +414,8 @@ def get_active_orders_api():
         return jsonify({
             "success": True,
             "count": len(orders),
-            "orders": orders
+            "orders": orders,
+            "next_page_token": next_page_token
         }), 200
         
     except Exception as e:
@@ -370,6 +423,45 @@ def get_active_orders_api():
         return jsonify({"error": str(e)}), 500
 
 
+# ==================== METRICS API ====================
+
+# Latest stage-timing snapshot pushed by each RAG process (see instrumentation.http_exporter)
+pushed_metrics: Dict[str, Dict] = {}
+
+
+@app.route('/api/metrics', methods=['POST'])
+@require_api_key
+def push_metrics_api():
+    """
+    Receive a stage-timing snapshot from a bot / Streamlit process
+    Body: {"source": "whatsapp-bot-1", "metrics": {span: {count, p50_ms, ...}}}
+    """
+    data = request.json or {}
+    source = data.get('source')
+    if not source or not isinstance(data.get('metrics'), dict):
+        return jsonify({"error": "Missing field: source/metrics"}), 400
+    
+    pushed_metrics[source] = {
+        "metrics": data['metrics'],
+        "received_at": datetime.now().isoformat()
+    }
+    return jsonify({"success": True}), 200
+
+
+@app.route('/api/metrics', methods=['GET'])
+@require_api_key
+def get_metrics_api():
+    """Stage latency percentiles: this process plus every pushed source"""
+    return jsonify({
+        "success": True,
+        "local": METRICS.snapshot(),
+        "analytics_writer": db.get_event_writer_stats(),
+        "db_cache": db.get_cache_stats(),
+        "db_schema": db.get_schema_status(),
+        "sources": pushed_metrics
+    }), 200
+
+
 # ==================== ERROR HANDLERS ====================
 
 @app.errorhandler(404)
@@ -417,6 +509,7 @@ def start_server(host='0.0.0.0', port=5000, debug=False):
     print("   GET  /api/order/<id>       - Get Order")
     print("   POST /api/payment/initiate - Initiate Payment")
     print("   GET  /api/analytics        - Get Analytics")
+    print("   GET  /api/metrics          - Stage Latency Percentiles")
     print("\n🔒 Protected endpoints require X-API-Key header")
     print("=" * 60)
     
@@ -521,9 +614,16 @@ def create_order_api():
 
 @app.route('/api/order/<order_id>', methods=['GET'])
 def get_order_api(order_id):
-    """Get order details"""
+    """
+    Get order details
+    Query params: ?view=full (default) | status | summary | timeline
+    """
     try:
-        order = om.get_order(order_id)
+        try:
+            projection = view_projection('order')
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        order = om.get_order(order_id, projection=projection)
         
         if not order:
             return jsonify({"error": "Order not found"}), 404
@@ -564,6 +664,8 @@ def update_order_status_api(order_id):
 
         if 'status' not in data:
             return jsonify({"error": "Missing status field"}), 400
+        if data['status'] not in om.ORDER_STATUSES:
+            return jsonify({"error": f"Invalid status: {data['status']}"}), 400
 
         # Update status
         success = om.update_status(
@@ -577,8 +679,13 @@ def update_order_status_api(order_id):
                 "success": True,
                 "message": f"Order status updated to {data['status']}"
             }), 200
-        else:
-            return jsonify({"error": "Failed to update status"}), 500
+        # Rejected: tell a missing order from a move its current status forbids
+        order = om.get_order(order_id, projection='order_status')
+        if not order:
+            return jsonify({"error": "Order not found"}), 404
+        return jsonify({
+            "error": f"Cannot move order {order_id} from {order['status']} to {data['status']}"
+        }), 409
 
     except Exception as e:
         print(f"❌ Error updating order status: {e}")
@@ -1,9 +1,8 @@
 import streamlit as st
-import os
-import tempfile
 import threading
 import time
 from rag_engine import RestaurantRAG
+from menu_jobs import get_menu_jobs
 from whatsapp_handler import WhatsAppBot
 
 # Page config
@@ -51,6 +50,9 @@ if 'whatsapp_bot' not in st.session_state:
     st.session_state.whatsapp_bot = None
 if 'message_log' not in st.session_state:
     st.session_state.message_log = []
+if 'menu_job_id' not in st.session_state:
+    # Recover a job started before a browser refresh
+    st.session_state.menu_job_id = st.query_params.get("menu_job")
 
 # Header
 st.markdown("# 📱 WhatsApp Bot Control Panel")
@@ -86,33 +88,47 @@ with tab1:
         
         menu_file = st.file_uploader("Upload Menu PDF", type=['pdf'])
         
-        if st.button("🔄 Process Menu", use_container_width=True):
+        if st.button("🔄 Process Menu", use_container_width=True,
+                     disabled=bool(st.session_state.menu_job_id)):
             if not ai_key or not menu_file:
                 st.error("Please provide API key and menu PDF")
             else:
-                with st.spinner("Processing menu..."):
-                    try:
-                        # Save temp file
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
-                            tmp.write(menu_file.getvalue())
-                            tmp_path = tmp.name
-                        
-                        # Initialize RAG
-                        st.session_state.rag_engine = RestaurantRAG(
-                            api_key=ai_key,
-                            model=model,
-                            provider=provider
-                        )
-                        
-                        # Process menu
-                        st.session_state.rag_engine.process_menu(tmp_path)
-                        
-                        os.unlink(tmp_path)
-                        
-                        st.success("✅ Menu processed successfully!")
-                        
-                    except Exception as e:
-                        st.error(f"❌ Error: {e}")
+                # Process in the background; the engine is picked up below when ready
+                st.session_state.menu_job_id = get_menu_jobs().submit(
+                    menu_file.getvalue(),
+                    menu_file.name,
+                    lambda: RestaurantRAG(
+                        api_key=ai_key,
+                        model=model,
+                        provider=provider
+                    )
+                )
+                st.query_params["menu_job"] = st.session_state.menu_job_id
+        
+        @st.fragment(run_every=1)
+        def menu_job_progress():
+            """Poll the background menu job and hand its engine to this session"""
+            job = get_menu_jobs().get(st.session_state.menu_job_id)
+            if job is None or job.finished:
+                st.session_state.menu_job_id = None
+                st.query_params.pop("menu_job", None)
+                engine = get_menu_jobs().claim(job.job_id) if job is not None else None
+                if engine is not None:
+                    st.session_state.rag_engine = engine
+                    st.session_state.menu_job_result = ("success", "✅ Menu processed successfully!")
+                elif job is not None and job.status == "failed":
+                    st.session_state.menu_job_result = ("error", f"❌ Error: {job.error}")
+                st.rerun()
+            
+            st.progress(job.progress, text=f"{job.filename}: {job.stage_label}...")
+            if st.button("✖ Cancel", key="cancel_menu_job"):
+                get_menu_jobs().cancel(job.job_id)
+        
+        if st.session_state.menu_job_id:
+            menu_job_progress()
+        elif st.session_state.get('menu_job_result'):
+            level, message = st.session_state.pop('menu_job_result')
+            getattr(st, level)(message)
     
     with col2:
         st.markdown("### 📱 WhatsApp Configuration")
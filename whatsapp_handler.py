@@ -272,6 +272,11 @@ def create_webhook_server(whatsapp_bot: WhatsAppBot):
         """Health check endpoint"""
         return jsonify({"status": "healthy"}), 200
     
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """RAG stage latency percentiles of this worker"""
+        return jsonify(whatsapp_bot.rag_engine.get_metrics()), 200
+    
     return app
 
 